@@ -0,0 +1,254 @@
+"""
+Офлайн-обработка корпуса запросов без HTTP: файл читается построчно, строки
+собираются в пачки, пачки обрабатываются в пуле процессов теми же функциями,
+что и /process/bulk, результаты пишутся в JSONL или CSV в порядке входа.
+
+Модели загружаются один раз в родительском процессе до fork и разделяются
+воркерами copy-on-write (без fork — один раз в каждом воркере при старте).
+Одновременно в работе не больше 2 * --workers пачек, поэтому память не зависит
+от размера файла.
+
+Вход: текст (одна строка — один запрос) или JSONL (строка JSON или объект
+с полем --field); формат определяется по расширению (.jsonl, .ndjson).
+Выход: JSONL или CSV (по расширению .csv); "-" — stdin/stdout.
+
+Запуск: python -m nlp_server.app.batch queries.jsonl results.jsonl [--workers 4] [--chunk-size 500]
+        python -m nlp_server.app.batch queries.txt results.csv --tasks intent entities
+"""
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from contextlib import contextmanager
+from itertools import islice
+from nlp_server.app.models.process_text_model import PROCESS_TASKS
+from nlp_server.app.services.model_registry import model_registry
+from nlp_server.app.services.pipeline import BulkItem, parse_text_line, process_items
+from nlp_server.app.services.serialization import dumps
+from typing import IO, Any, Deque, Dict, Iterable, Iterator, List, Optional, Tuple
+import argparse
+import csv
+import gc
+import json
+import multiprocessing
+import os
+import sys
+import time
+
+
+OUTPUT_FIELDS = [
+    "index", "original_text", "processed_text", "intent", "confidence",
+    "entities", "spellcheck_corrections", "error"
+]
+
+
+class CountingReader:
+    """
+    Строки входного потока с подсчётом прочитанных байт для отчёта о прогрессе:
+    tell() у stdin и каналов недоступен
+    """
+
+    def __init__(self, source: IO[bytes]):
+        self.source = source
+        self.position = 0
+
+    def __iter__(self) -> Iterator[bytes]:
+        for line in self.source:
+            self.position += len(line)
+            yield line
+
+
+def read_items(source: Iterable[bytes], input_format: str, field: str) -> Iterator[BulkItem]:
+    """Элементы входного файла по одному, без чтения файла целиком; пустые строки пропускаются"""
+    index = 0
+    for line in source:
+        if not line.strip():
+            continue
+        if input_format == "jsonl":
+            text, error = parse_text_line(line, field)
+        else:
+            text, error = line.decode("utf-8", errors="replace").rstrip("\r\n"), None
+        yield index, text, error
+        index += 1
+
+
+def chunked(items: Iterator[BulkItem], size: int) -> Iterator[List[BulkItem]]:
+    """Пачки по size элементов"""
+    while True:
+        chunk = list(islice(items, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+class JsonlWriter:
+    def __init__(self, target: IO[str]):
+        self.target = target
+
+    def write(self, result: Dict[str, Any]):
+        self.target.write(dumps(result).decode("utf-8") + "\n")
+
+
+class CsvWriter:
+    """Сущности и исправления пишутся в ячейки как JSON"""
+
+    def __init__(self, target: IO[str]):
+        self.writer = csv.DictWriter(target, OUTPUT_FIELDS, extrasaction="ignore")
+        self.writer.writeheader()
+
+    def write(self, result: Dict[str, Any]):
+        row = dict(result)
+        for key in ("entities", "spellcheck_corrections"):
+            if key in row:
+                row[key] = json.dumps(row[key], ensure_ascii=False)
+        self.writer.writerow(row)
+
+
+WRITERS = {"jsonl": JsonlWriter, "csv": CsvWriter}
+
+
+class Progress:
+    """Счётчики обработки и периодический отчёт в stderr: сколько, с какой скоростью, какая доля файла"""
+
+    def __init__(self, total_bytes: Optional[int], interval: float):
+        self.total_bytes = total_bytes
+        self.interval = interval
+        self.started = time.perf_counter()
+        self.last_report = self.started
+        self.processed = 0
+        self.errors = 0
+        self.position = 0
+
+    def update(self, results: List[Dict[str, Any]], position: int):
+        self.processed += len(results)
+        self.errors += sum(1 for result in results if "error" in result)
+        self.position = position
+        now = time.perf_counter()
+        if self.interval > 0 and now - self.last_report >= self.interval:
+            self.last_report = now
+            print(self.line(), file=sys.stderr, flush=True)
+
+    def line(self) -> str:
+        summary = self.summary()
+        done = f", {self.position / self.total_bytes:.1%} of input" if self.total_bytes else ""
+        return (
+            f"Processed {summary['processed']} texts ({summary['errors']} errors) "
+            f"in {summary['elapsed_s']}s, {summary['texts_per_s']} texts/s{done}"
+        )
+
+    def summary(self) -> Dict[str, Any]:
+        elapsed = time.perf_counter() - self.started
+        return {
+            "processed": self.processed,
+            "errors": self.errors,
+            "elapsed_s": round(elapsed, 1),
+            "texts_per_s": round(self.processed / elapsed, 1) if elapsed else 0.0
+        }
+
+
+@contextmanager
+def _open_input(path: str) -> Iterator[Tuple[IO[bytes], Optional[int]]]:
+    """Входной файл в двоичном режиме и его размер (для stdin — None)"""
+    if path == "-":
+        yield sys.stdin.buffer, None
+        return
+    with open(path, "rb") as source:
+        yield source, os.path.getsize(path)
+
+
+@contextmanager
+def _open_output(path: str) -> Iterator[IO[str]]:
+    if path == "-":
+        yield sys.stdout
+        return
+    with open(path, "w", encoding="utf-8", newline="") as target:
+        yield target
+
+
+def _init_worker():
+    """Загрузка моделей в процессе пула (после fork они уже загружены в родителе)"""
+    model_registry.load_all()
+
+
+def run_batch(
+    input_path: str,
+    output_path: str,
+    tasks: List[str],
+    input_format: str,
+    output_format: str,
+    field: str = "text",
+    workers: int = 1,
+    chunk_size: int = 500,
+    progress_interval: float = 10.0
+) -> Dict[str, Any]:
+    """Обработка файла целиком; возвращает итоговые счётчики"""
+    model_registry.load_all(parallel=True)
+
+    with _open_input(input_path) as (source, total_bytes), _open_output(output_path) as target:
+        writer = WRITERS[output_format](target)
+        progress = Progress(total_bytes, progress_interval)
+        reader = CountingReader(source)
+        chunks = chunked(read_items(reader, input_format, field), chunk_size)
+
+        def write(results: List[Dict[str, Any]], position: int):
+            for result in results:
+                writer.write(result)
+            progress.update(results, position)
+
+        if workers <= 0:
+            for chunk in chunks:
+                write(process_items(chunk, tasks), reader.position)
+        else:
+            # Объекты моделей переносятся в постоянное поколение GC, чтобы сборки
+            # в воркерах не трогали их страницы (см. serve.py)
+            gc.collect()
+            gc.freeze()
+            methods = multiprocessing.get_all_start_methods()
+            context = multiprocessing.get_context("fork" if "fork" in methods else "spawn")
+
+            with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_worker) as pool:
+                pending: Deque[Tuple[Future, int]] = deque()
+                for chunk in chunks:
+                    # Пулы этапов внутри воркера не нужны: распараллелено по пачкам
+                    future = pool.submit(process_items, chunk, tasks, False)
+                    pending.append((future, reader.position))
+                    if len(pending) >= 2 * workers:
+                        future, position = pending.popleft()
+                        write(future.result(), position)
+                while pending:
+                    future, position = pending.popleft()
+                    write(future.result(), position)
+
+    summary = progress.summary()
+    print(progress.line(), file=sys.stderr, flush=True)
+    return summary
+
+
+def _format_from_extension(path: str, formats: Dict[str, str], default: str) -> str:
+    return formats.get(os.path.splitext(path)[1].lower(), default)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Офлайн-обработка корпуса запросов")
+    parser.add_argument("input", help="Входной файл (текст или JSONL), - для stdin")
+    parser.add_argument("output", help="Файл результатов (JSONL или CSV), - для stdout")
+    parser.add_argument("--tasks", nargs="+", default=PROCESS_TASKS, choices=PROCESS_TASKS)
+    parser.add_argument("--input-format", choices=["text", "jsonl"], default=None, help="По умолчанию по расширению")
+    parser.add_argument("--output-format", choices=sorted(WRITERS), default=None, help="По умолчанию по расширению")
+    parser.add_argument("--field", default="text", help="Поле с текстом в объектах JSONL")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Процессов (0 — в текущем процессе)")
+    parser.add_argument("--chunk-size", type=int, default=500, help="Текстов в одной задаче процесса")
+    parser.add_argument("--progress-interval", type=float, default=10.0, help="Секунд между отчётами (0 — без них)")
+    args = parser.parse_args()
+
+    input_format = args.input_format or _format_from_extension(
+        args.input, {".jsonl": "jsonl", ".ndjson": "jsonl"}, "text"
+    )
+    output_format = args.output_format or _format_from_extension(args.output, {".csv": "csv"}, "jsonl")
+
+    run_batch(
+        args.input, args.output, args.tasks, input_format, output_format,
+        args.field, args.workers, args.chunk_size, args.progress_interval
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Сборка артефактов моделей заранее, чтобы сервис стартовал без обучения и построения
+индексов: частотный словарь, индекс опечаток (в обоих форматах), модель
+классификации намерений и индекс подсказок (доменные слова и, если задан
+DATABASE_URL, термины search_dictionary).
+
+Запуск: python -m nlp_server.app.build_artifacts artifacts/
+Затем: SPELL_FREQUENCY_PATH=artifacts/spell_frequencies.pkl
+       SPELL_INDEX_PATH=artifacts/spell_index.pkl
+       (или SPELL_BACKEND=compact SPELL_COMPACT_PATH=artifacts/spell_dictionary.bin)
+       INTENT_MODEL_PATH=artifacts/intent_model.joblib
+       SUGGEST_INDEX_PATH=artifacts/suggest_index.pkl
+Модель намерений обучается движком INTENT_ENGINE; сервис должен запускаться с тем же.
+"""
+from nlp_server.app.services.intent_classifier import train_intent_model
+from nlp_server.app.services.compact_index import write_compact_dictionary
+from nlp_server.app.services.db import database_enabled, init_db
+from nlp_server.app.services.domain_dictionary import domain_sync
+from nlp_server.app.services.spell_checker import domain_words, save_word_frequencies
+from nlp_server.app.services.spell_index import SymSpellIndex
+from nlp_server.app.services.suggest import SuggestIndex, collect_terms
+from spellchecker import SpellChecker
+import joblib
+import os
+import sys
+
+
+def build_artifacts(output_dir: str):
+    """Сборка всех артефактов в каталог output_dir"""
+    os.makedirs(output_dir, exist_ok=True)
+
+    frequencies = dict(SpellChecker(language="ru").word_frequency.dictionary)
+    frequency_path = os.path.join(output_dir, "spell_frequencies.pkl")
+    save_word_frequencies(frequencies, frequency_path)
+    print(f"Частотный словарь ({len(frequencies)} слов): {frequency_path}")
+
+    index = SymSpellIndex(frequencies)
+    index.add_words(domain_words)
+    index_path = os.path.join(output_dir, "spell_index.pkl")
+    index.save(index_path)
+    print(f"Индекс опечаток ({len(index)} слов): {index_path}")
+
+    compact_path = os.path.join(output_dir, "spell_dictionary.bin")
+    write_compact_dictionary(index.frequencies, compact_path, index.max_distance)
+    print(f"Компактный словарь ({len(index)} слов): {compact_path}")
+
+    model_path = os.path.join(output_dir, "intent_model.joblib")
+    joblib.dump(train_intent_model(), model_path)
+    print(f"Модель намерений: {model_path}")
+
+    phrases = {}
+    if database_enabled():
+        init_db()
+        _, phrases = domain_sync.read_terms()
+    suggest_index = SuggestIndex(collect_terms(phrases))
+    suggest_path = os.path.join(output_dir, "suggest_index.pkl")
+    suggest_index.save(suggest_path)
+    print(f"Индекс подсказок ({len(suggest_index)} терминов, {len(phrases)} из БД): {suggest_path}")
+
+
+if __name__ == "__main__":
+    build_artifacts(sys.argv[1] if len(sys.argv) > 1 else "artifacts")
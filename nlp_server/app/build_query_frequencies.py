@@ -0,0 +1,116 @@
+"""
+Сборка частот запросов для ранжирования исправлений опечаток: из истории запросов
+берутся обработанные тексты принятых исправлений, считаются частоты слов и пар
+(предыдущее слово, слово). Редкие пары отбрасываются, чтобы единичные запросы
+не меняли выбор исправления.
+
+Запуск: DATABASE_URL=... python -m nlp_server.app.build_query_frequencies artifacts/query_frequencies.pkl
+Затем: QUERY_FREQUENCY_PATH=artifacts/query_frequencies.pkl
+       (или POST /spellcheck/ranker/reload в работающем сервисе)
+"""
+from nlp_server.app.schemas.query_history import QueryHistory
+from nlp_server.app.services.db import SessionLocal, database_enabled
+from nlp_server.app.services.query_ranker import QueryRanker, context_token
+from nlp_server.app.services.spell_checker import is_checked_word, tokenize
+from sqlalchemy import or_, select
+from typing import Callable, Dict, Iterator, List, Tuple
+import argparse
+import time
+
+
+def stream_queries(session_factory: Callable, min_rating: int, chunk_size: int) -> Iterator[List[Tuple[str, str]]]:
+    """
+    Пары (исходный запрос, обработанный запрос) пачками. Запросы с оценкой ниже
+    min_rating считаются неудачными исправлениями; запросы без оценки учитываются
+    """
+    with session_factory() as session:
+        query = (
+            select(QueryHistory.original_query, QueryHistory.processed_query)
+            .where(QueryHistory.processed_query.is_not(None))
+            .where(or_(QueryHistory.satisfaction_rating.is_(None), QueryHistory.satisfaction_rating >= min_rating))
+        )
+        result = session.execute(query.execution_options(yield_per=chunk_size))
+        for chunk in result.partitions():
+            yield chunk
+
+
+def count_query(text: str, unigrams: Dict[str, int], bigrams: Dict[Tuple[str, str], int]):
+    """Подсчёт слов и пар соседних слов одного запроса (знаки препинания разрывают пары)"""
+    previous = None
+    for word, is_word in tokenize(text):
+        if not is_word:
+            previous = None
+            continue
+        token = context_token(word)
+        if is_checked_word(word):
+            unigrams[token] = unigrams.get(token, 0) + 1
+            if previous is not None:
+                bigrams[(token, previous)] = bigrams.get((token, previous), 0) + 1
+        previous = token
+
+
+def _word_count(text: str) -> int:
+    return sum(1 for _, is_word in tokenize(text) if is_word)
+
+
+def build_query_frequencies(
+    session_factory: Callable,
+    min_rating: int = 3,
+    min_count: int = 2,
+    chunk_size: int = 5000
+) -> QueryRanker:
+    """Частоты по всей истории запросов с отбрасыванием пар и слов реже min_count"""
+    unigrams: Dict[str, int] = {}
+    pairs: Dict[Tuple[str, str], int] = {}
+    queries = 0
+    skipped = 0
+
+    for chunk in stream_queries(session_factory, min_rating, chunk_size):
+        for original, processed in chunk:
+            # Исправление, изменившее число слов, не сопоставить с исходным запросом
+            if _word_count(original or "") != _word_count(processed):
+                skipped += 1
+                continue
+            count_query(processed, unigrams, pairs)
+            queries += 1
+
+    bigrams: Dict[str, Dict[str, int]] = {}
+    for (word, previous), count in pairs.items():
+        if count >= min_count:
+            bigrams.setdefault(word, {})[previous] = count
+
+    metadata = {
+        "built_at": time.time(),
+        "queries": queries,
+        "skipped": skipped,
+        "min_rating": min_rating,
+        "min_count": min_count
+    }
+    return QueryRanker(
+        {word: count for word, count in unigrams.items() if count >= min_count},
+        bigrams,
+        metadata
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Частоты запросов для ранжирования исправлений")
+    parser.add_argument("output", nargs="?", default="query_frequencies.pkl", help="Файл артефакта")
+    parser.add_argument("--min-rating", type=int, default=3, help="Минимальная оценка принятого запроса")
+    parser.add_argument("--min-count", type=int, default=2, help="Минимальная частота слова или пары")
+    parser.add_argument("--chunk-size", type=int, default=5000, help="Строк истории за одну выборку")
+    args = parser.parse_args()
+
+    if not database_enabled():
+        parser.error("DATABASE_URL is not set")
+
+    ranker = build_query_frequencies(SessionLocal, args.min_rating, args.min_count, args.chunk_size)
+    ranker.save(args.output)
+    print(
+        f"Частоты запросов ({ranker.metadata['queries']} запросов, {len(ranker)} слов, "
+        f"{len(ranker.bigrams)} с контекстом): {args.output}"
+    )
+
+
+if __name__ == "__main__":
+    main()
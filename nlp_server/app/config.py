@@ -0,0 +1,180 @@
+import os
+
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Каталог файлов, которые сервис создаёт при работе (собранные словари, примеры
+# и версии моделей намерений); по умолчанию data/ в корне проекта, вне пакета
+DATA_DIR = os.getenv("NLP_DATA_DIR", os.path.join(os.path.dirname(os.path.dirname(APP_DIR)), "data"))
+
+# Прогрев моделей при старте: background — в фоне, пока сервер уже принимает запросы
+# (готовность видна в /health/ready), blocking — до приёма запросов, lazy — при первом
+# обращении; MODEL_WARMUP_PARALLEL=1 загружает модели параллельно
+MODEL_WARMUP = os.getenv("MODEL_WARMUP", "background")
+MODEL_WARMUP_PARALLEL = os.getenv("MODEL_WARMUP_PARALLEL", "1") == "1"
+
+# Повтор загрузки модели после ошибки: первая пауза в секундах, дальше она удваивается
+# до MODEL_RETRY_MAX_BACKOFF; до истечения паузы обращения сразу получают ту же ошибку
+MODEL_RETRY_BACKOFF = float(os.getenv("MODEL_RETRY_BACKOFF", "5"))
+MODEL_RETRY_MAX_BACKOFF = float(os.getenv("MODEL_RETRY_MAX_BACKOFF", "300"))
+
+# Путь к заранее построенному индексу опечаток (пусто — индекс строится при старте)
+SPELL_INDEX_PATH = os.getenv("SPELL_INDEX_PATH", "")
+
+# Хранение словаря опечаток: symspell — словари Python в памяти процесса,
+# compact — компактный файл SPELL_COMPACT_PATH, отображаемый в память только для
+# чтения и разделяемый всеми воркерами (собирается при первом старте, если его нет)
+SPELL_BACKEND = os.getenv("SPELL_BACKEND", "symspell")
+SPELL_COMPACT_PATH = os.getenv("SPELL_COMPACT_PATH", os.path.join(DATA_DIR, "spell_dictionary.bin"))
+
+# Автодополнение /suggest: заранее собранный индекс (python -m nlp_server.app.build_artifacts;
+# пусто или нет файла — собирается при старте из доменных слов и search_dictionary),
+# наибольшее число подсказок в ответе и минимальная длина слова для подсказок с опечаткой
+SUGGEST_INDEX_PATH = os.getenv("SUGGEST_INDEX_PATH", "")
+SUGGEST_MAX_LIMIT = int(os.getenv("SUGGEST_MAX_LIMIT", "20"))
+SUGGEST_FUZZY_MIN_LENGTH = int(os.getenv("SUGGEST_FUZZY_MIN_LENGTH", "3"))
+
+# Частоты слов и биграмм из истории запросов для ранжирования исправлений с учётом
+# предыдущего слова (собираются python -m nlp_server.app.build_query_frequencies);
+# пусто — кандидаты ранжируются только по общему частотному словарю
+QUERY_FREQUENCY_PATH = os.getenv("QUERY_FREQUENCY_PATH", "")
+
+# Путь к сериализованному частотному словарю pyspellchecker (пусто — читать из пакета)
+SPELL_FREQUENCY_PATH = os.getenv("SPELL_FREQUENCY_PATH", "")
+
+# Модель классификации намерений: tfidf — TfidfVectorizer со словарём n-грамм и
+# LogisticRegression, hashing — HashingVectorizer по словам и символам без словаря
+# и плотный вектор коэффициентов (пачка оценивается одним умножением матрицы на вектор)
+INTENT_ENGINE = os.getenv("INTENT_ENGINE", "tfidf")
+
+# Файл модели классификации намерений: модель tfidf поставляется с приложением,
+# модели других движков обучаются при первом старте и сохраняются в DATA_DIR
+INTENT_MODEL_PATH = os.getenv(
+    "INTENT_MODEL_PATH",
+    os.path.join(APP_DIR, "intent_model.joblib") if INTENT_ENGINE == "tfidf"
+    else os.path.join(DATA_DIR, f"intent_model_{INTENT_ENGINE}.joblib")
+)
+
+# Переобучение модели намерений: накопленные примеры (JSONL), каталог версий модели
+# с описанием текущей (current.json), проверка новой модели перекрёстной проверкой —
+# не ниже INTENT_MIN_ACCURACY и не хуже текущей более чем на INTENT_MAX_ACCURACY_DROP;
+# воркеры проверяют появление новой версии раз в INTENT_MODEL_RELOAD_INTERVAL секунд (0 — нет)
+INTENT_TRAINING_PATH = os.getenv("INTENT_TRAINING_PATH", os.path.join(DATA_DIR, "intent_training.jsonl"))
+INTENT_MODEL_DIR = os.getenv("INTENT_MODEL_DIR", os.path.join(DATA_DIR, "intent_models"))
+INTENT_MIN_ACCURACY = float(os.getenv("INTENT_MIN_ACCURACY", "0.7"))
+INTENT_MAX_ACCURACY_DROP = float(os.getenv("INTENT_MAX_ACCURACY_DROP", "0.05"))
+INTENT_MODEL_RELOAD_INTERVAL = float(os.getenv("INTENT_MODEL_RELOAD_INTERVAL", "30"))
+
+# Размеры LRU-кэшей исправлений: слово -> исправление и текст -> ответ (0 — отключить)
+SPELL_TOKEN_CACHE_SIZE = int(os.getenv("SPELL_TOKEN_CACHE_SIZE", "50000"))
+SPELL_TEXT_CACHE_SIZE = int(os.getenv("SPELL_TEXT_CACHE_SIZE", "10000"))
+
+# Проверка по мере ввода через WebSocket /spellcheck/ws: предел открытых сессий в воркере,
+# простой в секундах, после которого соединение закрывается и состояние сессии
+# освобождается, и предельная длина одного текста
+SPELL_WS_MAX_SESSIONS = int(os.getenv("SPELL_WS_MAX_SESSIONS", "1000"))
+SPELL_WS_IDLE_TIMEOUT = float(os.getenv("SPELL_WS_IDLE_TIMEOUT", "60"))
+SPELL_WS_MAX_TEXT_LENGTH = int(os.getenv("SPELL_WS_MAX_TEXT_LENGTH", "2000"))
+
+# Общий для воркеров кэш ответов /process: файл SQLite в режиме WAL (пусто — без кэша),
+# срок жизни ответа в секундах и предельное число ответов (сверх него удаляются самые
+# старые). Ключ включает версии моделей и словаря, поэтому после их смены старые
+# ответы не отдаются
+PROCESS_CACHE_PATH = os.getenv("PROCESS_CACHE_PATH", "")
+PROCESS_CACHE_TTL = float(os.getenv("PROCESS_CACHE_TTL", "86400"))
+PROCESS_CACHE_MAX_ENTRIES = int(os.getenv("PROCESS_CACHE_MAX_ENTRIES", "100000"))
+
+# Пул процессов для массовой проверки: число процессов (0 — без пула),
+# минимум уникальных слов для распараллеливания и размер пачки слов на процесс
+SPELL_BATCH_WORKERS = int(os.getenv("SPELL_BATCH_WORKERS", str(min(4, os.cpu_count() or 1))))
+SPELL_BATCH_MIN_WORDS = int(os.getenv("SPELL_BATCH_MIN_WORDS", "200"))
+SPELL_BATCH_CHUNK_SIZE = int(os.getenv("SPELL_BATCH_CHUNK_SIZE", "100"))
+
+# Пул потоков для CPU-этапов обработки и предел одновременных запросов к нему:
+# сверх предела сервер сразу отвечает 503 вместо бесконечной очереди
+NLP_EXECUTOR_WORKERS = int(os.getenv("NLP_EXECUTOR_WORKERS", "4"))
+NLP_MAX_PENDING_REQUESTS = int(os.getenv("NLP_MAX_PENDING_REQUESTS", "64"))
+
+# Микробатчинг /process: запросы копятся не дольше PROCESS_BATCH_MAX_WAIT_MS
+# или до PROCESS_BATCH_MAX_SIZE штук и обрабатываются одним вызовом модели
+PROCESS_BATCH_MAX_SIZE = int(os.getenv("PROCESS_BATCH_MAX_SIZE", "32"))
+PROCESS_BATCH_MAX_WAIT_MS = float(os.getenv("PROCESS_BATCH_MAX_WAIT_MS", "2"))
+
+# /process/bulk: тексты обрабатываются и отдаются клиенту пачками по столько штук;
+# загрузка NDJSON больше PROCESS_BULK_SPOOL_SIZE байт сохраняется во временный файл
+PROCESS_BULK_CHUNK_SIZE = int(os.getenv("PROCESS_BULK_CHUNK_SIZE", "256"))
+PROCESS_BULK_SPOOL_SIZE = int(os.getenv("PROCESS_BULK_SPOOL_SIZE", str(8 * 2 ** 20)))
+
+# Загрузка spaCy: full — весь конвейер, ner — только NER (без теггера, парсера,
+# лемматизатора), rules — без spaCy, только регулярные выражения
+SPACY_MODEL = os.getenv("SPACY_MODEL", "ru_core_news_sm")
+SPACY_LOAD_MODE = os.getenv("SPACY_LOAD_MODE", "ner")
+
+# Запрашиваемые типы сущностей: суммы и товары ищут регулярные выражения, company — spaCy,
+# и только в текстах с признаками названия организации (ООО, кавычки, слово с заглавной)
+ENTITY_TYPES = [t.strip() for t in os.getenv("ENTITY_TYPES", "sum,product,company").split(",") if t.strip()]
+
+# nlp.pipe для массовой обработки: число процессов и размер пачки; процессы
+# запускаются только для пачек от SPACY_BULK_MIN_TEXTS текстов
+SPACY_N_PROCESS = int(os.getenv("SPACY_N_PROCESS", "1"))
+SPACY_BATCH_SIZE = int(os.getenv("SPACY_BATCH_SIZE", "256"))
+SPACY_BULK_MIN_TEXTS = int(os.getenv("SPACY_BULK_MIN_TEXTS", "1000"))
+
+# Production-запуск (python -m nlp_server.app.serve): адрес, число воркеров,
+# предел собственной (не разделяемой) памяти воркера в МБ (0 — без предела;
+# при превышении воркер плавно перезапускается) и период отчёта о памяти в секундах
+NLP_HOST = os.getenv("NLP_HOST", "127.0.0.1")
+NLP_PORT = int(os.getenv("NLP_PORT", "8000"))
+NLP_WORKERS = int(os.getenv("NLP_WORKERS", str(os.cpu_count() or 1)))
+NLP_WORKER_MAX_MEMORY_MB = int(os.getenv("NLP_WORKER_MAX_MEMORY_MB", "0"))
+NLP_MEMORY_REPORT_INTERVAL = float(os.getenv("NLP_MEMORY_REPORT_INTERVAL", "60"))
+
+# Перезапуск упавших воркеров: воркер, проживший меньше NLP_WORKER_MIN_UPTIME секунд,
+# считается быстрым падением; его слот перезапускается с экспоненциальной задержкой
+# от NLP_RESPAWN_BACKOFF до NLP_RESPAWN_MAX_BACKOFF секунд, а после
+# NLP_WORKER_MAX_FAST_FAILURES быстрых падений подряд (0 — без предела)
+# сервер останавливается с ненулевым кодом выхода
+NLP_WORKER_MIN_UPTIME = float(os.getenv("NLP_WORKER_MIN_UPTIME", "10"))
+NLP_RESPAWN_BACKOFF = float(os.getenv("NLP_RESPAWN_BACKOFF", "1"))
+NLP_RESPAWN_MAX_BACKOFF = float(os.getenv("NLP_RESPAWN_MAX_BACKOFF", "60"))
+NLP_WORKER_MAX_FAST_FAILURES = int(os.getenv("NLP_WORKER_MAX_FAST_FAILURES", "5"))
+
+# Логирование: уровень, доля запросов, попадающих в журнал (1 — все, 0 — ни одного),
+# и асинхронная запись через очередь loguru (enqueue), чтобы запись в журнал
+# не задерживала обработку запроса
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+LOG_SAMPLE_RATE = float(os.getenv("LOG_SAMPLE_RATE", "0.01"))
+LOG_ENQUEUE = os.getenv("LOG_ENQUEUE", "1") == "1"
+
+# База данных (SQLAlchemy URL, например sqlite:///nlp.db); пусто — сервис работает без БД
+DATABASE_URL = os.getenv("DATABASE_URL", "")
+
+# Доменный словарь из таблицы search_dictionary: размер пачки при потоковом чтении
+# и период проверки изменений в секундах (0 — только при старте и по запросу)
+DICTIONARY_CHUNK_SIZE = int(os.getenv("DICTIONARY_CHUNK_SIZE", "5000"))
+DICTIONARY_RELOAD_INTERVAL = float(os.getenv("DICTIONARY_RELOAD_INTERVAL", "60"))
+
+# Поиск по записям о закупках (BM25): снимок индекса (каталог; пусто — индекс только
+# в памяти и собирается при каждом старте; снимок пересобирается, если изменились
+# корпус, обрезка слов или DATABASE_URL), исходный корпус JSONL (записи также
+# берутся из таблицы procurement_records, если задан DATABASE_URL), длина обрезки
+# основ слов после отбрасывания окончаний (0 — без обрезки), документов в сегменте
+# при сборке, предел числа сегментов до слияния, допуск фильтра по сумме из запроса
+# (±доля) и период проверки новых записей в БД и снимков, записанных другими
+# воркерами, в секундах (0 — нет)
+SEARCH_INDEX_PATH = os.getenv("SEARCH_INDEX_PATH", "")
+SEARCH_CORPUS_PATH = os.getenv("SEARCH_CORPUS_PATH", "")
+SEARCH_STEM_LENGTH = int(os.getenv("SEARCH_STEM_LENGTH", "6"))
+SEARCH_SEGMENT_SIZE = int(os.getenv("SEARCH_SEGMENT_SIZE", "100000"))
+SEARCH_MAX_SEGMENTS = int(os.getenv("SEARCH_MAX_SEGMENTS", "8"))
+SEARCH_SUM_TOLERANCE = float(os.getenv("SEARCH_SUM_TOLERANCE", "0.2"))
+SEARCH_RELOAD_INTERVAL = float(os.getenv("SEARCH_RELOAD_INTERVAL", "30"))
+
+# Запись истории запросов в query_history (нужен DATABASE_URL): записи копятся в буфере
+# до HISTORY_BUFFER_SIZE штук (0 — не записывать) и пишутся пачками по HISTORY_BATCH_SIZE
+# не реже чем раз в HISTORY_FLUSH_INTERVAL секунд. При переполнении буфера или ошибке БД
+# записи дописываются в файл HISTORY_SPILL_PATH (пусто — отбрасываются) и досылаются позже
+HISTORY_BUFFER_SIZE = int(os.getenv("HISTORY_BUFFER_SIZE", "10000"))
+HISTORY_BATCH_SIZE = int(os.getenv("HISTORY_BATCH_SIZE", "500"))
+HISTORY_FLUSH_INTERVAL = float(os.getenv("HISTORY_FLUSH_INTERVAL", "1.0"))
+HISTORY_SPILL_PATH = os.getenv("HISTORY_SPILL_PATH", "")
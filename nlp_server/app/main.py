@@ -1,21 +1,116 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 
-from routers.health.router import router as health_router
-from routers.process.router import router as process_router
-from routers.spellcheck.router import router as spellcheck_router
+from nlp_server.app.config import (
+    MODEL_WARMUP, MODEL_WARMUP_PARALLEL, DICTIONARY_RELOAD_INTERVAL, INTENT_MODEL_RELOAD_INTERVAL,
+    SEARCH_RELOAD_INTERVAL
+)
+from nlp_server.app.routers.health.router import router as health_router
+from nlp_server.app.routers.intent.router import router as intent_router
+from nlp_server.app.routers.metrics.router import router as metrics_router
+from nlp_server.app.routers.process.router import router as process_router
+from nlp_server.app.routers.search.router import frontend_router as search_frontend_router
+from nlp_server.app.routers.search.router import router as search_router
+from nlp_server.app.routers.spellcheck.router import router as spellcheck_router
+from nlp_server.app.routers.suggest.router import router as suggest_router
+from nlp_server.app.services.db import database_enabled
+from nlp_server.app.services.domain_dictionary import reload_periodically
+from nlp_server.app.services.executor import nlp_executor
+from nlp_server.app.services.history_writer import history_writer
+from nlp_server.app.services.intent_training import refresh_periodically
+from nlp_server.app.services.log import setup_logging
+from nlp_server.app.services.metrics import HTTP_LATENCY, HTTP_REQUESTS
+from nlp_server.app.services.model_registry import model_registry
+from nlp_server.app.services.result_cache import result_cache
+from nlp_server.app.services import search
+from nlp_server.app.services.spell_batch import shutdown_spell_pool
 
+import asyncio
+import time
 import uvicorn
 
+
+setup_logging()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Прогрев моделей и фоновые задачи при старте, остановка пулов при завершении"""
+    warmup = None
+    if MODEL_WARMUP == "blocking":
+        await asyncio.to_thread(model_registry.load_all, MODEL_WARMUP_PARALLEL)
+    elif MODEL_WARMUP == "background":
+        # Сервер сразу принимает запросы, готовность видна в /health/ready
+        warmup = asyncio.create_task(asyncio.to_thread(model_registry.load_all, MODEL_WARMUP_PARALLEL))
+
+    # Поток записи истории запросов запускается в каждом воркере
+    history_writer.start()
+
+    # Файл общего кэша ответов и его схема создаются до первого запроса
+    await asyncio.to_thread(result_cache.open)
+
+    # Изменения доменного словаря в БД подхватываются без перезапуска
+    dictionary_reload = None
+    if database_enabled() and DICTIONARY_RELOAD_INTERVAL > 0:
+        dictionary_reload = asyncio.create_task(reload_periodically(DICTIONARY_RELOAD_INTERVAL))
+
+    # Версия модели намерений, принятая после переобучения в другом воркере
+    intent_refresh = None
+    if INTENT_MODEL_RELOAD_INTERVAL > 0:
+        intent_refresh = asyncio.create_task(refresh_periodically(INTENT_MODEL_RELOAD_INTERVAL))
+
+    # Записи, добавленные в другом воркере или в таблицу procurement_records
+    search_refresh = None
+    if SEARCH_RELOAD_INTERVAL > 0:
+        search_refresh = asyncio.create_task(search.refresh_periodically(SEARCH_RELOAD_INTERVAL))
+
+    yield
+
+    if dictionary_reload is not None:
+        dictionary_reload.cancel()
+    if intent_refresh is not None:
+        intent_refresh.cancel()
+    if search_refresh is not None:
+        search_refresh.cancel()
+    if warmup is not None and not warmup.done():
+        await warmup
+    nlp_executor.shutdown()
+    shutdown_spell_pool()
+    await asyncio.to_thread(history_writer.stop)
+
+
 app = FastAPI(
     title="NLP Server API",
     description="Microservice for processing native language",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 app.include_router(health_router)
+app.include_router(intent_router)
+app.include_router(metrics_router)
 app.include_router(process_router)
+app.include_router(search_router)
+app.include_router(search_frontend_router)
 app.include_router(spellcheck_router)
+app.include_router(suggest_router)
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    """Счётчик и задержка запросов по шаблону пути (не по фактическому URL, чтобы не плодить серии)"""
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        route = request.scope.get("route")
+        endpoint = route.path if route is not None else "unmatched"
+        HTTP_LATENCY.observe(time.perf_counter() - started, endpoint, request.method)
+        HTTP_REQUESTS.inc(endpoint, request.method, str(status))
+
 
 app.add_middleware(
     CORSMiddleware,
@@ -26,4 +121,4 @@ app.add_middleware(
 
 
 if __name__ == "__main__":
-    uvicorn.run(app)
\ No newline at end of file
+    uvicorn.run(app)
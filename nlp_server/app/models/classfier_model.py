@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Dict, List, Optional
+from typing import Any, Dict, List, Optional
 
 
 class ClassifyIntentRequest(BaseModel):
@@ -10,3 +10,16 @@ class ClassifyIntentResponse(BaseModel):
     confidence: float
     possible_intents: Dict[str, float]
     keywords: List[str]
+
+class IntentExamplesRequest(BaseModel):
+    texts: List[str]
+    labels: List[int]
+    retrain: bool = True
+
+class IntentRetrainStatus(BaseModel):
+    state: str
+    model_version: Optional[str] = None
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    last_result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
@@ -1,10 +1,20 @@
 from pydantic import BaseModel
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Literal, Optional, get_args
+
+
+# Этапы обработки; неизвестное имя этапа в запросе отклоняется с 422
+ProcessTask = Literal["spellcheck", "intent", "entities"]
+PROCESS_TASKS: List[str] = list(get_args(ProcessTask))
 
 
 class ProcessTextRequest(BaseModel):
     text: str
-    tasks: List[str] = ["spellcheck", "intent", "entities"]
+    tasks: List[ProcessTask] = PROCESS_TASKS
+
+
+class BulkProcessRequest(BaseModel):
+    texts: List[str]
+    tasks: List[ProcessTask] = PROCESS_TASKS
 
 
 
@@ -19,4 +29,15 @@ class ProcessTextResponse(BaseModel):
 
 class HealthResponse(BaseModel):
     status: str
-    model_versions: Dict[str, str]
\ No newline at end of file
+    model_versions: Dict[str, str]
+
+
+class ModelLoadState(BaseModel):
+    status: str
+    load_time: Optional[float] = None
+    detail: Optional[str] = None
+
+
+class ReadinessResponse(BaseModel):
+    ready: bool
+    models: Dict[str, ModelLoadState]
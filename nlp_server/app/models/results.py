@@ -0,0 +1,31 @@
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+
+# Внутренние результаты сервисов: лёгкие объекты без проверки полей, которые роутеры
+# сериализуют один раз (services/serialization.py). Схемы ответов API для OpenAPI —
+# модели Pydantic с теми же полями (SpellCheckResult, ClassifyIntentResponse,
+# ExtractEntitiesResponse)
+
+
+@dataclass(slots=True)
+class SpellResult:
+    """Исправление опечаток в одном тексте; error — причина, если текст не удалось проверить"""
+    original_text: str
+    corrected_text: str
+    corrections: Dict[str, str]
+    confidence: float = 1.0
+    error: Optional[str] = None
+
+
+@dataclass(slots=True)
+class IntentResult:
+    intent: str
+    confidence: float
+    possible_intents: Dict[str, float]
+    keywords: List[str] = field(default_factory=list)
+
+
+@dataclass(slots=True)
+class EntityResult:
+    entities: Dict[str, Any]
@@ -0,0 +1,28 @@
+from pydantic import BaseModel
+from typing import Any, Dict, List, Optional
+
+
+class SearchDocument(BaseModel):
+    id: Optional[str] = None
+    title: str
+    description: Optional[str] = None
+    category: Optional[str] = None
+    amount: Optional[float] = None
+
+
+class SearchHit(SearchDocument):
+    score: float
+
+
+class SearchResponse(BaseModel):
+    query: str
+    processed_text: str
+    intent: str
+    entities: Dict[str, Any]
+    filters: Dict[str, Any]
+    total: int
+    results: List[SearchHit]
+
+
+class AddSearchDocumentsRequest(BaseModel):
+    documents: List[SearchDocument]
@@ -17,6 +17,7 @@ class CorrectSpellingResponse(BaseModel):
     original_text: str
     corrected_text: str
     corrections: Dict[str, str]
+    confidence: float = 1.0
 
 
 class BulkSpellCheckRequest(BaseModel):
@@ -0,0 +1,13 @@
+from pydantic import BaseModel
+from typing import List
+
+
+class Suggestion(BaseModel):
+    text: str
+    frequency: int
+    distance: int
+
+
+class SuggestResponse(BaseModel):
+    query: str
+    suggestions: List[Suggestion]
@@ -1,5 +1,9 @@
-from nlp_server.app.models.process_text_model import HealthResponse
-from fastapi import APIRouter
+from nlp_server.app.models.process_text_model import HealthResponse, ReadinessResponse
+from nlp_server.app.services.memory import process_memory
+from nlp_server.app.services.model_registry import model_registry
+from nlp_server.app.services.versions import model_versions
+from fastapi import APIRouter, Response
+import os
 
 
 router = APIRouter(
@@ -10,11 +14,19 @@ router = APIRouter(
 @router.get("/", response_model=HealthResponse)
 async def health_check():
     """Проверка статуса сервера и версий моделей"""
-    return {
-        "status": "healthy",
-        "model_versions": {
-            "intent_classifier": "1.0",
-            "entity_extractor": "1.0",
-            "spell_checker": "1.0"
-        }
-    }
\ No newline at end of file
+    return {"status": "healthy", "model_versions": model_versions()}
+
+
+@router.get("/ready", response_model=ReadinessResponse)
+async def readiness_check(response: Response):
+    """Готовность к приёму трафика: состояние и время загрузки каждой модели"""
+    ready = model_registry.ready()
+    if not ready:
+        response.status_code = 503
+    return {"ready": ready, "models": model_registry.status()}
+
+
+@router.get("/memory")
+async def memory_usage():
+    """Память обслужившего запрос воркера, МБ (shared — разделяемые после fork страницы)"""
+    return {"pid": os.getpid(), "memory": process_memory()}
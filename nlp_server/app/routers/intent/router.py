@@ -0,0 +1,47 @@
+from nlp_server.app.models.classfier_model import IntentExamplesRequest, IntentRetrainStatus
+from nlp_server.app.services.intent_training import RetrainInProgress, intent_retrainer, training_store
+from fastapi import APIRouter, HTTPException
+from loguru import logger
+import asyncio
+
+
+router = APIRouter(
+    prefix="/intent",
+    tags=["Intent model retraining route"]
+)
+
+
+@router.post("/examples")
+async def add_intent_examples(request: IntentExamplesRequest):
+    """Сохранение размеченных примеров (1 - action, 0 - search) и, по умолчанию, запуск переобучения"""
+    try:
+        stored = await asyncio.to_thread(training_store.add, request.texts, request.labels)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+    retrain = None
+    if request.retrain:
+        try:
+            retrain = intent_retrainer.start()
+        except RetrainInProgress:
+            # Примеры попадут в следующее переобучение
+            retrain = intent_retrainer.status()
+    return {"stored": stored, "retrain": retrain}
+
+
+@router.post("/retrain", response_model=IntentRetrainStatus, status_code=202)
+async def retrain_intent_model():
+    """Запуск переобучения на всех сохранённых примерах; модель подменяется после проверки"""
+    try:
+        return intent_retrainer.start()
+    except RetrainInProgress as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error starting intent retraining: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/retrain", response_model=IntentRetrainStatus)
+async def retrain_status():
+    """Состояние последнего переобучения и версия текущей модели"""
+    return intent_retrainer.status()
@@ -0,0 +1,100 @@
+from nlp_server.app.services.executor import nlp_executor
+from nlp_server.app.services.history_writer import history_writer
+from nlp_server.app.services.metrics import metrics_registry, gauge_lines
+from nlp_server.app.services.model_registry import model_registry, READY
+from nlp_server.app.services.pipeline import batching_stats
+from nlp_server.app.services.spell_checker import spell_cache_stats
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from typing import List
+import os
+
+
+router = APIRouter(
+    prefix="/metrics",
+    tags=["Prometheus metrics"]
+)
+
+
+@metrics_registry.collector
+def _cache_metrics() -> List[str]:
+    """Размеры и счётчики кэшей исправлений"""
+    stats = spell_cache_stats()
+    lines = gauge_lines(
+        "nlp_spell_cache_size", "Entries in spellcheck caches",
+        {(name,): cache["size"] for name, cache in stats.items()}, ("cache",)
+    )
+    for field in ("hits", "misses", "evictions"):
+        lines += gauge_lines(
+            f"nlp_spell_cache_{field}_total", f"Spellcheck cache {field}",
+            {(name,): cache[field] for name, cache in stats.items()}, ("cache",), kind="counter"
+        )
+    return lines
+
+
+@metrics_registry.collector
+def _batching_metrics() -> List[str]:
+    """Число пачек и элементов микробатчинга по этапам"""
+    stats = batching_stats()
+    return (
+        gauge_lines(
+            "nlp_batches_total", "Micro-batches executed",
+            {(stage,): batch["batches"] for stage, batch in stats.items()}, ("stage",), kind="counter"
+        )
+        + gauge_lines(
+            "nlp_batch_items_total", "Items processed in micro-batches",
+            {(stage,): batch["items"] for stage, batch in stats.items()}, ("stage",), kind="counter"
+        )
+    )
+
+
+@metrics_registry.collector
+def _executor_metrics() -> List[str]:
+    """Занятые слоты пула и отказы из-за перегрузки"""
+    return (
+        gauge_lines("nlp_executor_active_requests", "Requests holding an executor slot", {(): nlp_executor.active})
+        + gauge_lines(
+            "nlp_executor_rejected_total", "Requests rejected with 503", {(): nlp_executor.rejected}, kind="counter"
+        )
+    )
+
+
+@metrics_registry.collector
+def _history_metrics() -> List[str]:
+    """Буфер и счётчики записи истории запросов"""
+    stats = history_writer.stats()
+    lines = gauge_lines("nlp_history_buffered", "Query history records waiting in the buffer", {(): stats["buffered"]})
+    for field in ("written", "spilled", "replayed", "dropped", "errors"):
+        lines += gauge_lines(
+            f"nlp_history_{field}_total", f"Query history records {field}", {(): stats[field]}, kind="counter"
+        )
+    return lines
+
+
+@metrics_registry.collector
+def _model_metrics() -> List[str]:
+    """Состояние и время загрузки моделей"""
+    status = model_registry.status()
+    return (
+        gauge_lines(
+            "nlp_model_ready", "Model is loaded",
+            {(name,): int(state["status"] == READY) for name, state in status.items()}, ("model",)
+        )
+        + gauge_lines(
+            "nlp_model_load_seconds", "Model load time",
+            {(name,): state["load_time"] for name, state in status.items() if state["load_time"] is not None},
+            ("model",)
+        )
+    )
+
+
+@metrics_registry.collector
+def _process_metrics() -> List[str]:
+    """Воркер, обслуживший запрос: при нескольких воркерах метрики у каждого свои"""
+    return gauge_lines("nlp_worker_info", "Worker serving this scrape", {(str(os.getpid()),): 1}, ("pid",))
+
+
+@router.get("", response_class=PlainTextResponse)
+async def metrics():
+    """Метрики в текстовом формате Prometheus"""
+    return PlainTextResponse(metrics_registry.render(), media_type="text/plain; version=0.0.4")
@@ -1,9 +1,26 @@
-from fastapi import APIRouter, HTTPException
-from nlp_server.app.models.process_text_model import ProcessTextRequest, ProcessTextResponse
+from contextlib import AsyncExitStack
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from nlp_server.app.config import PROCESS_BULK_CHUNK_SIZE, PROCESS_BULK_SPOOL_SIZE
+from nlp_server.app.models.process_text_model import (
+    PROCESS_TASKS, BulkProcessRequest, ProcessTask, ProcessTextRequest, ProcessTextResponse
+)
 from nlp_server.app.services.spell_checker import correct_spelling
-from nlp_server.app.services.intent_classifier import classify_intent
-from nlp_server.app.services.entity_extraction import extract_entities
+from nlp_server.app.services.executor import nlp_executor, ExecutorOverloaded
+from nlp_server.app.services.pipeline import (
+    BulkItem, intent_batcher, entity_batcher, batching_stats, parse_text_line, process_items
+)
+from nlp_server.app.services.history_writer import history_writer
+from nlp_server.app.services.result_cache import CacheKeys, result_cache
+from nlp_server.app.services.log import log_sampled
+from nlp_server.app.services.metrics import STAGE_LATENCY
+from nlp_server.app.services.serialization import FastJSONResponse, dumps
 from loguru import logger
+from pydantic import ValidationError
+from typing import IO, Any, AsyncIterator, Awaitable, Dict, Iterable, List, Optional, Set, Tuple
+import asyncio
+import itertools
+import tempfile
 
 
 router = APIRouter(
@@ -12,41 +29,240 @@ router = APIRouter(
 )
 
 
+async def _timed_stage(stage: str, awaitable: Awaitable[Any]) -> Any:
+    """Ожидание этапа с замером его задержки для запроса (вместе с ожиданием пачки)"""
+    with STAGE_LATENCY.time(stage):
+        return await awaitable
+
+
+async def _run_stages(request: ProcessTextRequest) -> Dict[str, Any]:
+    """Этапы /process для одного текста: исправление в пуле, намерение и сущности пачками"""
+    result = {
+        "original_text": request.text,
+        "processed_text": request.text,
+        "intent": "unknown",
+        "confidence": 0.0,
+        "entities": {},
+        "spellcheck_corrections": {}
+    }
+
+    # Исправление опечаток
+    if "spellcheck" in request.tasks:
+        with STAGE_LATENCY.time("spellcheck"):
+            spell_result = await nlp_executor.run(correct_spelling, request.text)
+        result["processed_text"] = spell_result.corrected_text
+        result["spellcheck_corrections"] = spell_result.corrections
+
+    # Классификация намерения и извлечение сущностей зависят только
+    # от processed_text, поэтому выполняются параллельно, пачками
+    # вместе с одновременными запросами
+    intent_task = None
+    entity_task = None
+    if "intent" in request.tasks:
+        intent_task = _timed_stage("intent", intent_batcher.submit(result["processed_text"]))
+    if "entities" in request.tasks:
+        entity_task = _timed_stage("entities", entity_batcher.submit(result["processed_text"]))
+
+    stages = [task for task in (intent_task, entity_task) if task is not None]
+    stage_results = iter(await asyncio.gather(*stages))
+
+    if intent_task is not None:
+        intent_result = next(stage_results)
+        result["intent"] = intent_result.intent
+        result["confidence"] = intent_result.confidence
+
+    if entity_task is not None:
+        entity_result = next(stage_results)
+        result["entities"] = entity_result.entities
+
+    return result
+
+
+# Фоновые записи в кэш ответов: ссылки держатся до завершения, иначе задачу
+# может собрать сборщик мусора, а её ошибка потеряется
+_cache_writes: Set["asyncio.Future[None]"] = set()
+
+
+async def _cache_lookup(request: ProcessTextRequest) -> Tuple[Optional[CacheKeys], List[Optional[Dict[str, Any]]]]:
+    """Ключ и готовый ответ из общего кэша; сбой кэша считается промахом и не роняет запрос"""
+    try:
+        return await asyncio.to_thread(result_cache.lookup, [request.text], request.tasks)
+    except Exception as e:
+        logger.warning(f"Process result cache lookup failed: {e}")
+        return None, [None]
+
+
+def _cache_write_done(future: "asyncio.Future[None]"):
+    _cache_writes.discard(future)
+    if not future.cancelled() and future.exception() is not None:
+        logger.warning(f"Process result cache write failed: {future.exception()}")
+
+
+def _cache_put(keys: CacheKeys, result: Dict[str, Any]):
+    """Запись ответа в кэш в потоке, не задерживая ответ клиенту"""
+    future = asyncio.ensure_future(asyncio.to_thread(result_cache.put_many, keys, [result]))
+    _cache_writes.add(future)
+    future.add_done_callback(_cache_write_done)
+
+
 @router.post("/", response_model=ProcessTextResponse)
 async def process_text(request: ProcessTextRequest):
     """
     Основной эндпоинт для обработки текста
     """
     try:
-        result = {
-            "original_text": request.text,
-            "processed_text": request.text,
-            "intent": "unknown",
-            "confidence": 0.0,
-            "entities": {},
-            "spellcheck_corrections": {}
+        # Ответ из общего кэша не занимает слот пула: чтение SQLite в режиме WAL
+        # не ждёт писателей; чтение и запись идут в потоках, не блокируя event loop
+        keys, cached = None, [None]
+        if result_cache.enabled:
+            keys, cached = await _cache_lookup(request)
+        if cached[0] is not None:
+            result = {"original_text": request.text, **cached[0]}
+        else:
+            async with nlp_executor.slot():
+                result = await _run_stages(request)
+            if keys is not None:
+                _cache_put(keys, result)
+
+        log_sampled("Processed text: {} -> Intent: {}", request.text, result["intent"])
+        history_writer.record(request.text, result["processed_text"], result["intent"], result["entities"])
+        return FastJSONResponse(result)
+
+    except ExecutorOverloaded as e:
+        logger.warning(f"Rejected process request: {e}")
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+    except Exception as e:
+        logger.error(f"Error processing text: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+def _read_ndjson_lines(upload: IO[bytes], start: int) -> Tuple[List[BulkItem], bool]:
+    """
+    Следующие PROCESS_BULK_CHUNK_SIZE строк сохранённого тела NDJSON, разобранные
+    в тексты с номерами от start, и признак конца файла
+    """
+    lines = list(itertools.islice(upload, PROCESS_BULK_CHUNK_SIZE))
+    items = []
+    for line in lines:
+        if line.strip():
+            items.append((start + len(items), *parse_text_line(line)))
+    return items, len(lines) < PROCESS_BULK_CHUNK_SIZE
+
+
+async def _ndjson_items(upload: IO[bytes]) -> AsyncIterator[BulkItem]:
+    """
+    Тексты из сохранённого тела NDJSON: чтение с диска и разбор JSON идут
+    в потоке пачками строк, не блокируя event loop
+    """
+    index = 0
+    eof = False
+    while not eof:
+        items, eof = await asyncio.to_thread(_read_ndjson_lines, upload, index)
+        index += len(items)
+        for item in items:
+            yield item
+
+
+async def _spool_body(request: Request) -> IO[bytes]:
+    """
+    Тело запроса во временный файл (в памяти только первые PROCESS_BULK_SPOOL_SIZE
+    байт): ответ-поток нельзя начать, пока тело не дочитано, а держать всё тело
+    в памяти не нужно
+    """
+    upload = tempfile.SpooledTemporaryFile(max_size=PROCESS_BULK_SPOOL_SIZE)
+    async for data in request.stream():
+        upload.write(data)
+    upload.seek(0)
+    return upload
+
+
+async def _list_items(texts: Iterable[str]) -> AsyncIterator[BulkItem]:
+    for index, text in enumerate(texts):
+        yield index, text, None
+
+
+async def _process_chunk(chunk: List[BulkItem], tasks: List[str]) -> bytes:
+    """Обработка пачки в пуле потоков; строки NDJSON результатов в порядке входа"""
+    with STAGE_LATENCY.time("process_bulk"):
+        results = await nlp_executor.run(process_items, chunk, tasks)
+    return b"".join(dumps(result) + b"\n" for result in results)
+
+
+async def _stream_results(items: AsyncIterator[BulkItem], tasks: List[str], stack: AsyncExitStack):
+    """Чтение, обработка и отдача пачками: в памяти не больше одной пачки"""
+    try:
+        chunk = []
+        async for item in items:
+            chunk.append(item)
+            if len(chunk) >= PROCESS_BULK_CHUNK_SIZE:
+                yield await _process_chunk(chunk, tasks)
+                chunk = []
+        if chunk:
+            yield await _process_chunk(chunk, tasks)
+    finally:
+        await stack.aclose()
+
+
+@router.post(
+    "/bulk",
+    response_class=StreamingResponse,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/json": {"schema": BulkProcessRequest.model_json_schema()},
+                "application/x-ndjson": {"schema": {"type": "string", "description": "Одна JSON-строка или {\"text\": ...} на строку"}}
+            }
         }
+    }
+)
+async def process_bulk(request: Request, tasks: List[ProcessTask] = Query(PROCESS_TASKS)):
+    """
+    Обработка большого набора текстов: JSON {"texts": [...], "tasks": [...]} или
+    загрузка NDJSON (этапы — параметром tasks; тело сохраняется во временный
+    файл, а не в память). Тексты обрабатываются пачками по
+    PROCESS_BULK_CHUNK_SIZE пакетными вызовами моделей, результаты отдаются
+    потоком NDJSON ({"index": ..., поля ответа /process} или {"index": ..., "error": ...})
+    по мере готовности каждой пачки. История запросов не пишется: это повторная
+    обработка, а не запросы пользователей
+    """
+    stack = AsyncExitStack()
+    if "ndjson" in request.headers.get("content-type", ""):
+        upload = await _spool_body(request)
+        stack.callback(upload.close)
+        items = _ndjson_items(upload)
+    else:
+        try:
+            body = BulkProcessRequest.model_validate_json(await request.body())
+        except ValidationError as e:
+            raise HTTPException(status_code=422, detail=e.errors(include_url=False, include_context=False))
+        items = _list_items(body.texts)
+        tasks = body.tasks
 
-        # Исправление опечаток
-        if "spellcheck" in request.tasks:
-            spell_result = correct_spelling(request.text)
-            result["processed_text"] = spell_result.corrected_text
-            result["spellcheck_corrections"] = spell_result.corrections
+    # Весь поток занимает один слот пула: при перегрузке отказ приходит до начала ответа
+    try:
+        await stack.enter_async_context(nlp_executor.slot())
+    except ExecutorOverloaded as e:
+        await stack.aclose()
+        logger.warning(f"Rejected bulk process request: {e}")
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
 
-        # Классификация намерения
-        if "intent" in request.tasks:
-            intent_result = classify_intent(result["processed_text"])
-            result["intent"] = intent_result.intent
-            result["confidence"] = intent_result.confidence
+    return StreamingResponse(_stream_results(items, tasks, stack), media_type="application/x-ndjson")
 
-        # Извлечение сущностей
-        if "entities" in request.tasks:
-            entity_result = extract_entities(result["processed_text"])
-            result["entities"] = entity_result.entities
 
-        logger.info(f"Processed text: {request.text} -> Intent: {result['intent']}")
-        return result
+@router.get("/batching")
+async def process_batching_stats():
+    """Статистика микробатчинга: фактические размеры пачек по этапам"""
+    return batching_stats()
 
-    except Exception as e:
-        logger.error(f"Error processing text: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+
+@router.get("/history")
+async def process_history_stats():
+    """Состояние записи истории запросов: буфер, записанные, сброшенные на диск и потерянные"""
+    return history_writer.stats()
+
+
+@router.get("/cache")
+async def process_cache_stats():
+    """Общий кэш ответов: попадания и промахи этого воркера, число ответов в кэше"""
+    return await asyncio.to_thread(result_cache.stats)
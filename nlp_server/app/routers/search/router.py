@@ -0,0 +1,79 @@
+from nlp_server.app.models.search_model import AddSearchDocumentsRequest, SearchResponse
+from nlp_server.app.services import search
+from nlp_server.app.services.executor import nlp_executor, ExecutorOverloaded
+from nlp_server.app.services.metrics import STAGE_LATENCY
+from fastapi import APIRouter, HTTPException, Query
+from loguru import logger
+from typing import Optional
+import asyncio
+
+
+router = APIRouter(
+    prefix="/search",
+    tags=["Procurement search route"]
+)
+
+# Адрес, который вызывает фронтенд (SmartSearch.tsx)
+frontend_router = APIRouter(
+    prefix="/api",
+    tags=["Procurement search route"]
+)
+
+
+async def _search(query: str, limit: int, offset: int, filters: dict):
+    try:
+        async with nlp_executor.slot():
+            with STAGE_LATENCY.time("search"):
+                return await nlp_executor.run(search.search_query, query, limit, offset, filters)
+    except ExecutorOverloaded as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+    except Exception as e:
+        logger.error(f"Error in search: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("", response_model=SearchResponse)
+async def search_records(
+    query: str = Query(..., min_length=1, max_length=1000),
+    limit: int = Query(10, ge=1, le=100),
+    offset: int = Query(0, ge=0, le=1000),
+    min_amount: Optional[float] = Query(None, description="Заменяет фильтр по сумме из запроса"),
+    max_amount: Optional[float] = Query(None, description="Заменяет фильтр по сумме из запроса"),
+    product: Optional[str] = Query(None, description="Заменяет фильтр по товару из запроса")
+):
+    """
+    Поиск записей о закупках: BM25 по исправленному тексту запроса, сумма и товар
+    из сущностей запроса — фильтры
+    """
+    filters = {"min_amount": min_amount, "max_amount": max_amount, "product": product}
+    return await _search(query, limit, offset, filters)
+
+
+@frontend_router.get("/search-results", response_model=SearchResponse)
+async def search_results(
+    query: str = Query(..., min_length=1, max_length=1000),
+    limit: int = Query(10, ge=1, le=100)
+):
+    """Результаты поиска для фронтенда (то же, что GET /search)"""
+    return await _search(query, limit, 0, {})
+
+
+@router.post("/documents")
+async def add_search_documents(request: AddSearchDocumentsRequest):
+    """Добавление записей в индекс без пересборки (новый сегмент и снимок)"""
+    documents = [document.model_dump() for document in request.documents]
+    try:
+        return await asyncio.to_thread(search.add_search_documents, documents)
+    except Exception as e:
+        logger.error(f"Error adding search documents: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/reload")
+async def reload_search_index():
+    """Подхват снимка другого воркера и новых строк procurement_records"""
+    try:
+        return await asyncio.to_thread(search.refresh_search_index)
+    except Exception as e:
+        logger.error(f"Error reloading search index: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
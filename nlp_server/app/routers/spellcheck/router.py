@@ -1,7 +1,18 @@
-from nlp_server.app.services.spell_checker import correct_spelling
+from nlp_server.app.config import SPELL_WS_IDLE_TIMEOUT, SPELL_WS_MAX_TEXT_LENGTH
+from nlp_server.app.services.spell_checker import correct_spelling, spell_cache_stats, reload_query_ranker
+from nlp_server.app.services.spell_batch import correct_spelling_batch
+from nlp_server.app.services.executor import nlp_executor, ExecutorOverloaded
+from nlp_server.app.services.db import database_enabled
+from nlp_server.app.services.domain_dictionary import domain_sync
+from nlp_server.app.services.spell_session import SessionLimitExceeded, SpellSession, spell_sessions
 from nlp_server.app.models.spell_checker_model import BulkSpellCheckRequest, BulkSpellCheckResponse, SpellCheckResult
-from fastapi import APIRouter, HTTPException
+from nlp_server.app.services.metrics import STAGE_LATENCY
+from nlp_server.app.services.serialization import FastJSONResponse, dumps
+from fastapi import APIRouter, HTTPException, WebSocket, WebSocketDisconnect
 from loguru import logger
+from typing import Any, Dict
+import asyncio
+import json
 
 
 
@@ -11,12 +22,16 @@ router = APIRouter(
 )
 
 
-@router.post("/")
+@router.post("/", response_model=SpellCheckResult)
 async def spellcheck(text: str):
     """Исправление опечаток в одном тексте"""
     try:
-        result = correct_spelling(text)
-        return result.dict()
+        async with nlp_executor.slot():
+            with STAGE_LATENCY.time("spellcheck"):
+                result = await nlp_executor.run(correct_spelling, text)
+        return FastJSONResponse(result)
+    except ExecutorOverloaded as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
     except Exception as e:
         logger.error(f"Error in spellcheck: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -26,36 +41,130 @@ async def spellcheck(text: str):
 async def bulk_spellcheck(request: BulkSpellCheckRequest):
     """Массовое исправление опечаток"""
     try:
-        results = []
-        successful = 0
-        failed = 0
+        # Пакетная проверка выполняется вне event loop
+        async with nlp_executor.slot():
+            with STAGE_LATENCY.time("spellcheck_bulk"):
+                results = await nlp_executor.run(correct_spelling_batch, request.texts)
+        failed = sum(1 for result in results if result.error is not None)
 
-        for text in request.texts:
-            try:
-                result = correct_spelling(text)
-                results.append(SpellCheckResult(
-                    original_text=result.original_text,
-                    corrected_text=result.corrected_text,
-                    corrections=result.corrections,
-                    confidence=result.confidence
-                ))
-                successful += 1
-            except Exception as e:
-                results.append(SpellCheckResult(
-                    original_text=text,
-                    corrected_text=text,
-                    corrections={},
-                    confidence=0.0,
-                    error=str(e)
-                ))
-                failed += 1
-
-        return BulkSpellCheckResponse(
-            results=results,
-            total_processed=len(request.texts),
-            successful=successful,
-            failed=failed
-        )
+        # Результаты сервиса сериализуются как есть, без копирования в модели ответа
+        return FastJSONResponse({
+            "results": results,
+            "total_processed": len(request.texts),
+            "successful": len(results) - failed,
+            "failed": failed
+        })
+    except ExecutorOverloaded as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
     except Exception as e:
         logger.error(f"Error in bulk spellcheck: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/cache")
+async def spellcheck_cache_stats():
+    """Статистика кэшей исправлений (попадания, промахи, вытеснения)"""
+    return spell_cache_stats()
+
+
+@router.get("/dictionary")
+async def domain_dictionary_status():
+    """Состояние доменного словаря из БД: число терминов и последняя перезагрузка"""
+    return domain_sync.status()
+
+
+@router.post("/dictionary/reload")
+async def reload_domain_dictionary():
+    """Немедленная перезагрузка доменного словаря из БД (применяются только изменения)"""
+    if not database_enabled():
+        raise HTTPException(status_code=409, detail="DATABASE_URL is not set")
+    try:
+        return await asyncio.to_thread(domain_sync.reload)
+    except Exception as e:
+        logger.error(f"Error reloading domain dictionary: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/ranker/reload")
+async def reload_ranker():
+    """Подмена частот запросов заново собранным файлом QUERY_FREQUENCY_PATH"""
+    try:
+        return {"query_ranker": await asyncio.to_thread(reload_query_ranker)}
+    except Exception as e:
+        logger.error(f"Error reloading query ranker: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+async def _session_reply(session: SpellSession, message: str) -> Dict[str, Any]:
+    """Ответ на одно сообщение сессии: результат проверки или ошибка"""
+    try:
+        payload = json.loads(message)
+    except ValueError:
+        return {"error": "Expected a JSON object with a text field"}
+    if not isinstance(payload, dict) or not isinstance(payload.get("text"), str):
+        return {"error": "Expected a JSON object with a text field"}
+
+    reply: Dict[str, Any] = {"id": payload.get("id")}
+    text = payload["text"]
+    if len(text) > SPELL_WS_MAX_TEXT_LENGTH:
+        reply["error"] = f"Text is longer than {SPELL_WS_MAX_TEXT_LENGTH} characters"
+        return reply
+
+    try:
+        async with nlp_executor.slot():
+            with STAGE_LATENCY.time("spellcheck_ws"):
+                result, checked = await nlp_executor.run(session.correct, text)
+    except ExecutorOverloaded as e:
+        reply["error"] = str(e)
+        return reply
+    except Exception as e:
+        logger.error(f"Error in spellcheck session: {e}")
+        reply["error"] = str(e)
+        return reply
+
+    reply.update(
+        original_text=result.original_text,
+        corrected_text=result.corrected_text,
+        corrections=result.corrections,
+        confidence=result.confidence,
+        checked_words=checked
+    )
+    return reply
+
+
+@router.websocket("/ws")
+async def spellcheck_stream(websocket: WebSocket):
+    """
+    Проверка по мере ввода. Клиент присылает весь текст после каждого изменения
+    сообщением {"text": "...", "id": ...}; в ответ на каждое приходит объект с полями
+    CorrectSpellingResponse, тем же id и числом слов, проверенных заново
+    (checked_words), или {"id": ..., "error": "..."}. Соединение без сообщений
+    дольше SPELL_WS_IDLE_TIMEOUT секунд закрывается вместе с состоянием сессии
+    """
+    await websocket.accept()
+    try:
+        session = spell_sessions.open()
+    except SessionLimitExceeded as e:
+        # 1013 — «повторите позже»
+        await websocket.close(code=1013, reason=str(e))
+        return
+
+    try:
+        while True:
+            try:
+                message = await asyncio.wait_for(websocket.receive_text(), SPELL_WS_IDLE_TIMEOUT)
+            except asyncio.TimeoutError:
+                await websocket.close(code=1000, reason="Idle timeout")
+                return
+            reply = await _session_reply(session, message)
+            await websocket.send_text(dumps(reply).decode("utf-8"))
+    except WebSocketDisconnect:
+        pass
+    finally:
+        spell_sessions.close(session)
+
+
+@router.get("/sessions")
+async def spellcheck_sessions():
+    """Открытые сессии проверки по мере ввода в этом воркере"""
+    return spell_sessions.status()
@@ -0,0 +1,41 @@
+from nlp_server.app.config import SUGGEST_MAX_LIMIT
+from nlp_server.app.models.suggest_model import SuggestResponse
+from nlp_server.app.services import suggest
+from nlp_server.app.services.metrics import STAGE_LATENCY
+from nlp_server.app.services.model_registry import model_registry
+from fastapi import APIRouter, HTTPException, Query
+from loguru import logger
+import asyncio
+
+
+router = APIRouter(
+    prefix="/suggest",
+    tags=["Search autocomplete route"]
+)
+
+
+@router.get("", response_model=SuggestResponse)
+async def suggest_completions(
+    q: str = Query(..., max_length=200, description="Введённый текст"),
+    limit: int = Query(10, ge=1, le=SUGGEST_MAX_LIMIT),
+    fuzzy: bool = Query(True, description="Добавлять подсказки с одной опечаткой в последнем слове")
+):
+    """Подсказки для поисковой строки: самые частые продолжения введённого префикса"""
+    if suggest.suggest_index is None:
+        try:
+            await asyncio.to_thread(model_registry.ensure, "suggest_index")
+        except Exception as e:
+            logger.error(f"Error loading suggest index: {e}")
+            raise HTTPException(status_code=503, detail="Suggest index is not available", headers={"Retry-After": "1"})
+
+    # Поиск занимает доли миллисекунды, поэтому выполняется прямо в event loop:
+    # передача в пул потоков стоила бы дороже самого поиска
+    with STAGE_LATENCY.time("suggest"):
+        suggestions = suggest.suggest_index.suggest(q, limit, fuzzy)
+    return {
+        "query": q,
+        "suggestions": [
+            {"text": text, "frequency": frequency, "distance": distance}
+            for text, frequency, distance in suggestions
+        ]
+    }
@@ -0,0 +1,14 @@
+from nlp_server.app.schemas.base import Base
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import Float, Integer, String, Text
+from typing import Optional
+
+
+class ProcurementRecord(Base):
+    __tablename__ = "procurement_records"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    title: Mapped[str] = mapped_column(String(500))
+    description: Mapped[Optional[str]] = mapped_column(Text)
+    category: Mapped[Optional[str]] = mapped_column(String(255))
+    amount: Mapped[Optional[float]] = mapped_column(Float)
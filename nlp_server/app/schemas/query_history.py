@@ -1,18 +1,21 @@
 from nlp_server.app.schemas.base import Base
+from datetime import datetime
 from sqlalchemy.orm import Mapped, mapped_column
-from sqlalchemy import Integer, String, JSON, TIMESTAMP
+from sqlalchemy import Integer, String, JSON, TIMESTAMP, func
+from typing import Optional
 
 
 class QueryHistory(Base):
     __tablename__ = "query_history"
 
-    id: Mapped[int] = mapped_column(Integer, autoincrement=True)
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     original_query: Mapped[str] = mapped_column(String)
     processed_query: Mapped[str] = mapped_column(String)
     intent: Mapped[str] = mapped_column(String(50))
     extracted_entities: Mapped[dict] = mapped_column(JSON)
-    system_action: Mapped[str] = mapped_column(String)
-    result_count: Mapped[int] = mapped_column(Integer)
-    satisfaction_rating: Mapped[int] = mapped_column(Integer)
-    create_at: Mapped[str] = mapped_column(TIMESTAMP)
+    # Заполняются позже (действие системы и оценка пользователя), при записи запроса их ещё нет
+    system_action: Mapped[Optional[str]] = mapped_column(String)
+    result_count: Mapped[Optional[int]] = mapped_column(Integer)
+    satisfaction_rating: Mapped[Optional[int]] = mapped_column(Integer)
+    create_at: Mapped[datetime] = mapped_column(TIMESTAMP, server_default=func.now())
 
@@ -5,6 +5,6 @@ from sqlalchemy import Integer, String
 class SearchDictionary(Base):
     __tablename__ = "search_dictionary"
 
-    id: Mapped[int] = mapped_column(Integer, autoincrement=True)
-    term: Mapped[str] = mapped_column(String(255))
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    term: Mapped[str] = mapped_column(String(255), index=True)
     frequency: Mapped[int] = mapped_column(Integer)
\ No newline at end of file
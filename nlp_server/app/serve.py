@@ -0,0 +1,196 @@
+"""
+Production-запуск: модели загружаются один раз в родительском процессе, затем
+запускается NLP_WORKERS воркеров uvicorn через fork. Воркеры разделяют страницы
+моделей copy-on-write; gc.freeze() переносит объекты родителя в постоянное
+поколение, чтобы сборщик мусора в воркерах не трогал их заголовки и не
+копировал страницы.
+
+Запуск: python -m nlp_server.app.serve
+"""
+from nlp_server.app.config import (
+    NLP_HOST, NLP_PORT, NLP_WORKERS, NLP_WORKER_MAX_MEMORY_MB, NLP_MEMORY_REPORT_INTERVAL,
+    NLP_WORKER_MIN_UPTIME, NLP_RESPAWN_BACKOFF, NLP_RESPAWN_MAX_BACKOFF, NLP_WORKER_MAX_FAST_FAILURES
+)
+from nlp_server.app.main import app
+from nlp_server.app.services.db import dispose_after_fork
+from nlp_server.app.services.memory import process_memory
+from nlp_server.app.services.model_registry import model_registry
+from loguru import logger
+from typing import Dict, Tuple
+import gc
+import os
+import signal
+import socket
+import sys
+import time
+import uvicorn
+
+
+def _bind_socket(host: str, port: int) -> socket.socket:
+    """Общий слушающий сокет, наследуемый воркерами"""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+def _run_worker(sock: socket.socket):
+    """Тело воркера: uvicorn на унаследованном сокете"""
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    gc.enable()
+    dispose_after_fork()
+
+    config = uvicorn.Config(app, lifespan="on")
+    server = uvicorn.Server(config)
+    server.run(sockets=[sock])
+
+
+class Supervisor:
+    """Родительский процесс: запуск, перезапуск и остановка воркеров, отчёт о памяти"""
+
+    def __init__(self, sock: socket.socket, workers: int, max_memory_mb: int):
+        self.sock = sock
+        self.workers = workers
+        self.max_memory_mb = max_memory_mb
+        # pid -> (слот, время запуска)
+        self.children: Dict[int, Tuple[int, float]] = {}
+        # Слот -> время отложенного перезапуска и число быстрых падений подряд
+        self.pending: Dict[int, float] = {}
+        self.fast_failures = [0] * workers
+        self.stopping = False
+        self.exit_code = 0
+
+    def spawn(self, slot: int):
+        """Запуск одного воркера в слоте через fork"""
+        pid = os.fork()
+        if pid == 0:
+            try:
+                _run_worker(self.sock)
+            finally:
+                os._exit(0)
+        self.children[pid] = (slot, time.time())
+        logger.info(f"Started worker {pid}")
+
+    def reap(self, pid: int, status: int):
+        """Учёт завершившегося воркера: перезапуск слота с задержкой после быстрых падений"""
+        slot, started = self.children.pop(pid)
+        if self.stopping:
+            return
+
+        if time.time() - started >= NLP_WORKER_MIN_UPTIME:
+            self.fast_failures[slot] = 0
+            logger.warning(f"Worker {pid} exited with status {status}, restarting")
+            self.spawn(slot)
+            return
+
+        self.fast_failures[slot] += 1
+        failures = self.fast_failures[slot]
+        if NLP_WORKER_MAX_FAST_FAILURES and failures >= NLP_WORKER_MAX_FAST_FAILURES:
+            logger.error(
+                f"Worker {pid} exited with status {status}: {failures} fast failures in a row, "
+                f"shutting down"
+            )
+            self.exit_code = 1
+            self.stop()
+            return
+
+        delay = min(NLP_RESPAWN_BACKOFF * 2 ** (failures - 1), NLP_RESPAWN_MAX_BACKOFF)
+        logger.warning(
+            f"Worker {pid} exited with status {status} after {time.time() - started:.1f}s, "
+            f"restarting in {delay:.1f}s"
+        )
+        self.pending[slot] = time.time() + delay
+
+    def respawn_pending(self):
+        """Перезапуск слотов, у которых истекла задержка"""
+        now = time.time()
+        for slot, due in list(self.pending.items()):
+            if due <= now:
+                del self.pending[slot]
+                self.spawn(slot)
+
+    def stop(self, *args):
+        """Плавная остановка всех воркеров"""
+        self.stopping = True
+        self.pending.clear()
+        for pid in list(self.children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def report_memory(self):
+        """Отчёт о памяти воркеров и перезапуск превысивших предел"""
+        for pid in list(self.children):
+            try:
+                memory = process_memory(pid)
+            except OSError:
+                continue
+            logger.info(f"Worker {pid} memory, MB: {memory}")
+
+            private = memory.get("private", memory["rss"])
+            if self.max_memory_mb and private > self.max_memory_mb:
+                logger.warning(f"Worker {pid} exceeded {self.max_memory_mb} MB, restarting")
+                os.kill(pid, signal.SIGTERM)
+
+    def run(self) -> int:
+        """Основной цикл: поддержание числа воркеров до сигнала остановки; возвращает код выхода"""
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+
+        for slot in range(self.workers):
+            self.spawn(slot)
+
+        last_report = time.time()
+        while self.children or self.pending:
+            self.respawn_pending()
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                pid = 0
+
+            if pid:
+                if pid in self.children:
+                    self.reap(pid, status)
+                continue
+
+            if time.time() - last_report >= NLP_MEMORY_REPORT_INTERVAL:
+                self.report_memory()
+                last_report = time.time()
+            time.sleep(0.5)
+
+        logger.info("All workers stopped")
+        return self.exit_code
+
+
+def main():
+    """Загрузка моделей в родителе, заморозка кучи и запуск воркеров"""
+    if not hasattr(os, "fork") or NLP_WORKERS <= 1:
+        uvicorn.run(app, host=NLP_HOST, port=NLP_PORT)
+        return
+
+    # Отключение GC до загрузки моделей не оставляет «дыр» в страницах,
+    # а gc.freeze() перед fork исключает объекты родителя из сборок в воркерах
+    gc.disable()
+    started = time.perf_counter()
+    model_registry.load_all(parallel=True)
+    if not model_registry.ready():
+        logger.warning(f"Some models failed to load: {model_registry.status()}")
+    gc.collect()
+    gc.freeze()
+
+    logger.info(
+        f"Models loaded in {time.perf_counter() - started:.2f}s, "
+        f"parent memory, MB: {process_memory()}"
+    )
+
+    sock = _bind_socket(NLP_HOST, NLP_PORT)
+    logger.info(f"Serving on http://{NLP_HOST}:{NLP_PORT} with {NLP_WORKERS} workers")
+    sys.exit(Supervisor(sock, NLP_WORKERS, NLP_WORKER_MAX_MEMORY_MB).run())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+from collections import Counter
+from nlp_server.app.services.executor import BoundedExecutor
+from nlp_server.app.services.metrics import BATCH_LATENCY
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import asyncio
+
+
+class MicroBatcher:
+    """
+    Объединяет одновременные запросы в пачки: элементы копятся не дольше
+    max_wait_ms или до max_batch_size штук, затем batch_func вызывается один
+    раз в пуле потоков, и результаты раздаются ожидающим запросам по порядку
+    """
+
+    def __init__(
+        self,
+        name: str,
+        batch_func: Callable[[List[Any]], List[Any]],
+        executor: BoundedExecutor,
+        max_batch_size: int,
+        max_wait_ms: float
+    ):
+        self.name = name
+        self.batch_func = batch_func
+        self.executor = executor
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000
+        self.batch_sizes: Counter = Counter()
+        self.retried_items = 0
+        self._pending: List[Tuple[Any, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    async def submit(self, item: Any) -> Any:
+        """Постановка элемента в текущую пачку и ожидание его результата"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((item, future))
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+
+        return await future
+
+    def _flush(self):
+        """Отправка накопленной пачки на обработку"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        batch, self._pending = self._pending, []
+        if batch:
+            self.batch_sizes[len(batch)] += 1
+            asyncio.get_running_loop().create_task(self._run_batch(batch))
+
+    async def _run_batch(self, batch: List[Tuple[Any, asyncio.Future]]):
+        """
+        Один вызов batch_func на всю пачку и раздача результатов. Если пачка упала,
+        элементы повторяются по одному, чтобы ошибка на одном тексте не отдавалась
+        остальным запросам пачки
+        """
+        try:
+            results = await self.executor.run(self._timed_batch, [item for item, _ in batch])
+        except Exception as e:
+            if len(batch) > 1:
+                self.retried_items += len(batch)
+                await asyncio.gather(*(self._run_batch([entry]) for entry in batch))
+            else:
+                self._fail(batch, e)
+            return
+
+        if len(results) != len(batch):
+            self._fail(batch, RuntimeError(
+                f"{self.name}: batch_func вернула {len(results)} результатов на {len(batch)} элементов"
+            ))
+            return
+
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    @staticmethod
+    def _fail(batch: List[Tuple[Any, asyncio.Future]], error: Exception):
+        """Ошибка для всех ещё не получивших результат запросов пачки"""
+        for _, future in batch:
+            if not future.done():
+                future.set_exception(error)
+
+    def _timed_batch(self, items: List[Any]) -> List[Any]:
+        """Вызов batch_func с замером времени выполнения пачки (без ожидания в очереди пула)"""
+        with BATCH_LATENCY.time(self.name):
+            return self.batch_func(items)
+
+    def stats(self) -> Dict[str, Any]:
+        """Статистика фактических размеров пачек"""
+        batches = sum(self.batch_sizes.values())
+        items = sum(size * count for size, count in self.batch_sizes.items())
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+            "batches": batches,
+            "items": items,
+            "mean_batch_size": round(items / batches, 2) if batches else 0.0,
+            "retried_items": self.retried_items,
+            "batch_sizes": dict(sorted(self.batch_sizes.items()))
+        }
@@ -0,0 +1,256 @@
+from nlp_server.app.services.spell_index import SymSpellIndex, _deletes, _is_checkable, closest_words
+from typing import Dict, Iterable, Iterator, List, Optional, Set
+import hashlib
+import json
+import mmap
+import numpy as np
+import os
+import struct
+
+
+COMPACT_MAGIC = b"NLPSPELL"
+COMPACT_FORMAT_VERSION = 1
+
+# Предел частоты в массиве uint32 (частоты pyspellchecker на порядки меньше)
+MAX_FREQUENCY = np.iinfo(np.uint32).max
+
+_HEADER_SIZE = struct.Struct("<8sQ")
+
+
+def stable_hash(text: str) -> int:
+    """64-битный хэш строки, одинаковый во всех процессах (в отличие от hash())"""
+    return int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def _align(offset: int) -> int:
+    """Выравнивание смещения массива на 8 байт"""
+    return (offset + 7) & ~7
+
+
+def write_compact_dictionary(frequencies: Dict[str, int], path: str, max_distance: int = 2):
+    """
+    Сборка файла словаря: слова в алфавитном порядке одним блоком UTF-8 со смещениями,
+    частоты массивом uint32, хэши слов и удалений SymSpell отсортированными массивами
+    uint64 и списки слов для каждого удаления массивом uint32. Файл пишется во временный
+    и переименовывается, поэтому читающие его процессы не видят недописанный файл
+    """
+    lowered: Dict[str, int] = {}
+    for word, frequency in frequencies.items():
+        lowered[word.lower()] = lowered.get(word.lower(), 0) + frequency
+    words = sorted(lowered)
+    encoded = [word.encode("utf-8") for word in words]
+
+    word_offsets = np.zeros(len(words) + 1, dtype=np.uint64)
+    np.cumsum([len(word) for word in encoded], out=word_offsets[1:])
+    word_blob = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+
+    word_frequencies = np.array(
+        [min(lowered[word], MAX_FREQUENCY) for word in words], dtype=np.uint32
+    )
+
+    word_hashes = np.array([stable_hash(word) for word in words], dtype=np.uint64)
+    word_order = np.argsort(word_hashes, kind="stable")
+
+    # Пары (хэш удаления, номер слова), сгруппированные по хэшу
+    delete_keys: List[int] = []
+    delete_words: List[int] = []
+    for word_id, word in enumerate(words):
+        for variant in _deletes(word, max_distance):
+            delete_keys.append(stable_hash(variant))
+            delete_words.append(word_id)
+
+    keys = np.array(delete_keys, dtype=np.uint64)
+    order = np.argsort(keys, kind="stable")
+    keys = keys[order]
+    postings = np.array(delete_words, dtype=np.uint32)[order]
+    delete_hashes, starts = np.unique(keys, return_index=True)
+    posting_offsets = np.append(starts, len(postings)).astype(np.uint64)
+
+    arrays = {
+        "word_blob": word_blob,
+        "word_offsets": word_offsets,
+        "frequencies": word_frequencies,
+        "word_hashes": word_hashes[word_order],
+        "word_hash_ids": word_order.astype(np.uint32),
+        "delete_hashes": delete_hashes,
+        "posting_offsets": posting_offsets,
+        "postings": postings,
+    }
+
+    header = {
+        "version": COMPACT_FORMAT_VERSION,
+        "max_distance": max_distance,
+        "longest_word_length": max((len(word) for word in words), default=0),
+        "words": len(words),
+        "arrays": {}
+    }
+    # Смещения массивов зависят от длины заголовка, поэтому он оценивается с запасом
+    offset = _align(_HEADER_SIZE.size + 4096 + 64 * len(arrays))
+    for name, array in arrays.items():
+        header["arrays"][name] = [array.dtype.str, offset, int(array.size)]
+        offset = _align(offset + array.nbytes)
+
+    header_bytes = json.dumps(header).encode("utf-8")
+    if _HEADER_SIZE.size + len(header_bytes) > header["arrays"]["word_blob"][1]:
+        raise ValueError("Заголовок словаря не помещается в отведённое место")
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(_HEADER_SIZE.pack(COMPACT_MAGIC, len(header_bytes)))
+        f.write(header_bytes)
+        for name, array in arrays.items():
+            f.seek(header["arrays"][name][1])
+            f.write(array.tobytes())
+    os.replace(tmp_path, path)
+
+
+class CompactSpellIndex:
+    """
+    Словарь опечаток в компактном файле, отображённом в память только для чтения.
+
+    Слова, частоты и индекс удалений SymSpell лежат в массивах фиксированного типа,
+    а не в словарях Python, поэтому не создают объектов на каждое слово, а страницы
+    файла из кэша ОС разделяются всеми процессами, открывшими его (в том числе
+    независимо запущенными воркерами). Слова, добавленные после сборки (доменный
+    словарь), хранятся в небольшом SymSpellIndex поверх файла.
+
+    Интерфейс и выбор исправления совпадают с SymSpellIndex.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, header_length = _HEADER_SIZE.unpack_from(self._mmap, 0)
+        if magic != COMPACT_MAGIC:
+            raise ValueError(f"Файл не является словарём опечаток: {path}")
+        header = json.loads(self._mmap[_HEADER_SIZE.size:_HEADER_SIZE.size + header_length])
+        if header.get("version") != COMPACT_FORMAT_VERSION:
+            raise ValueError(f"Неподдерживаемая версия словаря: {header.get('version')}")
+
+        self.max_distance = header["max_distance"]
+        self._base_longest_word_length = header["longest_word_length"]
+        self._size = header["words"]
+
+        arrays = {
+            name: np.frombuffer(self._mmap, dtype=np.dtype(dtype), count=count, offset=offset)
+            for name, (dtype, offset, count) in header["arrays"].items()
+        }
+        self._word_blob = arrays["word_blob"].data
+        self._word_offsets = arrays["word_offsets"]
+        self._frequencies = arrays["frequencies"]
+        self._word_hashes = arrays["word_hashes"]
+        self._word_hash_ids = arrays["word_hash_ids"]
+        self._delete_hashes = arrays["delete_hashes"]
+        self._posting_offsets = arrays["posting_offsets"]
+        self._postings = arrays["postings"]
+
+        # Добавления после сборки: новые слова и прибавки частот словарных слов
+        self._overlay = SymSpellIndex(max_distance=self.max_distance)
+        self._extra_frequencies: Dict[str, int] = {}
+
+    @classmethod
+    def open(cls, path: str) -> "CompactSpellIndex":
+        """Открытие готового файла словаря"""
+        return cls(path)
+
+    @property
+    def longest_word_length(self) -> int:
+        return max(self._base_longest_word_length, self._overlay.longest_word_length)
+
+    def __len__(self) -> int:
+        return self._size + len(self._overlay)
+
+    def __contains__(self, word: str) -> bool:
+        return self.known(word)
+
+    def word(self, word_id: int) -> str:
+        """Слово по его номеру в алфавитном порядке"""
+        start = int(self._word_offsets[word_id])
+        end = int(self._word_offsets[word_id + 1])
+        return bytes(self._word_blob[start:end]).decode("utf-8")
+
+    def words(self) -> Iterator[str]:
+        """Все слова: из файла в алфавитном порядке, затем добавленные"""
+        for word_id in range(self._size):
+            yield self.word(word_id)
+        yield from self._overlay.frequencies
+
+    def _word_id(self, word: str) -> int:
+        """Номер слова в файле или -1"""
+        key = stable_hash(word)
+        position = int(np.searchsorted(self._word_hashes, np.uint64(key)))
+        while position < self._size and int(self._word_hashes[position]) == key:
+            word_id = int(self._word_hash_ids[position])
+            if self.word(word_id) == word:
+                return word_id
+            position += 1
+        return -1
+
+    def known(self, word: str) -> bool:
+        """Слово есть в словаре (аналог SpellChecker.known для одного слова)"""
+        word = word.lower()
+        in_dictionary = word in self._overlay.frequencies or self._word_id(word) >= 0
+        return in_dictionary and _is_checkable(word, self.longest_word_length)
+
+    def frequency(self, word: str) -> int:
+        """Частота слова в словаре (0 для неизвестных)"""
+        word = word.lower()
+        word_id = self._word_id(word)
+        if word_id < 0:
+            return self._overlay.frequency(word)
+        return int(self._frequencies[word_id]) + self._extra_frequencies.get(word, 0)
+
+    def add_word(self, word: str, frequency: int = 1):
+        """Добавление слова (или увеличение его частоты) без изменения файла"""
+        word = word.lower()
+        if self._word_id(word) >= 0:
+            self._extra_frequencies[word] = self._extra_frequencies.get(word, 0) + frequency
+        else:
+            self._overlay.add_word(word, frequency)
+
+    def add_words(self, words: Iterable[str]):
+        """Добавление списка слов с единичной частотой"""
+        for word in words:
+            self.add_word(word)
+
+    def _delete_postings(self, variants: Set[str]) -> Iterator[str]:
+        """Словарные слова файла, у которых есть общее удаление с одним из вариантов"""
+        keys = np.array([stable_hash(variant) for variant in variants], dtype=np.uint64)
+        positions = np.searchsorted(self._delete_hashes, keys)
+        total = len(self._delete_hashes)
+        for key, position in zip(keys.tolist(), positions.tolist()):
+            if position < total and int(self._delete_hashes[position]) == key:
+                start = int(self._posting_offsets[position])
+                end = int(self._posting_offsets[position + 1])
+                for word_id in self._postings[start:end].tolist():
+                    yield self.word(word_id)
+
+    def candidates(self, word: str) -> Optional[Set[str]]:
+        """Ближайшие словарные слова, аналог SpellChecker.candidates"""
+        word = word.lower()
+        if self.known(word):
+            return {word}
+        longest_word_length = self.longest_word_length
+        if not _is_checkable(word, longest_word_length):
+            return {word}
+
+        variants = _deletes(word, self.max_distance)
+        overlay_words = (
+            candidate
+            for variant in variants
+            for candidate in self._overlay._deletes.get(variant, ())
+        )
+        words = (*self._delete_postings(variants), *overlay_words)
+        return closest_words(word, words, self.max_distance, longest_word_length)
+
+    def correction(self, word: str) -> Optional[str]:
+        """Наиболее вероятное исправление слова, аналог SpellChecker.correction"""
+        candidates = self.candidates(word)
+        if not candidates:
+            return None
+        return min(candidates, key=lambda candidate: (-self.frequency(candidate), candidate))
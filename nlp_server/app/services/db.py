@@ -0,0 +1,45 @@
+from nlp_server.app.config import DATABASE_URL
+from nlp_server.app.schemas.base import Base
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import sessionmaker
+from typing import Optional
+
+
+def _create_engine(url: str) -> Optional[Engine]:
+    """Движок БД; для SQLite включается WAL, чтобы чтение не ждало записи"""
+    if not url:
+        return None
+
+    engine = create_engine(url, pool_pre_ping=True)
+    if engine.dialect.name == "sqlite":
+        @event.listens_for(engine, "connect")
+        def _sqlite_pragmas(connection, _):
+            cursor = connection.cursor()
+            cursor.execute("PRAGMA journal_mode=WAL")
+            cursor.execute("PRAGMA busy_timeout=5000")
+            cursor.close()
+    return engine
+
+
+engine = _create_engine(DATABASE_URL)
+SessionLocal = sessionmaker(bind=engine, expire_on_commit=False)
+
+
+def database_enabled() -> bool:
+    """БД настроена (задан DATABASE_URL)"""
+    return engine is not None
+
+
+def init_db():
+    """Создание отсутствующих таблиц всех схем"""
+    from nlp_server.app.schemas import procurement_record, query_history, search_dictionary  # noqa: F401 — регистрация таблиц
+
+    if engine is not None:
+        Base.metadata.create_all(engine)
+
+
+def dispose_after_fork():
+    """Соединения пула не переходят через fork: воркер открывает свои"""
+    if engine is not None:
+        engine.dispose(close=False)
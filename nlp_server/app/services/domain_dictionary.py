@@ -0,0 +1,135 @@
+from nlp_server.app.config import DICTIONARY_CHUNK_SIZE
+from nlp_server.app.schemas.search_dictionary import SearchDictionary
+from nlp_server.app.services import spell_checker, suggest
+from nlp_server.app.services.db import SessionLocal, database_enabled, init_db
+from nlp_server.app.services.model_registry import model_registry
+from loguru import logger
+from sqlalchemy import select
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+import asyncio
+import threading
+import time
+
+
+class DomainDictionarySync:
+    """
+    Синхронизация доменного словаря с таблицей search_dictionary. Таблица читается
+    потоково пачками по chunk_size строк, результат сравнивается с последним
+    применённым состоянием, и в словарь опечаток уходят только изменившиеся
+    и удалённые термины — без перезапуска и без перестройки основного индекса
+    """
+
+    def __init__(self, session_factory: Callable, chunk_size: int):
+        self.session_factory = session_factory
+        self.chunk_size = chunk_size
+        self.terms: Dict[str, int] = {}
+        self.phrases: Dict[str, int] = {}
+        self.reloads = 0
+        self.last_reload: Optional[float] = None
+        self.last_changes: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def stream_terms(self) -> Iterator[List[Tuple[str, int]]]:
+        """Строки таблицы пачками, без загрузки всей таблицы в память разом"""
+        with self.session_factory() as session:
+            query = select(SearchDictionary.term, SearchDictionary.frequency)
+            result = session.execute(query.execution_options(yield_per=self.chunk_size))
+            for chunk in result.partitions():
+                yield chunk
+
+    def read_terms(self) -> Tuple[Dict[str, int], Dict[str, int]]:
+        """
+        Текущее состояние таблицы: слово -> частота и термин целиком -> частота
+        (для подсказок). Термины из нескольких слов разбиваются на слова, частоты
+        одинаковых слов складываются
+        """
+        terms: Dict[str, int] = {}
+        phrases: Dict[str, int] = {}
+        for chunk in self.stream_terms():
+            for term, frequency in chunk:
+                frequency = max(int(frequency or 0), 1)
+                phrase = suggest.normalize_query(term or "").strip()
+                if phrase:
+                    phrases[phrase] = phrases.get(phrase, 0) + frequency
+                for word, is_word in spell_checker.tokenize((term or "").lower()):
+                    if is_word and spell_checker.is_checked_word(word):
+                        terms[word] = terms.get(word, 0) + frequency
+        return terms, phrases
+
+    def reload(self) -> Dict[str, int]:
+        """Чтение таблицы и применение разницы с прошлым состоянием"""
+        with self._lock:
+            current, phrases = self.read_terms()
+            changed = {word: frequency for word, frequency in current.items() if self.terms.get(word) != frequency}
+            removed = [word for word in self.terms if word not in current]
+
+            if changed or removed:
+                spell_checker.update_domain_layer(changed, removed)
+                logger.info(f"Domain dictionary updated: {len(changed)} changed, {len(removed)} removed")
+
+            if phrases != self.phrases and suggest.update_suggest_phrases(phrases):
+                logger.info(f"Suggest index rebuilt: {len(phrases)} search dictionary terms")
+
+            self.terms = current
+            self.phrases = phrases
+            self.reloads += 1
+            self.last_reload = time.time()
+            self.last_changes = {"terms": len(current), "changed": len(changed), "removed": len(removed)}
+            return self.last_changes
+
+    def status(self) -> Dict[str, Any]:
+        """Состояние синхронизации для мониторинга"""
+        return {
+            "enabled": database_enabled(),
+            "terms": len(self.terms),
+            "reloads": self.reloads,
+            "last_reload": self.last_reload,
+            "last_changes": self.last_changes
+        }
+
+
+domain_sync = DomainDictionarySync(SessionLocal, DICTIONARY_CHUNK_SIZE)
+
+
+def init_domain_dictionary() -> Optional[str]:
+    """Первичная загрузка доменного словаря из БД (вызывается реестром моделей)"""
+    if not database_enabled():
+        return "disabled: DATABASE_URL is not set"
+    init_db()
+    changes = domain_sync.reload()
+    return f"{changes['terms']} terms"
+
+
+model_registry.register("domain_dictionary", init_domain_dictionary)
+
+
+async def reload_periodically(interval: float):
+    """Фоновая проверка изменений таблицы каждые interval секунд"""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await asyncio.to_thread(domain_sync.reload)
+        except Exception as e:
+            logger.error(f"Domain dictionary reload failed: {e}")
+
+
+def seed_search_dictionary(words: List[str], frequency: int = 1) -> int:
+    """Добавление в таблицу слов, которых в ней ещё нет; возвращает число добавленных"""
+    init_db()
+    with SessionLocal() as session:
+        existing = set(session.scalars(select(SearchDictionary.term)))
+        new_rows = [
+            SearchDictionary(term=word, frequency=frequency)
+            for word in dict.fromkeys(words) if word not in existing
+        ]
+        session.add_all(new_rows)
+        session.commit()
+    return len(new_rows)
+
+
+# Перенос встроенного списка domain_words в таблицу: DATABASE_URL=sqlite:///nlp.db python -m ...
+if __name__ == "__main__":
+    if not database_enabled():
+        raise SystemExit("DATABASE_URL is not set")
+    print(f"Добавлено терминов: {seed_search_dictionary(spell_checker.domain_words)}")
+    print(domain_sync.reload())
@@ -1,58 +1,146 @@
 import re
 import spacy
-from nlp_server.app.models.entity_model import ExtractEntitiesRequest, ExtractEntitiesResponse
-from typing import Dict, Any
-
-
-nlp = spacy.load("ru_core_news_sm")
+from nlp_server.app.config import (
+    SPACY_MODEL, SPACY_LOAD_MODE, ENTITY_TYPES, SPACY_N_PROCESS, SPACY_BATCH_SIZE, SPACY_BULK_MIN_TEXTS
+)
+from nlp_server.app.models.results import EntityResult
+from nlp_server.app.services.model_registry import model_registry
+from loguru import logger
+from typing import Dict, Any, List, Optional
+
+
+# Метки spaCy и соответствующие им типы сущностей
+SPACY_ENTITY_LABELS = {"MONEY": "sum", "PRODUCT": "product", "ORG": "company"}
+
+# Шаблоны сумм в порядке приоритета, объединённые в одно выражение с именованными группами
+# и применяемые к тексту в нижнем регистре. Просмотр вперёд проверяет каждую позицию
+# (с быстрым отсечением по первому символу), поэтому для каждого шаблона находится его
+# первое вхождение, как при отдельных re.search
+MONEY_GROUPS = ["thousands", "thousand_rubles", "rubles", "sum"]
+THOUSANDS_GROUPS = {"thousands"}
+MONEY_PATTERN = re.compile(
+    r'(?=[\dнс])(?=(?:(?P<thousands>\d+)\s*тыс'
+    r'|(?P<thousand_rubles>\d+)\s*т\.р'
+    r'|на\s+(?P<rubles>\d+)\s+руб'
+    r'|сумм[аой]\s+(?P<sum>\d+)))'
+)
+
+PRODUCT_KEYWORDS = ['на поставку', 'на закупку', 'товар', 'продукт']
+PRODUCT_KEYWORD_PATTERN = re.compile(
+    "(?=[" + "".join(sorted({kw[0] for kw in PRODUCT_KEYWORDS})) + "])"
+    "(?=(" + "|".join(re.escape(kw) for kw in PRODUCT_KEYWORDS) + "))"
+)
+
+# Типы сущностей, которые находят регулярные выражения; остальные (company) — только spaCy
+REGEX_ENTITY_TYPES = frozenset(["sum", "product"])
+SPACY_ENTITY_TYPES = frozenset(ENTITY_TYPES) - REGEX_ENTITY_TYPES
+
+# Признаки названия организации в тексте: организационно-правовая форма, кавычки
+# или слово с заглавной буквы не в начале предложения; без них spaCy не запускается
+COMPANY_HINT_PATTERN = re.compile(
+    r'\b(?:ООО|ОАО|ЗАО|ПАО|АО|ИП|НКО|ГУП|МУП|ФГУП|ГК)\b|[«"„]|(?<=[^\s.!?]\s)[A-ZА-ЯЁ][a-zа-яё]'
+)
+
+# Компоненты конвейера, не нужные для doc.ents
+NON_NER_COMPONENTS = ["tagger", "morphologizer", "parser", "senter", "attribute_ruler", "lemmatizer"]
+
+
+def load_nlp(mode: str = SPACY_LOAD_MODE):
+    """Загрузка spaCy в выбранном режиме: full, ner или rules (без spaCy)"""
+    if mode == "rules":
+        return None
+    if mode == "ner":
+        return spacy.load(SPACY_MODEL, exclude=NON_NER_COMPONENTS)
+    return spacy.load(SPACY_MODEL)
+
+
+# Конвейер spaCy загружается при прогреве моделей или при первом обращении
+nlp = None
+
+
+def init_entity_extractor() -> Optional[str]:
+    """
+    Загрузка spaCy (вызывается реестром моделей). Если модель не загружается,
+    сущности извлекаются только регулярными выражениями
+    """
+    global nlp
+    try:
+        nlp = load_nlp()
+    except Exception as e:
+        logger.warning(f"spaCy model {SPACY_MODEL} failed to load, falling back to regex-only extraction: {e}")
+        nlp = None
+        return f"rules only (spaCy unavailable: {e})"
+    return f"{SPACY_LOAD_MODE}: {', '.join(nlp.pipe_names)}" if nlp is not None else "rules only"
+
+
+model_registry.register("entity_extractor", init_entity_extractor)
 
 
 def extract_entities_spacy(text: str) -> Dict[str, Any]:
     """Извлечение сущностей с помощью spaCy"""
+    model_registry.ensure("entity_extractor")
     if not nlp:
         return {}
 
-    doc = nlp(text)
+    return _entities_from_doc(nlp(text))
+
+
+def _entities_from_doc(doc) -> Dict[str, Any]:
+    """Сущности из готового документа spaCy"""
     entities = {}
 
     for ent in doc.ents:
-        if ent.label_ == "MONEY":
-            entities["sum"] = ent.text
-        elif ent.label_ == "PRODUCT":
-            entities["product"] = ent.text
-        elif ent.label_ == "ORG":
-            entities["company"] = ent.text
+        entity_type = SPACY_ENTITY_LABELS.get(ent.label_)
+        if entity_type:
+            entities[entity_type] = ent.text
 
     return entities
 
 
+def _needs_spacy(text: str) -> bool:
+    """
+    spaCy нужен, только если запрошены типы, которых не находят регулярные
+    выражения, и в тексте есть признаки такой сущности (для company — названия
+    организации). Суммы и товары spaCy не ищет: ru_core_news_sm их не размечает
+    """
+    return nlp is not None and bool(SPACY_ENTITY_TYPES) and COMPANY_HINT_PATTERN.search(text) is not None
+
+
+def _requested(entities: Dict[str, Any]) -> Dict[str, Any]:
+    """Только запрошенные типы сущностей"""
+    return {key: value for key, value in entities.items() if key in ENTITY_TYPES}
+
+
 def extract_entities_regex(text: str) -> Dict[str, Any]:
     """Извлечение сущностей с помощью регулярных выражений"""
     entities = {}
+    text_lower = text.lower()
+
+    # Поиск сумм: из найденных шаблонов берём самый приоритетный
+    best = None
+    for match in MONEY_PATTERN.finditer(text_lower):
+        priority = MONEY_GROUPS.index(match.lastgroup)
+        if best is None or priority < best[0]:
+            best = (priority, match)
+            if priority == 0:
+                break
 
-    # Поиск сумм
-    money_patterns = [
-        r'(\d+)\s*тыс',
-        r'(\d+)\s*т\.р',
-        r'на\s+(\d+)\s+руб',
-        r'сумм[аой]\s+(\d+)'
-    ]
-
-    for pattern in money_patterns:
-        match = re.search(pattern, text, re.IGNORECASE)
-        if match:
-            amount = int(match.group(1))
-            if 'тыс' in pattern or 'т.р' in pattern:
-                amount *= 1000
-            entities["sum"] = amount
-            break
-
-    # Поиск продуктов
-    product_keywords = ['на поставку', 'на закупку', 'товар', 'продукт']
-    for keyword in product_keywords:
-        if keyword in text.lower():
+    if best is not None:
+        priority, match = best
+        amount = int(match.group(match.lastgroup))
+        if match.lastgroup in THOUSANDS_GROUPS:
+            amount *= 1000
+        entities["sum"] = amount
+
+    # Поиск продуктов: первое вхождение каждого ключевого слова за один проход
+    first_positions = {}
+    for match in PRODUCT_KEYWORD_PATTERN.finditer(text_lower):
+        first_positions.setdefault(match.group(1), match.start())
+
+    for keyword in PRODUCT_KEYWORDS:
+        if keyword in first_positions:
             # Берем текст после ключевого слова
-            start_idx = text.lower().find(keyword) + len(keyword)
+            start_idx = first_positions[keyword] + len(keyword)
             product_text = text[start_idx:].split('.')[0].split(' на ')[0].strip()
             if product_text and len(product_text) > 2:
                 entities["product"] = product_text
@@ -61,14 +149,47 @@ def extract_entities_regex(text: str) -> Dict[str, Any]:
     return entities
 
 
-def extract_entities(text: str) -> ExtractEntitiesResponse:
+def extract_entities(text: str) -> EntityResult:
     """Основная функция извлечения сущностей"""
+    model_registry.ensure("entity_extractor")
     entities = {}
+    regex_entities = extract_entities_regex(text)
 
-    # Пробуем разные методы
-    if nlp:
+    # Пробуем разные методы; spaCy пропускаем, если регулярки уже всё нашли
+    if _needs_spacy(text):
         entities.update(extract_entities_spacy(text))
 
-    entities.update(extract_entities_regex(text))
+    entities.update(regex_entities)
+
+    return EntityResult(entities=_requested(entities))
+
+
+def extract_entities_batch(texts: List[str], n_process: Optional[int] = None) -> List[EntityResult]:
+    """
+    Извлечение сущностей для пачки текстов одним проходом nlp.pipe; большие пачки
+    (от SPACY_BULK_MIN_TEXTS) по умолчанию обрабатываются в SPACY_N_PROCESS процессах
+    """
+    model_registry.ensure("entity_extractor")
+    if n_process is None:
+        n_process = SPACY_N_PROCESS if len(texts) >= SPACY_BULK_MIN_TEXTS else 1
+
+    regex_results = [extract_entities_regex(text) for text in texts]
+    spacy_positions = [i for i, text in enumerate(texts) if _needs_spacy(text)]
+
+    spacy_results = {}
+    if spacy_positions:
+        docs = nlp.pipe(
+            (texts[i] for i in spacy_positions),
+            n_process=n_process,
+            batch_size=SPACY_BATCH_SIZE
+        )
+        for i, doc in zip(spacy_positions, docs):
+            spacy_results[i] = _entities_from_doc(doc)
+
+    results = []
+    for i, regex_entities in enumerate(regex_results):
+        entities = dict(spacy_results.get(i, {}))
+        entities.update(regex_entities)
+        results.append(EntityResult(entities=_requested(entities)))
 
-    return ExtractEntitiesResponse(entities=entities)
\ No newline at end of file
+    return results
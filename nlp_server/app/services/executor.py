@@ -0,0 +1,48 @@
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from nlp_server.app.config import NLP_EXECUTOR_WORKERS, NLP_MAX_PENDING_REQUESTS
+from typing import Any, Callable
+import asyncio
+import functools
+
+
+class ExecutorOverloaded(Exception):
+    """Превышен предел одновременных запросов к пулу"""
+
+
+class BoundedExecutor:
+    """
+    Пул потоков для CPU-этапов обработки с контролем допуска: запрос получает
+    слот через slot(), а при исчерпании слотов сразу получает ExecutorOverloaded
+    """
+
+    def __init__(self, max_workers: int, max_pending: int):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.active = 0
+        self.rejected = 0
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="nlp-worker")
+
+    @asynccontextmanager
+    async def slot(self):
+        """Занятие слота на время обработки запроса (счётчик меняется только в event loop)"""
+        if self.active >= self.max_pending:
+            self.rejected += 1
+            raise ExecutorOverloaded(f"Превышен лимит одновременных запросов: {self.max_pending}")
+        self.active += 1
+        try:
+            yield
+        finally:
+            self.active -= 1
+
+    async def run(self, func: Callable[..., Any], *args: Any) -> Any:
+        """Выполнение функции в пуле потоков без блокировки event loop"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(func, *args))
+
+    def shutdown(self):
+        """Остановка пула потоков"""
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+
+nlp_executor = BoundedExecutor(NLP_EXECUTOR_WORKERS, NLP_MAX_PENDING_REQUESTS)
@@ -0,0 +1,119 @@
+from functools import lru_cache
+from scipy.special import expit
+from sklearn.base import BaseEstimator, ClassifierMixin
+from sklearn.linear_model import LogisticRegression
+from sklearn.utils import murmurhash3_32
+from typing import List, Tuple
+import numpy as np
+import re
+import scipy.sparse as sp
+
+
+_WORD_PATTERN = re.compile(r"\w+")
+
+# Признаки часто повторяющихся слов запросов (номера столбцов после хэширования)
+_WORD_FEATURES_CACHE_SIZE = 100000
+
+
+def _hash_feature(feature: str, n_features: int) -> int:
+    return murmurhash3_32(feature, positive=True) % n_features
+
+
+@lru_cache(maxsize=_WORD_FEATURES_CACHE_SIZE)
+def _word_features(word: str, n_features: int, char_ngram_range: Tuple[int, int]) -> Tuple[int, ...]:
+    """
+    Номера столбцов признаков одного слова: само слово и n-граммы его символов
+    с границами слова (как char_wb). Префиксы разделяют пространства слов и
+    символов, чтобы слово «кс» и символьная n-грамма «кс» не совпадали
+    """
+    padded = f" {word} "
+    low, high = char_ngram_range
+    features = [f"w:{word}"]
+    for size in range(low, high + 1):
+        features.extend(f"c:{padded[i:i + size]}" for i in range(len(padded) - size + 1))
+    return tuple(_hash_feature(feature, n_features) for feature in features)
+
+
+class HashingIntentModel(BaseEstimator, ClassifierMixin):
+    """
+    Классификатор намерений без словаря признаков: слова, их n-граммы и n-граммы
+    символов (устойчивы к опечаткам и окончаниям) отображаются хэшем в
+    фиксированное пространство n_features, поэтому в модели нет словаря
+    n-грамм, а векторизация не зависит от обучающей выборки. Номера признаков
+    слова вычисляются один раз и берутся из ограниченного кэша.
+
+    После обучения LogisticRegression от неё остаются только плотный вектор
+    коэффициентов float32 и сдвиг: оценка пачки любого размера — одно
+    произведение разреженной матрицы признаков на этот вектор. Интерфейс
+    (classes_, predict_proba, predict, score) совместим с конвейером TF-IDF
+    """
+
+    def __init__(
+        self,
+        n_features: int = 2 ** 18,
+        word_ngram_range: Tuple[int, int] = (1, 2),
+        char_ngram_range: Tuple[int, int] = (2, 4),
+        C: float = 10.0
+    ):
+        self.n_features = n_features
+        self.word_ngram_range = word_ngram_range
+        self.char_ngram_range = char_ngram_range
+        self.C = C
+
+    def _add_text_features(self, text: str, indices: List[int]) -> int:
+        """Дописывает в indices номера столбцов признаков текста (с повторами); возвращает их число"""
+        n_features = self.n_features
+        char_ngram_range = tuple(self.char_ngram_range)
+        start = len(indices)
+
+        words = _WORD_PATTERN.findall(text.lower())
+        for word in words:
+            indices.extend(_word_features(word, n_features, char_ngram_range))
+
+        low, high = self.word_ngram_range
+        for size in range(max(low, 2), high + 1):
+            phrases = zip(*(words[offset:] for offset in range(size)))
+            indices.extend(_hash_feature("w:" + " ".join(phrase), n_features) for phrase in phrases)
+        return len(indices) - start
+
+    def transform(self, texts: List[str]) -> sp.csr_matrix:
+        """
+        Разреженная матрица признаков пачки. Каждое вхождение признака весит
+        1/sqrt(n), где n — число признаков текста: для текста без повторов это
+        нормировка по L2. Повторы не складываются заранее — произведение на
+        вектор коэффициентов суммирует их само, без сортировки индексов
+        """
+        indices: List[int] = []
+        counts = np.array([self._add_text_features(text, indices) for text in texts], dtype=np.int64)
+        indptr = np.zeros(len(texts) + 1, dtype=np.int64)
+        np.cumsum(counts, out=indptr[1:])
+
+        weights = 1 / np.sqrt(np.maximum(counts, 1), dtype=np.float32)
+        return sp.csr_matrix(
+            (np.repeat(weights, counts), np.array(indices, dtype=np.int32), indptr),
+            shape=(len(texts), self.n_features)
+        )
+
+    def fit(self, texts: List[str], labels: List[int]) -> "HashingIntentModel":
+        classifier = LogisticRegression(C=self.C, max_iter=1000, class_weight="balanced", random_state=42)
+        features = self.transform(texts)
+        features.sum_duplicates()
+        classifier.fit(features, labels)
+        if len(classifier.classes_) != 2:
+            raise ValueError("HashingIntentModel поддерживает только два намерения")
+
+        self.classes_ = classifier.classes_
+        self.coef_ = np.ascontiguousarray(classifier.coef_[0], dtype=np.float32)
+        self.intercept_ = float(classifier.intercept_[0])
+        return self
+
+    def decision_function(self, texts: List[str]) -> np.ndarray:
+        """Линейная оценка пачки: одно произведение разреженной матрицы на вектор"""
+        return self.transform(texts) @ self.coef_ + self.intercept_
+
+    def predict_proba(self, texts: List[str]) -> np.ndarray:
+        positive = expit(self.decision_function(texts))
+        return np.column_stack([1 - positive, positive])
+
+    def predict(self, texts: List[str]) -> np.ndarray:
+        return self.classes_[(self.decision_function(texts) > 0).astype(int)]
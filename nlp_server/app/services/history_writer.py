@@ -0,0 +1,245 @@
+from collections import deque
+from datetime import datetime, timezone
+from nlp_server.app.config import HISTORY_BUFFER_SIZE, HISTORY_BATCH_SIZE, HISTORY_FLUSH_INTERVAL, HISTORY_SPILL_PATH
+from nlp_server.app.schemas.query_history import QueryHistory
+from nlp_server.app.services.db import database_enabled, engine, init_db
+from loguru import logger
+from sqlalchemy import insert
+from sqlalchemy.engine import Engine
+from typing import Any, Deque, Dict, Iterator, List, Optional
+import json
+import os
+import threading
+import uuid
+
+
+class HistoryWriter:
+    """
+    Фоновая запись истории запросов. record() только кладёт запись в ограниченный
+    буфер и никогда не ждёт БД; отдельный поток пишет буфер пачками (один
+    executemany на пачку) по достижении batch_size записей или раз в flush_interval
+    секунд. При переполнении буфера или ошибке БД записи уходят в файл spill_path
+    (или отбрасываются, если файл не задан) и досылаются, когда БД снова доступна
+    """
+
+    def __init__(
+        self,
+        engine: Optional[Engine],
+        max_buffer: int,
+        batch_size: int,
+        flush_interval: float,
+        spill_path: str = ""
+    ):
+        self.engine = engine
+        self.max_buffer = max_buffer
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.spill_path = spill_path
+
+        self.written = 0
+        self.dropped = 0
+        self.spilled = 0
+        self.replayed = 0
+        self.flushes = 0
+        self.errors = 0
+        self._failing = False
+
+        self._buffer: Deque[Dict[str, Any]] = deque()
+        self._lock = threading.Lock()
+        self._spill_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = False
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.engine is not None and self.max_buffer > 0
+
+    def start(self):
+        """Запуск потока записи (в каждом воркере после fork)"""
+        if not self.enabled or self._thread is not None:
+            return
+        init_db()
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="history-writer", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Остановка: поток дописывает всё, что осталось в буфере"""
+        if self._thread is None:
+            return
+        self._stopping = True
+        self._wakeup.set()
+        self._thread.join()
+        self._thread = None
+
+    def record(self, original_query: str, processed_query: str, intent: str, entities: Dict[str, Any]):
+        """Постановка записи в буфер без обращения к БД"""
+        if not self.enabled:
+            return
+
+        row = {
+            "original_query": original_query,
+            "processed_query": processed_query,
+            "intent": intent,
+            "extracted_entities": entities,
+            "create_at": datetime.now(timezone.utc)
+        }
+        with self._lock:
+            if len(self._buffer) < self.max_buffer:
+                self._buffer.append(row)
+                if len(self._buffer) >= self.batch_size:
+                    self._wakeup.set()
+                return
+
+        # Буфер полон: запрос не ждёт, запись уходит на диск или теряется
+        self._spill([row])
+
+    def _take(self) -> List[Dict[str, Any]]:
+        """Извлечение из буфера не более batch_size записей"""
+        with self._lock:
+            count = min(self.batch_size, len(self._buffer))
+            return [self._buffer.popleft() for _ in range(count)]
+
+    def _write(self, rows: List[Dict[str, Any]]):
+        """Одна транзакция на пачку: insert со списком строк выполняется как executemany"""
+        with self.engine.begin() as connection:
+            connection.execute(insert(QueryHistory), rows)
+        self.written += len(rows)
+        self.flushes += 1
+
+    def flush(self) -> int:
+        """Запись всего буфера пачками; при ошибке БД записи уходят на диск"""
+        total = 0
+        while True:
+            rows = self._take()
+            if not rows:
+                return total
+            try:
+                self._write(rows)
+                total += len(rows)
+                self._failing = False
+            except Exception as e:
+                self.errors += 1
+                self._failing = True
+                logger.error(f"Query history flush failed ({len(rows)} records): {e}")
+                self._spill(rows)
+
+    def _spill(self, rows: List[Dict[str, Any]]):
+        """Дозапись записей в файл spill_path одной операцией (или их отбрасывание)"""
+        if not self.spill_path:
+            self.dropped += len(rows)
+            return
+
+        lines = "".join(
+            json.dumps({**row, "create_at": row["create_at"].isoformat()}, ensure_ascii=False) + "\n"
+            for row in rows
+        )
+        try:
+            with self._spill_lock, open(self.spill_path, "a", encoding="utf-8") as f:
+                f.write(lines)
+            self.spilled += len(rows)
+        except OSError as e:
+            logger.error(f"Query history spill failed: {e}")
+            self.dropped += len(rows)
+
+    def _read_spilled(self, path: str) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Записи из файла пачками по batch_size. Повреждённые строки (например,
+        оборванная при аварийной остановке последняя) пропускаются и считаются
+        потерянными, чтобы одна такая строка не останавливала досылку остальных
+        """
+        batch = []
+        skipped = 0
+        with open(path, encoding="utf-8", errors="replace") as f:
+            for number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    row = json.loads(line)
+                    row["create_at"] = datetime.fromisoformat(row["create_at"])
+                except (ValueError, KeyError, TypeError) as e:
+                    skipped += 1
+                    logger.warning(f"Query history replay: skipping malformed line {number} in {path}: {e}")
+                    continue
+                batch.append(row)
+                if len(batch) >= self.batch_size:
+                    yield batch
+                    batch = []
+        if batch:
+            yield batch
+        self.dropped += skipped
+
+    def replay_spilled(self) -> int:
+        """
+        Досылка записей из файла, пока БД доступна. Файл сначала переименовывается,
+        поэтому новые записи пишутся в новый файл, а несколько воркеров не досылают
+        одни и те же записи дважды. Имя файла досылки уникально: если досылка
+        прервалась непредвиденной ошибкой, файл остаётся на диске и не затирается
+        следующей попыткой
+        """
+        if not self.spill_path or not os.path.exists(self.spill_path):
+            return 0
+
+        replay_path = f"{self.spill_path}.{os.getpid()}.{uuid.uuid4().hex}.replay"
+        try:
+            with self._spill_lock:
+                os.replace(self.spill_path, replay_path)
+        except FileNotFoundError:
+            return 0
+
+        total = 0
+        batches = self._read_spilled(replay_path)
+        for rows in batches:
+            try:
+                self._write(rows)
+                total += len(rows)
+            except Exception as e:
+                # Недосланное возвращается в файл до следующей попытки
+                self.errors += 1
+                logger.error(f"Query history replay failed: {e}")
+                self._spill(rows)
+                for rest in batches:
+                    self._spill(rest)
+                break
+        os.remove(replay_path)
+        self.replayed += total
+        return total
+
+    def _run(self):
+        """Цикл потока записи: по сигналу заполнения или по таймеру"""
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+                # Файл досылается, только пока БД отвечает
+                if not self._failing:
+                    self.replay_spilled()
+            except Exception as e:
+                logger.error(f"Query history writer error: {e}")
+            if self._stopping:
+                return
+
+    def stats(self) -> Dict[str, Any]:
+        """Счётчики записи для мониторинга"""
+        return {
+            "enabled": self.enabled,
+            "buffered": len(self._buffer),
+            "max_buffer": self.max_buffer,
+            "written": self.written,
+            "flushes": self.flushes,
+            "spilled": self.spilled,
+            "replayed": self.replayed,
+            "dropped": self.dropped,
+            "errors": self.errors
+        }
+
+
+history_writer = HistoryWriter(
+    engine if database_enabled() else None,
+    HISTORY_BUFFER_SIZE,
+    HISTORY_BATCH_SIZE,
+    HISTORY_FLUSH_INTERVAL,
+    HISTORY_SPILL_PATH
+)
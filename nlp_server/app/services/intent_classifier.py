@@ -1,10 +1,15 @@
-from nlp_server.app.models.classfier_model import ClassifyIntentRequest, ClassifyIntentResponse
+from nlp_server.app.config import INTENT_ENGINE, INTENT_MODEL_PATH, INTENT_MODEL_DIR
+from nlp_server.app.models.results import IntentResult
+from nlp_server.app.services.hashing_intent import HashingIntentModel
+from nlp_server.app.services.model_registry import model_registry
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.linear_model import LogisticRegression
 from sklearn.pipeline import Pipeline
-from typing import List
+from typing import Any, Dict, Iterable, List, Optional, Set
 import joblib
+import json
 import os
+import re
 
 # Правила для fallback классификации
 ACTION_KEYWORDS = [
@@ -19,38 +24,64 @@ SEARCH_KEYWORDS = [
 ]
 
 
-# Обучение простой модели
-def train_intent_model():
-    """Обучение модели классификации намерений"""
-    train_texts = [
-        # Action intent examples (15 примеров)
-        "создай котировочную сессию", "создай кс на канцелярию", "добавь новую компанию",
-        "хочу создать закупку на мебель", "измени профиль компании", "надо создать кс",
-        "создать закупку", "добавить эцп", "создай кс на 100000", "создай заявку на ремонт",
-        "добавь электронную подпись", "создай новый профиль", "измени данные компании",
-        "зарегистрируй новую организацию", "обнови информацию о закупке",
-
-        # Search intent examples (15 примеров)
-        "покажи мои закупки", "найди котировочные сессии", "ищу поставщиков мебели",
-        "что такое кс", "история закупок", "найди кс по канцелярии", "покажи компании",
-        "выведи все закупки", "информация о кс", "поиск товаров", "найти поставщика",
-        "покажи историю запросов", "что значит эцп", "как создать закупку",
-        "где посмотреть результаты тендера"
-    ]
+class KeywordMatcher:
+    """
+    Поиск всех ключевых слов одним проходом скомпилированного регулярного выражения.
+    Просмотр вперёд находит и перекрывающиеся вхождения; ключевые слова, входящие
+    в более длинное совпавшее (например, 'измени' в 'изменить'), добавляются к нему
+    """
+
+    def __init__(self, keywords: Iterable[str]):
+        unique = sorted(set(keywords), key=len, reverse=True)
+        self._pattern = re.compile("(?=(" + "|".join(re.escape(kw) for kw in unique) + "))")
+        self._implied = {kw: {other for other in unique if other in kw} for kw in unique}
+
+    def find(self, text_lower: str) -> Set[str]:
+        """Множество ключевых слов, встречающихся в тексте"""
+        found = set()
+        for match in self._pattern.finditer(text_lower):
+            found |= self._implied[match.group(1)]
+        return found
+
+
+keyword_matcher = KeywordMatcher(ACTION_KEYWORDS + SEARCH_KEYWORDS)
+
+
+# Исходная обучающая выборка; примеры, добавленные позже, хранятся в TrainingStore
+TRAIN_TEXTS = [
+    # Action intent examples (15 примеров)
+    "создай котировочную сессию", "создай кс на канцелярию", "добавь новую компанию",
+    "хочу создать закупку на мебель", "измени профиль компании", "надо создать кс",
+    "создать закупку", "добавить эцп", "создай кс на 100000", "создай заявку на ремонт",
+    "добавь электронную подпись", "создай новый профиль", "измени данные компании",
+    "зарегистрируй новую организацию", "обнови информацию о закупке",
+
+    # Search intent examples (15 примеров)
+    "покажи мои закупки", "найди котировочные сессии", "ищу поставщиков мебели",
+    "что такое кс", "история закупок", "найди кс по канцелярии", "покажи компании",
+    "выведи все закупки", "информация о кс", "поиск товаров", "найти поставщика",
+    "покажи историю запросов", "что значит эцп", "как создать закупку",
+    "где посмотреть результаты тендера"
+]
 
-    # 1 - action, 0 - search (ровно 30 меток для 30 текстов)
-    train_labels = [
-        1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1,  # 15 action
-        0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0  # 15 search
-    ]
+# 1 - action, 0 - search (ровно 30 меток для 30 текстов)
+TRAIN_LABELS = [
+    1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1,  # 15 action
+    0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0  # 15 search
+]
 
-    # Проверка соответствия размеров
-    if len(train_texts) != len(train_labels):
-        raise ValueError(f"Несоответствие размеров: texts={len(train_texts)}, labels={len(train_labels)}")
+# Версия модели, обученной на исходной выборке (или загруженной из INTENT_MODEL_PATH)
+BASE_MODEL_VERSION = "1.0" if INTENT_ENGINE == "tfidf" else f"1.0-{INTENT_ENGINE}"
 
-    print(f"Обучение модели на {len(train_texts)} примерах...")
 
-    model = Pipeline([
+def build_intent_pipeline(engine: str = INTENT_ENGINE):
+    """Необученная модель классификации намерений выбранного типа"""
+    if engine == "hashing":
+        return HashingIntentModel()
+    if engine != "tfidf":
+        raise ValueError(f"Неизвестный тип модели намерений: {engine}")
+
+    return Pipeline([
         ('tfidf', TfidfVectorizer(
             ngram_range=(1, 2),
             max_features=500,
@@ -65,37 +96,55 @@ def train_intent_model():
         ))
     ])
 
+
+# Обучение простой модели
+def train_intent_model(
+    train_texts: Optional[List[str]] = None,
+    train_labels: Optional[List[int]] = None,
+    engine: str = INTENT_ENGINE
+):
+    """Обучение модели классификации намерений (по умолчанию на исходной выборке)"""
+    if train_texts is None:
+        train_texts, train_labels = TRAIN_TEXTS, TRAIN_LABELS
+
+    # Проверка соответствия размеров
+    if len(train_texts) != len(train_labels):
+        raise ValueError(f"Несоответствие размеров: texts={len(train_texts)}, labels={len(train_labels)}")
+
+    print(f"Обучение модели на {len(train_texts)} примерах...")
+
+    model = build_intent_pipeline(engine)
     model.fit(train_texts, train_labels)
     print("Модель успешно обучена!")
     return model
 
 
-def rule_based_intent_classification(text: str) -> ClassifyIntentResponse:
+def rule_based_intent_classification(text: str) -> IntentResult:
     """Классификация намерения на основе правил (fallback)"""
-    text_lower = text.lower()
+    found = keyword_matcher.find(text.lower())
 
-    action_count = sum(1 for keyword in ACTION_KEYWORDS if keyword in text_lower)
-    search_count = sum(1 for keyword in SEARCH_KEYWORDS if keyword in text_lower)
+    action_count = sum(1 for keyword in ACTION_KEYWORDS if keyword in found)
+    search_count = sum(1 for keyword in SEARCH_KEYWORDS if keyword in found)
 
     if action_count > search_count:
         confidence = min(0.9, 0.5 + (action_count / len(ACTION_KEYWORDS)))
-        return ClassifyIntentResponse(
+        return IntentResult(
             intent="action",
             confidence=round(confidence, 2),
             possible_intents={"action": confidence, "search": 1 - confidence},
-            keywords=[kw for kw in ACTION_KEYWORDS if kw in text_lower]
+            keywords=[kw for kw in ACTION_KEYWORDS if kw in found]
         )
     elif search_count > action_count:
         confidence = min(0.9, 0.5 + (search_count / len(SEARCH_KEYWORDS)))
-        return ClassifyIntentResponse(
+        return IntentResult(
             intent="search",
             confidence=round(confidence, 2),
             possible_intents={"action": 1 - confidence, "search": confidence},
-            keywords=[kw for kw in SEARCH_KEYWORDS if kw in text_lower]
+            keywords=[kw for kw in SEARCH_KEYWORDS if kw in found]
         )
     else:
         # Если количество ключевых слов одинаковое или их нет
-        return ClassifyIntentResponse(
+        return IntentResult(
             intent="unknown",
             confidence=0.5,
             possible_intents={"action": 0.5, "search": 0.5},
@@ -105,58 +154,147 @@ def rule_based_intent_classification(text: str) -> ClassifyIntentResponse:
 
 # Загрузка или обучение модели
 model = None
-model_path = "intent_model.joblib"
+model_version: Optional[str] = None
+model_path = INTENT_MODEL_PATH
+
+# Описание текущей переобученной модели в INTENT_MODEL_DIR: версия, файл, метрики
+MANIFEST_NAME = "current.json"
+
+
+def read_model_manifest() -> Optional[Dict[str, Any]]:
+    """Описание последней принятой переобученной модели или None"""
+    path = os.path.join(INTENT_MODEL_DIR, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def write_model_manifest(manifest: Dict[str, Any]):
+    """Атомарная запись описания: читающие воркеры не видят недописанный файл"""
+    os.makedirs(INTENT_MODEL_DIR, exist_ok=True)
+    path = os.path.join(INTENT_MODEL_DIR, MANIFEST_NAME)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def load_manifest_model(manifest: Dict[str, Any]):
+    """Загрузка файла модели, указанного в описании"""
+    return joblib.load(os.path.join(INTENT_MODEL_DIR, manifest["file"]))
+
+
+def install_model(new_model, version: str):
+    """
+    Подмена модели одной операцией присваивания: запросы, уже взявшие ссылку
+    на прежнюю модель, дорабатывают на ней, следующие получают новую
+    """
+    global model, model_version
+    model = new_model
+    model_version = version
+
+
+def model_engine(loaded_model) -> str:
+    """Тип загруженной модели намерений"""
+    return "hashing" if isinstance(loaded_model, HashingIntentModel) else "tfidf"
+
+
+def read_engine_manifest() -> Optional[Dict[str, Any]]:
+    """Описание переобученной модели, если она того же типа, что выбран в INTENT_ENGINE"""
+    manifest = read_model_manifest()
+    if manifest is None or manifest.get("engine", "tfidf") != INTENT_ENGINE:
+        return None
+    return manifest
 
 
 def initialize_model():
     """Инициализация модели с обработкой ошибок"""
-    global model
     try:
-        if os.path.exists(model_path):
+        manifest = read_engine_manifest()
+        if manifest is not None:
+            print(f"Загрузка модели версии {manifest['version']}...")
+            install_model(load_manifest_model(manifest), manifest["version"])
+            print("Модель успешно загружена!")
+        elif os.path.exists(model_path):
             print("Загрузка существующей модели...")
-            model = joblib.load(model_path)
+            loaded = joblib.load(model_path)
+            if model_engine(loaded) != INTENT_ENGINE:
+                raise ValueError(f"{model_path} содержит модель {model_engine(loaded)}, а INTENT_ENGINE={INTENT_ENGINE}")
+            install_model(loaded, BASE_MODEL_VERSION)
             print("Модель успешно загружена!")
         else:
             print("Обучение новой модели...")
-            model = train_intent_model()
-            joblib.dump(model, model_path)
+            new_model = train_intent_model()
+            if os.path.dirname(model_path):
+                os.makedirs(os.path.dirname(model_path), exist_ok=True)
+            joblib.dump(new_model, model_path)
+            install_model(new_model, BASE_MODEL_VERSION)
             print("Модель обучена и сохранена!")
     except Exception as e:
         print(f"Ошибка инициализации ML модели: {e}")
         print("Используется rule-based классификация")
-        model = None
+        install_model(None, None)
 
 
-# Инициализируем модель при импорте
-initialize_model()
+def init_intent_classifier() -> Optional[str]:
+    """Инициализация модели при прогреве или первом обращении (вызывается реестром моделей)"""
+    initialize_model()
+    return f"version {model_version}" if model is not None else "rule-based fallback"
 
 
-def classify_intent(text: str) -> ClassifyIntentResponse:
+model_registry.register("intent_classifier", init_intent_classifier)
+
+
+def refresh_intent_model() -> bool:
+    """
+    Загрузка модели, принятой в другом воркере: сравнивается версия в описании
+    с загруженной. Возвращает True, если модель была заменена
+    """
+    manifest = read_engine_manifest()
+    if manifest is None or manifest["version"] == model_version:
+        return False
+    install_model(load_manifest_model(manifest), manifest["version"])
+    print(f"Загружена модель намерений версии {model_version}")
+    return True
+
+
+def _ml_intent_response(current_model, text: str, prediction) -> IntentResult:
+    """
+    Сборка ответа по вектору вероятностей ML модели; метка берётся как argmax
+    вероятностей, что совпадает с model.predict без повторной векторизации
+    """
+    intent_label = current_model.classes_[prediction.argmax()]
+    intent = "action" if intent_label == 1 else "search"
+    confidence = float(prediction[intent_label])
+
+    # Извлекаем ключевые слова
+    found = keyword_matcher.find(text.lower())
+    all_keywords = ACTION_KEYWORDS + SEARCH_KEYWORDS
+    keywords = [kw for kw in all_keywords if kw in found]
+
+    return IntentResult(
+        intent=intent,
+        confidence=round(confidence, 2),
+        possible_intents={
+            "action": float(prediction[1]),
+            "search": float(prediction[0])
+        },
+        keywords=keywords
+    )
+
+
+def classify_intent(text: str) -> IntentResult:
     """Классификация намерения пользователя"""
+    model_registry.ensure("intent_classifier")
 
+    # Ссылка берётся один раз: модель может быть подменена переобучением во время запроса
+    current_model = model
     # Если модель доступна, используем ML
-    if model is not None:
+    if current_model is not None:
         try:
-            prediction = model.predict_proba([text])[0]
-            intent_label = model.predict([text])[0]
-
-            intent = "action" if intent_label == 1 else "search"
-            confidence = float(prediction[intent_label])
-
-            # Извлекаем ключевые слова
-            text_lower = text.lower()
-            all_keywords = ACTION_KEYWORDS + SEARCH_KEYWORDS
-            keywords = [kw for kw in all_keywords if kw in text_lower]
-
-            return ClassifyIntentResponse(
-                intent=intent,
-                confidence=round(confidence, 2),
-                possible_intents={
-                    "action": float(prediction[1]),
-                    "search": float(prediction[0])
-                },
-                keywords=keywords
-            )
+            prediction = current_model.predict_proba([text])[0]
+            return _ml_intent_response(current_model, text, prediction)
         except Exception as e:
             print(f"ML classification failed: {e}. Falling back to rules.")
             return rule_based_intent_classification(text)
@@ -165,24 +303,38 @@ def classify_intent(text: str) -> ClassifyIntentResponse:
         return rule_based_intent_classification(text)
 
 
+def classify_intent_batch(texts: List[str]) -> List[IntentResult]:
+    """Классификация намерений для пачки текстов одним вызовом модели"""
+    model_registry.ensure("intent_classifier")
+    current_model = model
+    if current_model is not None and texts:
+        try:
+            predictions = current_model.predict_proba(texts)
+            return [
+                _ml_intent_response(current_model, text, prediction)
+                for text, prediction in zip(texts, predictions)
+            ]
+        except Exception as e:
+            print(f"ML classification failed: {e}. Falling back to rules.")
+
+    return [rule_based_intent_classification(text) for text in texts]
+
+
 # Функция для обновления модели новыми примерами
-def update_intent_model(new_texts: List[str], new_labels: List[int]):
-    """Обновление модели новыми примерами"""
-    global model
+def update_intent_model(new_texts: List[str], new_labels: List[int]) -> bool:
+    """
+    Сохранение новых примеров и запуск переобучения в фоновом процессе; текущая
+    модель продолжает отвечать, пока новая не обучена и не прошла проверку
+    """
+    from nlp_server.app.services.intent_training import RetrainInProgress, intent_retrainer, training_store
+
     try:
-        if len(new_texts) != len(new_labels):
-            raise ValueError("Количество текстов и меток должно совпадать")
-
-        if model is not None:
-            # Дообучение модели
-            model.fit(new_texts, new_labels)
-            joblib.dump(model, model_path)
-            return True
-        else:
-            # Переобучение с нуля
-            model = train_intent_model()
-            joblib.dump(model, model_path)
-            return True
+        training_store.add(new_texts, new_labels)
+        intent_retrainer.start()
+        return True
+    except RetrainInProgress:
+        # Примеры сохранены и попадут в следующее переобучение
+        return True
     except Exception as e:
         print(f"Error updating model: {e}")
         return False
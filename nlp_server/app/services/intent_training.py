@@ -0,0 +1,256 @@
+from concurrent.futures import ProcessPoolExecutor
+from nlp_server.app.config import (
+    INTENT_ENGINE, INTENT_TRAINING_PATH, INTENT_MODEL_DIR, INTENT_MIN_ACCURACY, INTENT_MAX_ACCURACY_DROP
+)
+from nlp_server.app.services import intent_classifier
+from loguru import logger
+from sklearn.model_selection import StratifiedKFold, cross_val_score
+from typing import Any, Dict, List, Optional, Tuple
+import asyncio
+import hashlib
+import joblib
+import json
+import multiprocessing
+import numpy as np
+import os
+import threading
+import time
+
+
+INTENT_LABELS = (0, 1)
+
+
+class RetrainInProgress(Exception):
+    """Переобучение уже выполняется"""
+
+
+class TrainingStore:
+    """
+    Обучающие примеры намерений: исходная выборка из кода и примеры, добавленные
+    через API, в файле JSONL. Каждое добавление — одна дозапись в конец файла,
+    поэтому несколько воркеров могут пополнять его одновременно
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def add(self, texts: List[str], labels: List[int]) -> int:
+        """Сохранение примеров; возвращает число добавленных"""
+        if len(texts) != len(labels):
+            raise ValueError("Количество текстов и меток должно совпадать")
+        unknown = set(labels) - set(INTENT_LABELS)
+        if unknown:
+            raise ValueError(f"Неизвестные метки намерений: {sorted(unknown)}")
+
+        lines = "".join(
+            json.dumps({"text": text, "label": int(label), "added_at": time.time()}, ensure_ascii=False) + "\n"
+            for text, label in zip(texts, labels)
+        )
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(lines)
+        return len(texts)
+
+    def added(self) -> List[Tuple[str, int]]:
+        """Примеры, добавленные через API"""
+        if not os.path.exists(self.path):
+            return []
+        examples = []
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    row = json.loads(line)
+                    examples.append((row["text"], row["label"]))
+        return examples
+
+    def load(self) -> Tuple[List[str], List[int]]:
+        """Полная обучающая выборка: исходные примеры и добавленные"""
+        texts = list(intent_classifier.TRAIN_TEXTS)
+        labels = list(intent_classifier.TRAIN_LABELS)
+        for text, label in self.added():
+            texts.append(text)
+            labels.append(label)
+        return texts, labels
+
+
+def dataset_version(texts: List[str], labels: List[int]) -> str:
+    """Версия модели: время обучения и хэш выборки, на которой она обучена"""
+    digest = hashlib.sha1(
+        json.dumps([texts, labels], ensure_ascii=False).encode("utf-8")
+    ).hexdigest()[:8]
+    return f"{time.strftime('%Y%m%d%H%M%S')}-{digest}"
+
+
+def fit_intent_model(
+    texts: List[str], labels: List[int], output_dir: str, version: str, baseline=None
+) -> Dict[str, Any]:
+    """
+    Обучение и оценка новой модели (выполняется в отдельном процессе): точность
+    перекрёстной проверки на всей выборке и на исходных примерах, затем полное
+    обучение и запись файла версии (через временный файл и переименование).
+    Если передана текущая модель baseline, она оценивается на тех же проверочных
+    частях разбиения (baseline_accuracy)
+    """
+    started = time.perf_counter()
+    smallest_class = min(labels.count(label) for label in INTENT_LABELS)
+    if smallest_class < 2:
+        raise ValueError("Для обучения нужно хотя бы по два примера каждого намерения")
+
+    folds = StratifiedKFold(n_splits=min(5, smallest_class), shuffle=True, random_state=42)
+    cv_accuracy = float(cross_val_score(intent_classifier.build_intent_pipeline(), texts, labels, cv=folds).mean())
+    baseline_accuracy = None
+    if baseline is not None:
+        baseline_accuracy = float(np.mean([
+            baseline.score([texts[i] for i in test], [labels[i] for i in test])
+            for _, test in folds.split(texts, labels)
+        ]))
+
+    model = intent_classifier.build_intent_pipeline()
+    model.fit(texts, labels)
+    seed_accuracy = float(model.score(intent_classifier.TRAIN_TEXTS, intent_classifier.TRAIN_LABELS))
+
+    os.makedirs(output_dir, exist_ok=True)
+    file_name = f"intent_model-{version}.joblib"
+    path = os.path.join(output_dir, file_name)
+    tmp_path = f"{path}.tmp"
+    joblib.dump(model, tmp_path)
+    os.replace(tmp_path, path)
+
+    return {
+        "version": version,
+        "file": file_name,
+        "examples": len(texts),
+        "cv_accuracy": round(cv_accuracy, 4),
+        "seed_accuracy": round(seed_accuracy, 4),
+        "baseline_accuracy": round(baseline_accuracy, 4) if baseline_accuracy is not None else None,
+        "train_time": round(time.perf_counter() - started, 3),
+        "trained_at": time.time()
+    }
+
+
+class IntentRetrainer:
+    """
+    Переобучение модели намерений без остановки обслуживания. Обучение идёт в
+    отдельном процессе (spawn, чтобы не копировать потоки сервера), поэтому не
+    занимает GIL воркера и не трогает модель, которая сейчас отвечает на запросы.
+    Новая модель принимается, только если её точность не ниже min_accuracy и не
+    хуже текущей более чем на max_accuracy_drop; затем она подменяет текущую и
+    записывается как новая версия в output_dir
+    """
+
+    def __init__(self, store: TrainingStore, output_dir: str, min_accuracy: float, max_accuracy_drop: float):
+        self.store = store
+        self.output_dir = output_dir
+        self.min_accuracy = min_accuracy
+        self.max_accuracy_drop = max_accuracy_drop
+
+        self.state = "idle"
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.last_result: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self.state == "running"
+
+    def start(self) -> Dict[str, Any]:
+        """Запуск переобучения в фоне; RetrainInProgress, если оно уже идёт"""
+        with self._lock:
+            if self.running:
+                raise RetrainInProgress("Intent model retraining is already running")
+            self.state = "running"
+            self.started_at = time.time()
+            self.finished_at = None
+            self.error = None
+            self._thread = threading.Thread(target=self._run, name="intent-retrain", daemon=True)
+            self._thread.start()
+        return self.status()
+
+    def wait(self, timeout: Optional[float] = None):
+        """Ожидание завершения текущего переобучения"""
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+
+    def validate(self, result: Dict[str, Any]) -> Optional[str]:
+        """
+        Причина отказа от новой модели или None, если она принята. Новая модель
+        сравнивается с метриками принятой ранее версии, а при первом переобучении
+        (описания ещё нет) — с базовой моделью, оценённой на тех же проверочных данных
+        """
+        if result["cv_accuracy"] < self.min_accuracy:
+            return f"cv_accuracy {result['cv_accuracy']} < {self.min_accuracy}"
+
+        current = intent_classifier.read_engine_manifest()
+        if current is not None:
+            baseline = current["metrics"]["cv_accuracy"]
+        else:
+            baseline = result.get("baseline_accuracy")
+        if baseline is not None and result["cv_accuracy"] < baseline - self.max_accuracy_drop:
+            return f"cv_accuracy {result['cv_accuracy']} is worse than current {baseline}"
+        return None
+
+    def _run(self):
+        """Тело фонового потока: обучение в процессе, проверка, подмена модели"""
+        try:
+            texts, labels = self.store.load()
+            version = dataset_version(texts, labels)
+            # Без описания принятой версии отвечает базовая модель: она оценивается
+            # в том же процессе обучения на тех же проверочных частях выборки
+            baseline = intent_classifier.model if intent_classifier.read_engine_manifest() is None else None
+            context = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+                result = pool.submit(fit_intent_model, texts, labels, self.output_dir, version, baseline).result()
+
+            reason = self.validate(result)
+            if reason is not None:
+                os.remove(os.path.join(self.output_dir, result["file"]))
+                self._finish("rejected", result, reason)
+                logger.warning(f"Intent model {version} rejected: {reason}")
+                return
+
+            manifest = {"version": version, "engine": INTENT_ENGINE, "file": result["file"], "metrics": result}
+            intent_classifier.install_model(intent_classifier.load_manifest_model(manifest), version)
+            intent_classifier.write_model_manifest(manifest)
+            self._finish("succeeded", result)
+            logger.info(f"Intent model {version} installed (cv_accuracy {result['cv_accuracy']})")
+        except Exception as e:
+            logger.error(f"Intent model retraining failed: {e}")
+            self._finish("failed", None, str(e))
+
+    def _finish(self, state: str, result: Optional[Dict[str, Any]], error: Optional[str] = None):
+        self.last_result = result
+        self.error = error
+        self.finished_at = time.time()
+        self.state = state
+
+    def status(self) -> Dict[str, Any]:
+        """Состояние переобучения и версия текущей модели"""
+        return {
+            "state": self.state,
+            "model_version": intent_classifier.model_version,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "last_result": self.last_result,
+            "error": self.error
+        }
+
+
+training_store = TrainingStore(INTENT_TRAINING_PATH)
+intent_retrainer = IntentRetrainer(training_store, INTENT_MODEL_DIR, INTENT_MIN_ACCURACY, INTENT_MAX_ACCURACY_DROP)
+
+
+async def refresh_periodically(interval: float):
+    """Фоновая загрузка версии модели, принятой в другом воркере"""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await asyncio.to_thread(intent_classifier.refresh_intent_model)
+        except Exception as e:
+            logger.error(f"Intent model refresh failed: {e}")
@@ -0,0 +1,27 @@
+from nlp_server.app.config import LOG_LEVEL, LOG_SAMPLE_RATE, LOG_ENQUEUE
+from loguru import logger
+import random
+import sys
+
+
+_configured = False
+
+
+def setup_logging():
+    """
+    Единственный обработчик loguru. С enqueue записи уходят в очередь и пишутся
+    отдельным потоком, поэтому медленный stderr не задерживает запросы; после
+    fork воркеры пишут в очередь родителя
+    """
+    global _configured
+    if _configured:
+        return
+    logger.remove()
+    logger.add(sys.stderr, level=LOG_LEVEL, enqueue=LOG_ENQUEUE, backtrace=False, diagnose=False)
+    _configured = True
+
+
+def log_sampled(message: str, *args, level: str = "INFO", **kwargs):
+    """Запись в журнал только для доли LOG_SAMPLE_RATE вызовов (для сообщений на каждый запрос)"""
+    if LOG_SAMPLE_RATE >= 1 or (LOG_SAMPLE_RATE > 0 and random.random() < LOG_SAMPLE_RATE):
+        logger.opt(depth=1).log(level, message, *args, **kwargs)
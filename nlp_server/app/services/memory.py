@@ -0,0 +1,31 @@
+from typing import Dict, Union
+import os
+import resource
+
+
+def process_memory(pid: Union[int, str] = "self") -> Dict[str, float]:
+    """
+    Память процесса в МБ: rss — резидентная, pss — с долей разделяемых страниц,
+    shared — страницы, общие с другими процессами (например, после fork),
+    private — собственные страницы процесса. Без /proc (не Linux) — только пиковый rss
+    """
+    path = f"/proc/{pid}/smaps_rollup"
+    if not os.path.exists(path):
+        peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return {"rss": round(peak_kb / 1024, 1)}
+
+    values = {}
+    with open(path) as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == "kB":
+                values[parts[0].rstrip(":")] = int(parts[1])
+
+    shared = values.get("Shared_Clean", 0) + values.get("Shared_Dirty", 0)
+    private = values.get("Private_Clean", 0) + values.get("Private_Dirty", 0)
+    return {
+        "rss": round(values.get("Rss", 0) / 1024, 1),
+        "pss": round(values.get("Pss", 0) / 1024, 1),
+        "shared": round(shared / 1024, 1),
+        "private": round(private / 1024, 1)
+    }
@@ -0,0 +1,181 @@
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Sequence, Tuple
+import threading
+import time
+
+
+# Границы корзин гистограмм задержки, секунды
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    """Метки в формате Prometheus: {name="value",...}"""
+    if not names:
+        return ""
+    pairs = ",".join(
+        '{}="{}"'.format(name, str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for name, value in zip(names, values)
+    )
+    return "{" + pairs + "}"
+
+
+def _format_value(value: float) -> str:
+    """Число без лишних нулей: целые значения выводятся без дробной части"""
+    if value == int(value):
+        return str(int(value))
+    return repr(value)
+
+
+class Counter:
+    """Монотонный счётчик с метками"""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[LabelValues, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labelvalues: str, amount: float = 1.0):
+        """Увеличение счётчика для набора значений меток"""
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0.0) + amount
+
+    def render(self) -> List[str]:
+        """Строки текстового формата Prometheus"""
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for labelvalues, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labelnames, labelvalues)} {_format_value(value)}")
+        return lines
+
+
+class Histogram:
+    """Гистограмма с фиксированными корзинами и метками"""
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Значения меток -> (счётчики по корзинам, сумма, число наблюдений)
+        self._series: Dict[LabelValues, List] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labelvalues: str):
+        """Учёт одного наблюдения"""
+        position = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labelvalues)
+            if series is None:
+                series = self._series[labelvalues] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][position] += 1
+            series[1] += value
+            series[2] += 1
+
+    @contextmanager
+    def time(self, *labelvalues: str) -> Iterator[None]:
+        """Замер длительности блока кода"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, *labelvalues)
+
+    def render(self) -> List[str]:
+        """Строки текстового формата Prometheus (корзины накопительные)"""
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        bucket_labels = self.labelnames + ("le",)
+        with self._lock:
+            for labelvalues, (counts, total, count) in sorted(self._series.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                    cumulative += bucket_count
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(f"{self.name}_bucket{_format_labels(bucket_labels, labelvalues + (le,))} {cumulative}")
+                labels = _format_labels(self.labelnames, labelvalues)
+                lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+                lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Реестр метрик процесса. Счётчики и гистограммы обновляются на пути запроса,
+    а состояние кэшей, пачек и моделей снимается коллекторами в момент выдачи /metrics
+    """
+
+    def __init__(self):
+        self._metrics: List = []
+        self._collectors: List[Callable[[], List[str]]] = []
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        """Создание и регистрация счётчика"""
+        metric = Counter(name, documentation, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS
+    ) -> Histogram:
+        """Создание и регистрация гистограммы"""
+        metric = Histogram(name, documentation, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def collector(self, func: Callable[[], List[str]]) -> Callable[[], List[str]]:
+        """Регистрация функции, возвращающей готовые строки метрик (можно как декоратор)"""
+        self._collectors.append(func)
+        return func
+
+    def render(self) -> str:
+        """Все метрики в текстовом формате Prometheus"""
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for collector in self._collectors:
+            lines.extend(collector())
+        return "\n".join(lines) + "\n"
+
+
+def gauge_lines(
+    name: str,
+    documentation: str,
+    samples: Dict[LabelValues, float],
+    labelnames: Sequence[str] = (),
+    kind: str = "gauge"
+) -> List[str]:
+    """Строки метрики, значения которой снимаются в момент выдачи"""
+    lines = [f"# HELP {name} {documentation}", f"# TYPE {name} {kind}"]
+    for labelvalues, value in samples.items():
+        lines.append(f"{name}{_format_labels(labelnames, labelvalues)} {_format_value(value)}")
+    return lines
+
+
+metrics_registry = MetricsRegistry()
+
+HTTP_REQUESTS = metrics_registry.counter(
+    "nlp_http_requests_total", "HTTP requests by endpoint, method and status", ("endpoint", "method", "status")
+)
+HTTP_LATENCY = metrics_registry.histogram(
+    "nlp_http_request_duration_seconds", "HTTP request latency by endpoint", ("endpoint", "method")
+)
+STAGE_LATENCY = metrics_registry.histogram(
+    "nlp_stage_duration_seconds", "Latency of processing stages as seen by a request", ("stage",)
+)
+BATCH_LATENCY = metrics_registry.histogram(
+    "nlp_batch_duration_seconds", "Execution time of one micro-batch", ("stage",)
+)
@@ -0,0 +1,100 @@
+from concurrent.futures import ThreadPoolExecutor
+from loguru import logger
+from nlp_server.app.config import MODEL_RETRY_BACKOFF, MODEL_RETRY_MAX_BACKOFF
+from typing import Any, Callable, Dict, Optional
+import threading
+import time
+
+
+NOT_LOADED = "not_loaded"
+LOADING = "loading"
+READY = "ready"
+FAILED = "failed"
+
+
+class ModelUnavailable(RuntimeError):
+    """Загрузка модели недавно завершилась ошибкой, повтор ещё не разрешён"""
+
+
+class ModelRegistry:
+    """
+    Реестр моделей сервиса: каждая модель загружается один раз — при прогреве
+    в lifespan или лениво при первом обращении; состояние и время загрузки
+    отдаются в /health/ready. После ошибки загрузка повторяется не раньше чем через
+    паузу, удваивающуюся с каждой неудачей, а до этого обращения сразу получают
+    ModelUnavailable, а не запускают загрузку на каждом запросе
+    """
+
+    def __init__(self):
+        self._loaders: Dict[str, Callable[[], Optional[str]]] = {}
+        self._states: Dict[str, Dict[str, Any]] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._errors: Dict[str, Exception] = {}
+
+    def register(self, name: str, loader: Callable[[], Optional[str]]):
+        """Регистрация загрузчика; он может вернуть строку с пояснением к состоянию"""
+        self._loaders[name] = loader
+        self._states[name] = {"status": NOT_LOADED, "load_time": None, "detail": None, "failures": 0, "retry_at": None}
+        self._locks[name] = threading.Lock()
+
+    def ensure(self, name: str):
+        """Загрузка модели, если она ещё не загружена (потокобезопасно)"""
+        state = self._states[name]
+        if state["status"] == READY:
+            return
+
+        with self._locks[name]:
+            if state["status"] == READY:
+                return
+            if state["status"] == FAILED and time.time() < state["retry_at"]:
+                raise ModelUnavailable(
+                    f"Модель {name} не загружена: {state['detail']} (повтор через {state['retry_at'] - time.time():.0f} с)"
+                ) from self._errors[name]
+
+            state["status"] = LOADING
+            started = time.perf_counter()
+            try:
+                state["detail"] = self._loaders[name]()
+                state["status"] = READY
+                state["failures"] = 0
+                state["retry_at"] = None
+                self._errors.pop(name, None)
+            except Exception as e:
+                backoff = min(MODEL_RETRY_BACKOFF * 2 ** state["failures"], MODEL_RETRY_MAX_BACKOFF)
+                state["status"] = FAILED
+                state["detail"] = str(e)
+                state["failures"] += 1
+                state["retry_at"] = time.time() + backoff
+                self._errors[name] = e
+                logger.warning(f"Model {name} failed to load (attempt {state['failures']}, retry in {backoff:.0f}s): {e}")
+                raise
+            finally:
+                state["load_time"] = round(time.perf_counter() - started, 3)
+
+    def _try_ensure(self, name: str):
+        """Загрузка при прогреве: ошибка фиксируется в состоянии, но не прерывает прогрев"""
+        try:
+            self.ensure(name)
+        except Exception:
+            pass
+
+    def load_all(self, parallel: bool = False):
+        """Прогрев всех зарегистрированных моделей, при необходимости параллельно"""
+        names = list(self._loaders)
+        if parallel and len(names) > 1:
+            with ThreadPoolExecutor(max_workers=len(names), thread_name_prefix="model-warmup") as executor:
+                list(executor.map(self._try_ensure, names))
+        else:
+            for name in names:
+                self._try_ensure(name)
+
+    def ready(self) -> bool:
+        """Все модели загружены"""
+        return all(state["status"] == READY for state in self._states.values())
+
+    def status(self) -> Dict[str, Dict[str, Any]]:
+        """Состояние и время загрузки каждой модели"""
+        return {name: dict(state) for name, state in self._states.items()}
+
+
+model_registry = ModelRegistry()
@@ -0,0 +1,134 @@
+from nlp_server.app.config import PROCESS_BATCH_MAX_SIZE, PROCESS_BATCH_MAX_WAIT_MS
+from nlp_server.app.services.batcher import MicroBatcher
+from nlp_server.app.services.entity_extraction import extract_entities_batch
+from nlp_server.app.services.executor import nlp_executor
+from nlp_server.app.services.intent_classifier import classify_intent_batch
+from nlp_server.app.services.result_cache import CacheKeys, result_cache
+from nlp_server.app.services.spell_batch import correct_spelling_batch
+from loguru import logger
+from typing import Any, Dict, List, Optional, Tuple, Union
+import json
+
+
+# Элемент входного потока массовой обработки: (номер, текст или None, ошибка разбора)
+BulkItem = Tuple[int, Optional[str], Optional[str]]
+
+
+# Пачки для этапов /process: один predict_proba и один nlp.pipe на пачку запросов
+intent_batcher = MicroBatcher(
+    "intent", classify_intent_batch, nlp_executor, PROCESS_BATCH_MAX_SIZE, PROCESS_BATCH_MAX_WAIT_MS
+)
+entity_batcher = MicroBatcher(
+    "entities", extract_entities_batch, nlp_executor, PROCESS_BATCH_MAX_SIZE, PROCESS_BATCH_MAX_WAIT_MS
+)
+
+
+def batching_stats() -> Dict[str, Dict[str, Any]]:
+    """Фактические размеры пачек по этапам"""
+    return {
+        intent_batcher.name: intent_batcher.stats(),
+        entity_batcher.name: entity_batcher.stats()
+    }
+
+
+def parse_text_line(line: Union[str, bytes], field: str = "text") -> Tuple[Optional[str], Optional[str]]:
+    """(текст, ошибка) из строки JSONL: JSON-строка или объект с полем field"""
+    try:
+        value = json.loads(line)
+    except ValueError as e:
+        return None, f"Invalid JSON: {e}"
+    if isinstance(value, dict):
+        value = value.get(field)
+    if not isinstance(value, str):
+        return None, f"Expected a string or an object with a {field} field"
+    return value, None
+
+
+def process_texts(texts: List[str], tasks: List[str], parallel: bool = True) -> List[Dict[str, Any]]:
+    """
+    Этапы /process для пачки текстов (см. run_stages). Ответы, уже посчитанные
+    любым воркером, берутся из общего кэша result_cache, если он включён;
+    обрабатываются только остальные тексты, и их ответы попадают в кэш
+    """
+    keys = result_cache.keys(texts, tasks)
+    if keys is None:
+        return run_stages(texts, tasks, parallel)
+
+    results = [
+        {"original_text": text, **cached} if cached is not None else None
+        for text, cached in zip(texts, result_cache.get_many(keys))
+    ]
+    missing = [i for i, result in enumerate(results) if result is None]
+    if missing:
+        computed = run_stages([texts[i] for i in missing], tasks, parallel)
+        for i, result in zip(missing, computed):
+            results[i] = result
+        result_cache.put_many(CacheKeys([keys.keys[i] for i in missing], keys.versions), computed)
+    return results
+
+
+def run_stages(texts: List[str], tasks: List[str], parallel: bool = True) -> List[Dict[str, Any]]:
+    """
+    Этапы /process для пачки текстов, каждый одним пакетным вызовом: исправление
+    опечаток по уникальным словам пачки, один predict_proba и один nlp.pipe.
+    Результат каждого текста — поля ProcessTextResponse; если у текста не удалось
+    исправить опечатки, остальные этапы работают с исходным текстом, а причина
+    попадает в поле error. parallel=False отключает пулы процессов этапов —
+    для вызова из процессов, которые уже распараллелены снаружи
+    """
+    results = [
+        {
+            "original_text": text,
+            "processed_text": text,
+            "intent": "unknown",
+            "confidence": 0.0,
+            "entities": {},
+            "spellcheck_corrections": {}
+        }
+        for text in texts
+    ]
+
+    if "spellcheck" in tasks:
+        for result, spell_result in zip(results, correct_spelling_batch(texts, use_pool=parallel)):
+            if spell_result.error is not None:
+                result["error"] = spell_result.error
+                continue
+            result["processed_text"] = spell_result.corrected_text
+            result["spellcheck_corrections"] = spell_result.corrections
+
+    processed = [result["processed_text"] for result in results]
+
+    if "intent" in tasks:
+        for result, intent_result in zip(results, classify_intent_batch(processed)):
+            result["intent"] = intent_result.intent
+            result["confidence"] = intent_result.confidence
+
+    if "entities" in tasks:
+        n_process = None if parallel else 1
+        for result, entity_result in zip(results, extract_entities_batch(processed, n_process)):
+            result["entities"] = entity_result.entities
+
+    return results
+
+
+def process_items(items: List[BulkItem], tasks: List[str], parallel: bool = True) -> List[Dict[str, Any]]:
+    """
+    Обработка пачки элементов входного потока с номерами: {"index": ..., поля ответа
+    /process} или {"index": ..., "error": ...} в порядке входа. Ошибка пачки целиком
+    записывается каждому её элементу, а не прерывает обработку остальных пачек
+    """
+    valid = [(index, text) for index, text, error in items if error is None]
+    results = {}
+    failure = None
+    if valid:
+        try:
+            processed = process_texts([text for _, text in valid], tasks, parallel)
+            results = {index: result for (index, _), result in zip(valid, processed)}
+        except Exception as e:
+            logger.error(f"Error processing bulk chunk: {e}")
+            failure = str(e)
+
+    return [
+        {"index": index, **results[index]} if index in results else {"index": index, "error": error or failure}
+        for index, _, error in items
+    ]
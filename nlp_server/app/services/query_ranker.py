@@ -0,0 +1,69 @@
+from typing import Callable, Dict, Iterable, Optional, Tuple
+import pickle
+
+
+QUERY_FREQUENCY_FORMAT_VERSION = 1
+
+# Все числа в контексте считаются одним токеном, иначе биграммы с суммами не повторяются
+NUMBER_TOKEN = "<num>"
+
+
+def context_token(word: str) -> str:
+    """Токен для подсчёта биграмм: слово в нижнем регистре, числа — общий токен"""
+    return NUMBER_TOKEN if word.isdigit() else word.lower()
+
+
+class QueryRanker:
+    """
+    Ранжирование кандидатов исправления по истории запросов с откатом к более общим
+    частотам: сначала биграмма с предыдущим словом запроса, затем частота слова
+    в истории, затем частота в общем словаре и, при равенстве, алфавит.
+
+    unigrams: слово -> число принятых запросов со словом;
+    bigrams: слово -> {предыдущее слово -> число}
+    """
+
+    def __init__(self, unigrams: Dict[str, int], bigrams: Dict[str, Dict[str, int]], metadata: Optional[dict] = None):
+        self.unigrams = unigrams
+        self.bigrams = bigrams
+        self.metadata = metadata or {}
+
+    def __len__(self) -> int:
+        return len(self.unigrams)
+
+    def has_context(self, candidates: Iterable[str]) -> bool:
+        """Выбор среди кандидатов может зависеть от предыдущего слова"""
+        return any(candidate in self.bigrams for candidate in candidates)
+
+    def best(
+        self,
+        candidates: Iterable[str],
+        previous: Optional[str],
+        frequency: Callable[[str], int]
+    ) -> str:
+        """Лучший кандидат для слова после previous (None — начало фразы)"""
+        def key(candidate: str) -> Tuple[int, int, int, str]:
+            bigram = self.bigrams.get(candidate, {}).get(previous, 0) if previous else 0
+            return -bigram, -self.unigrams.get(candidate, 0), -frequency(candidate), candidate
+
+        return min(candidates, key=key)
+
+    def save(self, path: str):
+        """Сохранение артефакта частот"""
+        with open(path, "wb") as f:
+            pickle.dump({
+                "version": QUERY_FREQUENCY_FORMAT_VERSION,
+                "unigrams": self.unigrams,
+                "bigrams": self.bigrams,
+                "metadata": self.metadata
+            }, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @classmethod
+    def load(cls, path: str) -> "QueryRanker":
+        """Загрузка артефакта частот"""
+        with open(path, "rb") as f:
+            data = pickle.load(f)
+
+        if data.get("version") != QUERY_FREQUENCY_FORMAT_VERSION:
+            raise ValueError(f"Неподдерживаемая версия частот запросов: {data.get('version')}")
+        return cls(data["unigrams"], data["bigrams"], data.get("metadata"))
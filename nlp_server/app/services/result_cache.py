@@ -0,0 +1,326 @@
+from nlp_server.app.config import (
+    PROCESS_CACHE_PATH, PROCESS_CACHE_TTL, PROCESS_CACHE_MAX_ENTRIES, INTENT_MODEL_PATH,
+    SPACY_MODEL, SPACY_LOAD_MODE, ENTITY_TYPES
+)
+from nlp_server.app.services import entity_extraction, intent_classifier, spell_checker
+from nlp_server.app.services.serialization import dumps, loads
+from nlp_server.app.services.versions import model_versions
+from loguru import logger
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+
+
+# Формат записей кэша: при изменении полей ответа номер увеличивается, и прежние записи не находятся
+CACHE_FORMAT_VERSION = 2
+
+# Сколько ждать блокировку записи другого воркера, секунд; чтение в режиме WAL её не ждёт
+SQLITE_TIMEOUT = 1.0
+
+# Ключей в одном запросе SELECT ... IN (...)
+LOOKUP_CHUNK_SIZE = 500
+
+SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS process_results (
+        key BLOB PRIMARY KEY,
+        versions TEXT NOT NULL,
+        created REAL NOT NULL,
+        value BLOB NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS process_results_created ON process_results (created)"
+)
+
+
+def normalize_text(text: str) -> str:
+    """
+    Текст для ключа: Unicode NFC, чтобы одинаковые на вид тексты с разной записью
+    символов (ё одним символом и е с диакритическим знаком) давали один ключ.
+    Регистр и пробелы не меняются: processed_text ответа сохраняет их из исходного текста
+    """
+    return unicodedata.normalize("NFC", text)
+
+
+# Отпечаток версий, посчитанный для (версия словаря, версия модели намерений,
+# загружена ли модель намерений, загружена ли модель spaCy)
+_cache_versions: Tuple[Optional[Tuple[int, Optional[str], bool, bool]], str] = (None, "")
+
+
+def cache_versions() -> str:
+    """
+    Отпечаток всего, от чего зависит ответ /process: версии моделей из /health,
+    файл базовой модели намерений (её версия не меняется при пересборке файла),
+    настройки извлечения сущностей и то, какие модели реально отвечают: пока
+    модель намерений или spaCy не загружена (или не загрузилась), ответы дают
+    правила и регулярные выражения, и такие ответы не должны находиться после
+    загрузки моделей. Считается заново только после смены любого из этих состояний
+    """
+    global _cache_versions
+    current = (
+        spell_checker.dictionary_version,
+        intent_classifier.model_version,
+        intent_classifier.model is not None,
+        entity_extraction.nlp is not None
+    )
+    if _cache_versions[0] != current:
+        versions: Dict[str, Any] = model_versions()
+        if intent_classifier.model_version in (None, intent_classifier.BASE_MODEL_VERSION):
+            versions["intent_model_file"] = spell_checker.file_signature(INTENT_MODEL_PATH)
+        versions["intent_engine"] = "ml" if current[2] else "rules"
+        versions["entities"] = [SPACY_MODEL, SPACY_LOAD_MODE, sorted(ENTITY_TYPES)]
+        versions["entities_engine"] = "spacy" if current[3] else "regex"
+        versions["format"] = CACHE_FORMAT_VERSION
+        digest = hashlib.sha1(json.dumps(versions, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+        _cache_versions = (current, digest)
+    return _cache_versions[1]
+
+
+class CacheKeys:
+    """Ключи пачки текстов, посчитанные при одних версиях моделей"""
+
+    __slots__ = ("keys", "versions")
+
+    def __init__(self, keys: List[bytes], versions: str):
+        self.keys = keys
+        self.versions = versions
+
+
+class ResultCache:
+    """
+    Общий для воркеров кэш ответов /process в файле SQLite в режиме WAL: читатели
+    не ждут друг друга и писателя, а файл переживает перезапуск и выкладку.
+    Ключ — хэш нормализованного текста, набора этапов и отпечатка версий моделей,
+    поэтому после смены модели намерений или словаря прежние ответы не находятся,
+    а при очередной чистке удаляются. Ответ хранится без original_text — его
+    подставляет вызывающий.
+
+    Чистка раз в cleanup_every записей: ответы старше ttl секунд и сверх
+    max_entries самых новых. Вытесняются самые старые по порядку записи (rowid
+    растёт с каждой вставкой), а не по последнему чтению: иначе каждое попадание
+    писало бы в файл и брало блокировку записи, общую для всех воркеров. Ошибки
+    SQLite не прерывают обработку — запрос считается промахом.
+
+    Методы блокирующие: из event loop они вызываются через поток
+    (asyncio.to_thread), а файл и схема создаются при старте воркера (open),
+    чтобы первый запрос не ждал блокировку записи
+    """
+
+    def __init__(self, path: str, ttl: float, max_entries: int, cleanup_every: int = 1000):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.cleanup_every = max(1, min(cleanup_every, max_entries // 10 or 1))
+
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evicted = 0
+        self.errors = 0
+
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._schema_lock = threading.Lock()
+        self._schema_pid: Optional[int] = None
+        self._writes_since_cleanup = 0
+        self._purged_versions: Optional[str] = None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.path) and self.max_entries > 0
+
+    def _connection(self) -> sqlite3.Connection:
+        """
+        Соединение текущего потока; после fork процесс открывает свои. Режим WAL
+        и схема (им нужна блокировка записи) настраиваются один раз на процесс,
+        остальные потоки только подключаются к файлу
+        """
+        connection = getattr(self._local, "connection", None)
+        if connection is None or self._local.pid != os.getpid():
+            if self._schema_pid != os.getpid():
+                self._create_schema()
+            connection = sqlite3.connect(self.path, timeout=SQLITE_TIMEOUT, isolation_level=None)
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    def _create_schema(self):
+        with self._schema_lock:
+            if self._schema_pid == os.getpid():
+                return
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=SQLITE_TIMEOUT, isolation_level=None)
+            try:
+                connection.execute("PRAGMA journal_mode=WAL")
+                for statement in SCHEMA:
+                    connection.execute(statement)
+            finally:
+                connection.close()
+            self._schema_pid = os.getpid()
+
+    def open(self):
+        """Создание файла и схемы при старте воркера (ошибка не мешает старту — кэш будет промахиваться)"""
+        if not self.enabled:
+            return
+        try:
+            self._connection()
+            cache_versions()
+        except sqlite3.Error as e:
+            self._error("open", e)
+
+    def keys(self, texts: Sequence[str], tasks: Sequence[str]) -> Optional[CacheKeys]:
+        """Ключи текстов при текущих версиях моделей (None, если кэш выключен)"""
+        if not self.enabled:
+            return None
+        versions = cache_versions()
+        prefix = json.dumps([versions, sorted(set(tasks))]).encode("utf-8")
+        return CacheKeys(
+            [hashlib.sha1(prefix + normalize_text(text).encode("utf-8")).digest() for text in texts],
+            versions
+        )
+
+    def lookup(
+        self,
+        texts: Sequence[str],
+        tasks: Sequence[str]
+    ) -> Tuple[Optional[CacheKeys], List[Optional[Dict[str, Any]]]]:
+        """Ключи текстов и готовые ответы по ним (кэш выключен — None и одни промахи)"""
+        keys = self.keys(texts, tasks)
+        if keys is None:
+            return None, [None] * len(texts)
+        return keys, self.get_many(keys)
+
+    def get_many(self, keys: Optional[CacheKeys]) -> List[Optional[Dict[str, Any]]]:
+        """Готовые ответы по ключам (None — промах) в том же порядке"""
+        if keys is None:
+            return []
+        found: Dict[bytes, bytes] = {}
+        unique = list(dict.fromkeys(keys.keys))
+        try:
+            connection = self._connection()
+            oldest = time.time() - self.ttl
+            for start in range(0, len(unique), LOOKUP_CHUNK_SIZE):
+                chunk = unique[start:start + LOOKUP_CHUNK_SIZE]
+                rows = connection.execute(
+                    f"SELECT key, value FROM process_results WHERE key IN ({','.join('?' * len(chunk))}) AND created >= ?",
+                    (*chunk, oldest)
+                )
+                found.update(rows)
+        except sqlite3.Error as e:
+            self._error("read", e)
+
+        results = [loads(found[key]) if key in found else None for key in keys.keys]
+        hits = sum(1 for result in results if result is not None)
+        with self._lock:
+            self.hits += hits
+            self.misses += len(results) - hits
+        return results
+
+    def put_many(self, keys: Optional[CacheKeys], results: Sequence[Optional[Dict[str, Any]]]):
+        """
+        Запись ответов; ответы с ошибкой и None не кэшируются. Если версии моделей
+        сменились, пока ответы считались (например, модель загрузилась во время
+        запроса), ответы не записываются: неизвестно, какой моделью они получены
+        """
+        if keys is None or keys.versions != cache_versions():
+            return
+        now = time.time()
+        rows = {
+            key: dumps({field: value for field, value in result.items() if field != "original_text"})
+            for key, result in zip(keys.keys, results)
+            if result is not None and "error" not in result
+        }
+        if not rows:
+            return
+        try:
+            connection = self._connection()
+            with connection:
+                connection.execute("BEGIN IMMEDIATE")
+                connection.executemany(
+                    "INSERT OR REPLACE INTO process_results (key, versions, created, value) VALUES (?, ?, ?, ?)",
+                    [(key, keys.versions, now, value) for key, value in rows.items()]
+                )
+        except sqlite3.Error as e:
+            self._error("write", e)
+            return
+
+        with self._lock:
+            self.writes += len(rows)
+            self._writes_since_cleanup += len(rows)
+            due = self._writes_since_cleanup >= self.cleanup_every
+            if due:
+                self._writes_since_cleanup = 0
+        if due:
+            self.cleanup(keys.versions)
+
+    def cleanup(self, versions: Optional[str] = None) -> int:
+        """
+        Удаление просроченных ответов, ответов прежних версий моделей (один раз после
+        смены версий в этом процессе) и самых старых сверх max_entries
+        """
+        versions = versions or cache_versions()
+        deleted = 0
+        try:
+            connection = self._connection()
+            with connection:
+                connection.execute("BEGIN IMMEDIATE")
+                deleted += connection.execute(
+                    "DELETE FROM process_results WHERE created < ?", (time.time() - self.ttl,)
+                ).rowcount
+                if versions != self._purged_versions:
+                    deleted += connection.execute(
+                        "DELETE FROM process_results WHERE versions != ?", (versions,)
+                    ).rowcount
+                deleted += connection.execute(
+                    """
+                    DELETE FROM process_results WHERE rowid <= (
+                        SELECT rowid FROM process_results ORDER BY rowid DESC LIMIT 1 OFFSET ?
+                    )
+                    """,
+                    (self.max_entries,)
+                ).rowcount
+            self._purged_versions = versions
+        except sqlite3.Error as e:
+            self._error("cleanup", e)
+            return 0
+
+        with self._lock:
+            self.evicted += deleted
+        return deleted
+
+    def _error(self, operation: str, error: Exception):
+        with self._lock:
+            self.errors += 1
+        logger.warning(f"Process result cache {operation} failed: {error}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Попадания и промахи этого воркера и размер общего кэша"""
+        lookups = self.hits + self.misses
+        stats: Dict[str, Any] = {
+            "enabled": self.enabled,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "writes": self.writes,
+            "evicted": self.evicted,
+            "errors": self.errors
+        }
+        if self.enabled:
+            try:
+                stats["entries"] = self._connection().execute("SELECT COUNT(*) FROM process_results").fetchone()[0]
+                stats["versions"] = cache_versions()
+            except sqlite3.Error as e:
+                self._error("stats", e)
+            stats.update({"max_entries": self.max_entries, "ttl": self.ttl})
+        return stats
+
+
+result_cache = ResultCache(PROCESS_CACHE_PATH, PROCESS_CACHE_TTL, PROCESS_CACHE_MAX_ENTRIES)
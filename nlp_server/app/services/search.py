@@ -0,0 +1,269 @@
+from contextlib import contextmanager
+from nlp_server.app.config import (
+    DATABASE_URL, SEARCH_INDEX_PATH, SEARCH_CORPUS_PATH, SEARCH_STEM_LENGTH, SEARCH_SEGMENT_SIZE,
+    SEARCH_MAX_SEGMENTS, SEARCH_SUM_TOLERANCE
+)
+from nlp_server.app.models.process_text_model import PROCESS_TASKS
+from nlp_server.app.schemas.procurement_record import ProcurementRecord
+from nlp_server.app.services.db import SessionLocal, database_enabled, init_db
+from nlp_server.app.services.model_registry import model_registry
+from nlp_server.app.services.pipeline import process_texts
+from nlp_server.app.services.search_index import SEARCH_FORMAT_VERSION, SearchIndex, Vocabulary, read_manifest
+from nlp_server.app.services.spell_checker import file_signature
+from loguru import logger
+from sqlalchemy import select
+from typing import Any, Callable, Dict, Iterator, List, Optional
+import asyncio
+import fcntl
+import hashlib
+import json
+import os
+import threading
+
+
+def read_jsonl_documents(path: str, chunk_size: int) -> Iterator[List[Dict[str, Any]]]:
+    """Записи корпуса JSONL пачками (объекты с полями title, description, category, amount, id)"""
+    chunk = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if record.get("id") is not None:
+                record["id"] = str(record["id"])
+            chunk.append(record)
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+    if chunk:
+        yield chunk
+
+
+def stream_database_documents(session_factory: Callable, after_id: int, chunk_size: int) -> Iterator[List[Dict[str, Any]]]:
+    """Строки procurement_records с id больше after_id пачками, по возрастанию id"""
+    with session_factory() as session:
+        query = (
+            select(
+                ProcurementRecord.id, ProcurementRecord.title, ProcurementRecord.description,
+                ProcurementRecord.category, ProcurementRecord.amount
+            )
+            .where(ProcurementRecord.id > after_id)
+            .order_by(ProcurementRecord.id)
+        )
+        result = session.execute(query.execution_options(yield_per=chunk_size))
+        for rows in result.partitions():
+            yield [
+                {"id": str(row.id), "title": row.title, "description": row.description,
+                 "category": row.category, "amount": row.amount, "source_id": row.id}
+                for row in rows
+            ]
+
+
+def _add_database_documents(index: SearchIndex) -> SearchIndex:
+    """Дозагрузка новых строк procurement_records в индекс"""
+    if not database_enabled():
+        return index
+    for chunk in stream_database_documents(SessionLocal, index.source_position, SEARCH_SEGMENT_SIZE):
+        index = index.add_documents(chunk, source_position=chunk[-1]["source_id"])
+    return index
+
+
+def index_source(corpus_path: str = SEARCH_CORPUS_PATH) -> Dict[str, Any]:
+    """
+    Подпись источников индекса: файл корпуса (путь, размер, время изменения),
+    обрезка слов и БД (хэш DATABASE_URL, чтобы пароль не попал в снимок)
+    """
+    return {
+        "corpus": file_signature(corpus_path),
+        "stem_length": SEARCH_STEM_LENGTH,
+        "database": hashlib.sha1(DATABASE_URL.encode("utf-8")).hexdigest()[:12] if DATABASE_URL else None
+    }
+
+
+def build_search_index(corpus_path: str = SEARCH_CORPUS_PATH) -> SearchIndex:
+    """Сборка индекса из корпуса JSONL и таблицы procurement_records"""
+    index = SearchIndex(
+        Vocabulary(), stem_length=SEARCH_STEM_LENGTH, max_segments=SEARCH_MAX_SEGMENTS,
+        source=index_source(corpus_path)
+    )
+    if corpus_path:
+        for chunk in read_jsonl_documents(corpus_path, SEARCH_SEGMENT_SIZE):
+            index = index.add_documents(chunk)
+    if database_enabled():
+        init_db()
+        index = _add_database_documents(index)
+    return index.optimize()
+
+
+@contextmanager
+def _snapshot_lock(exclusive: bool):
+    """
+    Блокировка каталога снимка между воркерами: запись снимка — исключительная,
+    открытие — разделяемая (чтобы не открыть сегменты, удаляемые после слияния)
+    """
+    os.makedirs(SEARCH_INDEX_PATH, exist_ok=True)
+    with open(os.path.join(SEARCH_INDEX_PATH, ".lock"), "a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _snapshot_changed(index: SearchIndex) -> bool:
+    """Снимок на диске записан другим воркером после того, как этот открыл свой"""
+    manifest = read_manifest(SEARCH_INDEX_PATH)
+    if manifest is None:
+        return False
+    return [item["name"] for item in manifest["segments"]] != [segment.name for segment in index.segments]
+
+
+# Индекс загружается при прогреве моделей; изменения подменяют объект целиком,
+# поэтому идущий поиск дорабатывает по прежнему индексу
+search_index: Optional[SearchIndex] = None
+_search_lock = threading.Lock()
+
+
+def load_search_index() -> SearchIndex:
+    """
+    Снимок SEARCH_INDEX_PATH, если он собран из тех же источников; иначе (снимка
+    нет, другой корпус, обрезка слов или БД, прежний формат) — сборка из
+    источников и запись снимка. Записи, добавленные через API, при пересборке
+    не сохраняются
+    """
+    if not SEARCH_INDEX_PATH:
+        return build_search_index(SEARCH_CORPUS_PATH)
+
+    with _snapshot_lock(exclusive=True):
+        manifest = read_manifest(SEARCH_INDEX_PATH)
+        if manifest is not None:
+            if manifest.get("version") == SEARCH_FORMAT_VERSION and manifest.get("source") == index_source(SEARCH_CORPUS_PATH):
+                return SearchIndex.open(SEARCH_INDEX_PATH, SEARCH_MAX_SEGMENTS)
+            logger.info(f"Search index snapshot {SEARCH_INDEX_PATH} is out of date with its sources, rebuilding")
+        index = build_search_index(SEARCH_CORPUS_PATH)
+        index.save(SEARCH_INDEX_PATH)
+        return index
+
+
+def init_search_index() -> Optional[str]:
+    """Загрузка поискового индекса (вызывается реестром моделей)"""
+    global search_index
+    with _search_lock:
+        if search_index is None:
+            search_index = load_search_index()
+    return f"{len(search_index)} documents, {len(search_index.segments)} segments"
+
+
+model_registry.register("search_index", init_search_index)
+
+
+def get_search_index() -> SearchIndex:
+    """Поисковый индекс; загружается при первом обращении"""
+    if search_index is None:
+        model_registry.ensure("search_index")
+    return search_index
+
+
+def _update_index(change: Callable[[SearchIndex], SearchIndex]) -> SearchIndex:
+    """
+    Изменение индекса: под блокировкой снимка сначала подхватывается снимок
+    другого воркера, затем применяется change и записывается новый снимок
+    """
+    global search_index
+    get_search_index()
+    with _search_lock:
+        if not SEARCH_INDEX_PATH:
+            search_index = change(search_index)
+            return search_index
+
+        with _snapshot_lock(exclusive=True):
+            index = search_index
+            if _snapshot_changed(index):
+                index = SearchIndex.open(SEARCH_INDEX_PATH, SEARCH_MAX_SEGMENTS)
+            updated = change(index)
+            if updated is not index or updated.segments != index.segments:
+                updated.save(SEARCH_INDEX_PATH)
+            search_index = updated
+            return updated
+
+
+def add_search_documents(documents: List[Dict[str, Any]]) -> Dict[str, int]:
+    """Добавление записей в индекс (видны в поиске сразу, в других воркерах — после обновления)"""
+    index = _update_index(lambda index: index.add_documents(documents))
+    return {"added": len(documents), "documents": len(index), "segments": len(index.segments)}
+
+
+def refresh_search_index() -> Dict[str, int]:
+    """Подхват снимка, записанного другим воркером, и новых строк procurement_records"""
+    global search_index
+    before = len(get_search_index())
+
+    if SEARCH_INDEX_PATH and _snapshot_changed(search_index):
+        with _search_lock, _snapshot_lock(exclusive=False):
+            search_index = SearchIndex.open(SEARCH_INDEX_PATH, SEARCH_MAX_SEGMENTS)
+
+    index = _update_index(_add_database_documents) if database_enabled() else search_index
+    return {"documents": len(index), "new": len(index) - before, "segments": len(index.segments)}
+
+
+async def refresh_periodically(interval: float):
+    """Фоновое обновление индекса каждые interval секунд"""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            changes = await asyncio.to_thread(refresh_search_index)
+            if changes["new"]:
+                logger.info(f"Search index updated: {changes}")
+        except Exception as e:
+            logger.error(f"Search index refresh failed: {e}")
+
+
+def search_filters(entities: Dict[str, Any], tolerance: float = SEARCH_SUM_TOLERANCE) -> Dict[str, Any]:
+    """Фильтры из сущностей запроса: сумма ± tolerance и товар"""
+    filters: Dict[str, Any] = {}
+    amount = entities.get("sum")
+    if isinstance(amount, (int, float)) and amount > 0:
+        filters["min_amount"] = amount * (1 - tolerance)
+        filters["max_amount"] = amount * (1 + tolerance)
+    product = entities.get("product")
+    if isinstance(product, str) and product:
+        filters["product"] = product
+    return filters
+
+
+def search_query(
+    query: str,
+    limit: int = 10,
+    offset: int = 0,
+    filters: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """
+    Поиск по запросу на естественном языке: запрос проходит конвейер /process
+    (исправление опечаток, намерение, сущности), BM25 считается по исправленному
+    тексту, а сумма и товар из сущностей становятся фильтрами; явно переданные
+    filters заменяют найденные в запросе
+    """
+    index = get_search_index()
+    processed = process_texts([query], PROCESS_TASKS)[0]
+
+    applied = search_filters(processed["entities"])
+    applied.update({key: value for key, value in (filters or {}).items() if value is not None})
+
+    product = applied.get("product")
+    results, total = index.search(
+        processed["processed_text"],
+        limit,
+        offset,
+        applied.get("min_amount"),
+        applied.get("max_amount"),
+        [product] if product else ()
+    )
+    return {
+        "query": query,
+        "processed_text": processed["processed_text"],
+        "intent": processed["intent"],
+        "entities": processed["entities"],
+        "filters": applied,
+        "total": total,
+        "results": results
+    }
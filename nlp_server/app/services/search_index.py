@@ -0,0 +1,529 @@
+from collections import Counter
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+import json
+import math
+import numpy as np
+import os
+import pickle
+import re
+import shutil
+import uuid
+
+
+SEARCH_FORMAT_VERSION = 2
+
+MANIFEST_NAME = "manifest.json"
+VOCABULARY_NAME = "vocabulary.pkl"
+
+# Служебные слова запросов и записей, не влияющие на релевантность
+STOP_WORDS = frozenset([
+    "на", "по", "для", "за", "из", "от", "до", "при", "без", "под", "над", "об", "о", "в", "во",
+    "и", "или", "а", "но", "не", "с", "со", "к", "ко", "у", "что", "как", "это", "все", "мне"
+])
+
+_WORD_PATTERN = re.compile(r"\w+")
+
+# Поля документа, которые индексируются и возвращаются в результатах
+DOCUMENT_FIELDS = ("id", "title", "description", "category", "amount")
+
+# Массивы сегмента: имя -> тип элементов
+SEGMENT_ARRAYS = {
+    "term_offsets": np.uint64,
+    "postings": np.uint32,
+    "frequencies": np.uint16,
+    "lengths": np.uint32,
+    "amounts": np.float64,
+    "stored_blob": np.uint8,
+    "stored_offsets": np.uint64,
+}
+
+
+# Окончания для стемминга (алгоритм Snowball для русского языка); отбрасываются
+# только внутри RV — части слова после первой гласной. Группы «(?<=[ая])...»
+# отбрасываются только после а или я
+_VOWELS = "аеиоуыэюя"
+_PERFECTIVE_GERUND = re.compile(r"(?:ившись|ывшись|ивши|ывши|ив|ыв|(?<=[ая])(?:вшись|вши|в))$")
+_REFLEXIVE = re.compile(r"(?:ся|сь)$")
+_ADJECTIVE = re.compile(
+    r"(?:ими|ыми|его|ого|ему|ому|ее|ие|ые|ое|ей|ий|ый|ой|ем|им|ым|ом|их|ых|ую|юю|ая|яя|ою|ею)$"
+)
+_PARTICIPLE = re.compile(r"(?:ивш|ывш|ующ|(?<=[ая])(?:ем|нн|вш|ющ|щ))$")
+_VERB = re.compile(
+    r"(?:ейте|уйте|ила|ыла|ена|ите|или|ыли|ило|ыло|ено|ует|уют|ены|ить|ыть|ишь|ей|уй|ил|ыл|им|ым|ен|ят|ит|ыт|ую|ю"
+    r"|(?<=[ая])(?:ете|йте|ешь|нно|ла|на|ли|ем|ло|но|ет|ют|ны|ть|й|л|н))$"
+)
+_NOUN = re.compile(
+    r"(?:иями|ями|ами|иях|ией|иям|ием|ев|ов|ие|ье|еи|ии|ей|ой|ий|ям|ем|ам|ом|ах|ях|ию|ью|ия|ья"
+    r"|а|е|и|й|о|у|ы|ь|ю|я)$"
+)
+_SUPERLATIVE = re.compile(r"(?:ейше|ейш)$")
+_DERIVATIONAL = re.compile(r"(?:ость|ост)$")
+
+
+def _strip(pattern: "re.Pattern[str]", word: str, start: int) -> str:
+    """Слово без окончания pattern, если окончание целиком лежит не левее start"""
+    match = pattern.search(word, start)
+    return word[:match.start()] if match else word
+
+
+def _region(word: str, start: int) -> int:
+    """Начало области после первой пары «гласная, согласная» начиная с start (R1/R2 Snowball)"""
+    for i in range(start + 1, len(word)):
+        if word[i] not in _VOWELS and word[i - 1] in _VOWELS:
+            return i + 1
+    return len(word)
+
+
+@lru_cache(maxsize=200000)
+def stem(word: str) -> str:
+    """
+    Основа русского слова в нижнем регистре: отбрасываются окончания деепричастий,
+    возвратные, прилагательных и причастий, глаголов или существительных, затем
+    конечная «и», словообразовательное «ость», превосходная степень и «нн»/«ь»
+    (алгоритм Snowball), так что «бумага», «бумаги» и «бумагой» дают «бумаг»,
+    а «офисная» и «офисной» — «офисн»
+    """
+    rv = next((i + 1 for i, letter in enumerate(word) if letter in _VOWELS), len(word))
+    if rv >= len(word):
+        return word
+
+    stemmed = _strip(_PERFECTIVE_GERUND, word, rv)
+    if stemmed == word:
+        word = _strip(_REFLEXIVE, word, rv)
+        stemmed = _strip(_ADJECTIVE, word, rv)
+        if stemmed != word:
+            stemmed = _strip(_PARTICIPLE, stemmed, rv)
+        else:
+            stemmed = _strip(_VERB, word, rv)
+            if stemmed == word:
+                stemmed = _strip(_NOUN, word, rv)
+    word = stemmed
+
+    if word.endswith("и") and len(word) - 1 >= rv:
+        word = word[:-1]
+
+    if _DERIVATIONAL.search(word, _region(word, _region(word, 0))):
+        word = _strip(_DERIVATIONAL, word, 0)
+
+    if word.endswith("ь") and len(word) - 1 >= rv:
+        return word[:-1]
+    word = _strip(_SUPERLATIVE, word, rv)
+    if word.endswith("нн") and len(word) - 2 >= rv:
+        word = word[:-1]
+    return word
+
+
+def analyze(text: str, stem_length: int) -> List[str]:
+    """
+    Термины текста: слова в нижнем регистре без служебных слов и чисел (суммы
+    ищутся фильтром), приведённые к основе stem и обрезанные до stem_length
+    символов, чтобы совпадали и формы с чередованием в основе (0 — без обрезки)
+    """
+    terms = []
+    for word in _WORD_PATTERN.findall(text.lower().replace("ё", "е")):
+        if len(word) < 2 or word.isdigit() or word in STOP_WORDS:
+            continue
+        word = stem(word)
+        terms.append(word[:stem_length] if stem_length else word)
+    return terms
+
+
+def document_text(document: Dict[str, Any]) -> str:
+    """Индексируемый текст записи: название, описание и категория"""
+    return " ".join(str(document.get(field) or "") for field in ("title", "description", "category"))
+
+
+def _amount(value: Any) -> float:
+    try:
+        return float(value) if value is not None else math.nan
+    except (TypeError, ValueError):
+        return math.nan
+
+
+class Vocabulary:
+    """
+    Словарь терминов индекса: термин -> номер. Только пополняется, поэтому
+    номера терминов одинаковы во всех сегментах и сохранённых снимках
+    """
+
+    def __init__(self, terms: Sequence[str] = ()):
+        self.terms: List[str] = list(terms)
+        self.ids: Dict[str, int] = {term: term_id for term_id, term in enumerate(self.terms)}
+
+    def __len__(self) -> int:
+        return len(self.terms)
+
+    def get(self, term: str) -> int:
+        return self.ids.get(term, -1)
+
+    def add(self, term: str) -> int:
+        term_id = self.ids.get(term)
+        if term_id is None:
+            term_id = len(self.terms)
+            self.terms.append(term)
+            self.ids[term] = term_id
+        return term_id
+
+
+class Segment:
+    """
+    Неизменяемая часть индекса: документы с номерами base..base+size-1.
+    Списки вхождений всех терминов лежат подряд в одном массиве uint32 (номера
+    документов внутри сегмента по возрастанию) с массивом частот uint16 и
+    смещениями по номеру термина, как CSR-матрица «термин x документ». Длины
+    документов, суммы и сохранённые поля (JSON одним блоком со смещениями) —
+    тоже массивы, поэтому сегмент из снимка открывается через mmap без разбора
+    """
+
+    def __init__(self, name: str, base: int, arrays: Dict[str, np.ndarray]):
+        self.name = name
+        self.base = base
+        self.term_offsets = arrays["term_offsets"]
+        self.postings = arrays["postings"]
+        self.frequencies = arrays["frequencies"]
+        self.lengths = arrays["lengths"]
+        self.amounts = arrays["amounts"]
+        self.stored_blob = arrays["stored_blob"]
+        self.stored_offsets = arrays["stored_offsets"]
+        self.size = len(self.lengths)
+        self.total_length = int(self.lengths.sum(dtype=np.uint64))
+
+    @classmethod
+    def build(
+        cls,
+        base: int,
+        documents: Sequence[Dict[str, Any]],
+        vocabulary: Vocabulary,
+        stem_length: int
+    ) -> "Segment":
+        """Сегмент из пачки документов; новые термины добавляются в словарь"""
+        term_ids: List[int] = []
+        local_ids: List[int] = []
+        counts: List[int] = []
+        lengths = np.zeros(len(documents), dtype=np.uint32)
+        stored: List[bytes] = []
+
+        for local_id, document in enumerate(documents):
+            terms = analyze(document_text(document), stem_length)
+            lengths[local_id] = len(terms)
+            for term, count in Counter(terms).items():
+                term_ids.append(vocabulary.add(term))
+                local_ids.append(local_id)
+                counts.append(count)
+            stored.append(json.dumps(
+                {field: document.get(field) for field in DOCUMENT_FIELDS}, ensure_ascii=False
+            ).encode("utf-8"))
+
+        term_array = np.array(term_ids, dtype=np.int64)
+        # Устойчивая сортировка по термину сохраняет возрастание номеров документов
+        order = np.argsort(term_array, kind="stable")
+        term_offsets = np.zeros(len(vocabulary) + 1, dtype=np.uint64)
+        np.cumsum(np.bincount(term_array, minlength=len(vocabulary)), out=term_offsets[1:])
+
+        stored_offsets = np.zeros(len(stored) + 1, dtype=np.uint64)
+        np.cumsum([len(item) for item in stored], out=stored_offsets[1:])
+
+        return cls(uuid.uuid4().hex[:12], base, {
+            "term_offsets": term_offsets,
+            "postings": np.array(local_ids, dtype=np.uint32)[order],
+            "frequencies": np.minimum(np.array(counts, dtype=np.int64), np.iinfo(np.uint16).max).astype(np.uint16)[order],
+            "lengths": lengths,
+            "amounts": np.array([_amount(document.get("amount")) for document in documents], dtype=np.float64),
+            "stored_blob": np.frombuffer(b"".join(stored), dtype=np.uint8),
+            "stored_offsets": stored_offsets,
+        })
+
+    @classmethod
+    def merge(cls, segments: Sequence["Segment"]) -> "Segment":
+        """Слияние соседних сегментов в один (номера документов остаются прежними)"""
+        base = segments[0].base
+        vocabulary_size = max(len(segment.term_offsets) - 1 for segment in segments)
+
+        term_ids, postings, frequencies = [], [], []
+        for segment in segments:
+            counts = np.diff(segment.term_offsets.astype(np.int64))
+            term_ids.append(np.repeat(np.arange(len(counts), dtype=np.int64), counts))
+            postings.append(segment.postings.astype(np.uint32) + np.uint32(segment.base - base))
+            frequencies.append(segment.frequencies)
+
+        term_array = np.concatenate(term_ids)
+        order = np.argsort(term_array, kind="stable")
+        term_offsets = np.zeros(vocabulary_size + 1, dtype=np.uint64)
+        np.cumsum(np.bincount(term_array, minlength=vocabulary_size), out=term_offsets[1:])
+
+        stored_offsets = [np.zeros(1, dtype=np.uint64)]
+        shift = 0
+        for segment in segments:
+            stored_offsets.append(segment.stored_offsets[1:] + np.uint64(shift))
+            shift += int(segment.stored_offsets[-1])
+
+        return cls(uuid.uuid4().hex[:12], base, {
+            "term_offsets": term_offsets,
+            "postings": np.concatenate(postings)[order],
+            "frequencies": np.concatenate(frequencies)[order],
+            "lengths": np.concatenate([segment.lengths for segment in segments]),
+            "amounts": np.concatenate([segment.amounts for segment in segments]),
+            "stored_blob": np.concatenate([segment.stored_blob for segment in segments]),
+            "stored_offsets": np.concatenate(stored_offsets),
+        })
+
+    def term_postings(self, term_id: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Документы (номера внутри сегмента) и частоты термина"""
+        if term_id + 1 >= len(self.term_offsets):
+            return self.postings[:0], self.frequencies[:0]
+        start = int(self.term_offsets[term_id])
+        end = int(self.term_offsets[term_id + 1])
+        return self.postings[start:end], self.frequencies[start:end]
+
+    def document(self, local_id: int) -> Dict[str, Any]:
+        """Сохранённые поля документа"""
+        start = int(self.stored_offsets[local_id])
+        end = int(self.stored_offsets[local_id + 1])
+        return json.loads(self.stored_blob[start:end].tobytes())
+
+    def save(self, directory: str):
+        """Запись массивов сегмента в каталог (через временный каталог и переименование)"""
+        path = os.path.join(directory, f"segment-{self.name}")
+        if os.path.exists(path):
+            return
+        tmp_path = f"{path}.tmp"
+        os.makedirs(tmp_path, exist_ok=True)
+        for name in SEGMENT_ARRAYS:
+            np.save(os.path.join(tmp_path, f"{name}.npy"), getattr(self, name))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def open(cls, directory: str, name: str, base: int) -> "Segment":
+        """Сегмент снимка: массивы отображаются в память только для чтения"""
+        path = os.path.join(directory, f"segment-{name}")
+        arrays = {
+            array: np.load(os.path.join(path, f"{array}.npy"), mmap_mode="r")
+            for array in SEGMENT_ARRAYS
+        }
+        return cls(name, base, arrays)
+
+
+class SearchIndex:
+    """
+    Инвертированный индекс записей о закупках с ранжированием BM25. Состоит из
+    неизменяемых сегментов; добавление документов строит новый сегмент и
+    возвращает новый объект индекса (прежний остаётся целым, поэтому поиск
+    не блокируется добавлением). Когда сегментов больше max_segments, два
+    соседних с наименьшим суммарным размером сливаются. Статистика BM25 (число
+    документов, средняя длина, документная частота термина) — по всему индексу
+    """
+
+    def __init__(
+        self,
+        vocabulary: Vocabulary,
+        segments: Sequence[Segment] = (),
+        stem_length: int = 6,
+        max_segments: int = 8,
+        k1: float = 1.2,
+        b: float = 0.75,
+        source_position: int = 0,
+        source: Optional[Dict[str, Any]] = None
+    ):
+        self.vocabulary = vocabulary
+        self.segments: Tuple[Segment, ...] = tuple(segments)
+        self.stem_length = stem_length
+        self.max_segments = max_segments
+        self.k1 = k1
+        self.b = b
+        # Последняя проиндексированная строка источника (id в таблице), для дозагрузки
+        self.source_position = source_position
+        # Подпись источников, из которых собран индекс (см. search.index_source)
+        self.source = source
+        self.documents = sum(segment.size for segment in self.segments)
+        self.total_length = sum(segment.total_length for segment in self.segments)
+
+    def __len__(self) -> int:
+        return self.documents
+
+    def _with_segments(self, segments: List[Segment], source_position: int) -> "SearchIndex":
+        return SearchIndex(
+            self.vocabulary, segments, self.stem_length, self.max_segments, self.k1, self.b, source_position,
+            self.source
+        )
+
+    def add_documents(self, documents: Sequence[Dict[str, Any]], source_position: Optional[int] = None) -> "SearchIndex":
+        """Новый индекс с добавленными документами"""
+        if source_position is None:
+            source_position = self.source_position
+        if not documents:
+            return self._with_segments(list(self.segments), source_position)
+
+        segments = list(self.segments)
+        segments.append(Segment.build(self.documents, documents, self.vocabulary, self.stem_length))
+        while len(segments) > self.max_segments:
+            sizes = [segments[i].size + segments[i + 1].size for i in range(len(segments) - 1)]
+            i = sizes.index(min(sizes))
+            segments[i:i + 2] = [Segment.merge(segments[i:i + 2])]
+        return self._with_segments(segments, source_position)
+
+    def optimize(self) -> "SearchIndex":
+        """Слияние всех сегментов в один"""
+        if len(self.segments) <= 1:
+            return self
+        return self._with_segments([Segment.merge(self.segments)], self.source_position)
+
+    def _idf(self, term_id: int) -> float:
+        frequency = sum(len(segment.term_postings(term_id)[0]) for segment in self.segments)
+        if not frequency:
+            return 0.0
+        return math.log(1 + (self.documents - frequency + 0.5) / (frequency + 0.5))
+
+    def search(
+        self,
+        text: str,
+        limit: int = 10,
+        offset: int = 0,
+        min_amount: Optional[float] = None,
+        max_amount: Optional[float] = None,
+        any_terms: Iterable[str] = ()
+    ) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        Лучшие по BM25 документы для текста запроса и общее число подходящих.
+        Фильтры: сумма в [min_amount, max_amount] и хотя бы один термин из
+        any_terms (текст, например название товара). Если в запросе нет известных
+        индексу терминов, но есть фильтры, возвращаются новые документы, прошедшие их
+        """
+        if not self.documents:
+            return [], 0
+
+        query_terms = []
+        for term, count in Counter(analyze(text, self.stem_length)).items():
+            term_id = self.vocabulary.get(term)
+            if term_id >= 0:
+                idf = self._idf(term_id)
+                if idf > 0:
+                    query_terms.append((term_id, idf * count))
+
+        filter_terms = {self.vocabulary.get(term) for term in analyze(" ".join(any_terms), self.stem_length)}
+        filter_terms.discard(-1)
+        amount_filter = min_amount is not None or max_amount is not None
+        if not query_terms and not filter_terms and not amount_filter:
+            return [], 0
+
+        average_length = self.total_length / self.documents
+        wanted = offset + limit
+        total = 0
+        best: List[Tuple[float, int, Segment, int]] = []
+
+        for segment in self.segments:
+            if query_terms:
+                scores = np.zeros(segment.size, dtype=np.float32)
+                for term_id, weight in query_terms:
+                    docs, frequencies = segment.term_postings(term_id)
+                    if not len(docs):
+                        continue
+                    tf = frequencies.astype(np.float32)
+                    norm = self.k1 * (1 - self.b + self.b * segment.lengths[docs] / average_length)
+                    scores[docs] += weight * tf * (self.k1 + 1) / (tf + norm)
+                candidates = np.flatnonzero(scores)
+            else:
+                scores = None
+                candidates = np.arange(segment.size)
+
+            if filter_terms and len(candidates):
+                allowed = np.zeros(segment.size, dtype=bool)
+                for term_id in filter_terms:
+                    allowed[segment.term_postings(term_id)[0]] = True
+                candidates = candidates[allowed[candidates]]
+
+            if amount_filter and len(candidates):
+                amounts = segment.amounts[candidates]
+                mask = ~np.isnan(amounts)
+                if min_amount is not None:
+                    mask &= amounts >= min_amount
+                if max_amount is not None:
+                    mask &= amounts <= max_amount
+                candidates = candidates[mask]
+
+            total += len(candidates)
+            if not len(candidates):
+                continue
+
+            # Лучшие wanted документов сегмента; при равной оценке новые выше
+            if scores is None:
+                candidates = candidates[-wanted:]
+                candidate_scores = np.zeros(len(candidates), dtype=np.float32)
+            else:
+                candidate_scores = scores[candidates]
+                if len(candidates) > wanted:
+                    top = np.argpartition(-candidate_scores, wanted - 1)[:wanted]
+                    candidates, candidate_scores = candidates[top], candidate_scores[top]
+            best.extend(
+                (float(score), segment.base + int(local_id), segment, int(local_id))
+                for score, local_id in zip(candidate_scores.tolist(), candidates.tolist())
+            )
+
+        best.sort(key=lambda item: (-item[0], -item[1]))
+        results = []
+        for score, _, segment, local_id in best[offset:wanted]:
+            document = segment.document(local_id)
+            document["score"] = round(score, 4)
+            results.append(document)
+        return results, total
+
+    def save(self, directory: str):
+        """
+        Снимок индекса в каталог: сегменты, которых там ещё нет, словарь и описание
+        (manifest.json). Описание пишется последним через временный файл, поэтому
+        читатель видит либо прежний снимок, либо новый целиком; файлы сегментов,
+        выпавших из описания после слияний, удаляются
+        """
+        os.makedirs(directory, exist_ok=True)
+        for segment in self.segments:
+            segment.save(directory)
+
+        vocabulary_path = os.path.join(directory, VOCABULARY_NAME)
+        with open(f"{vocabulary_path}.tmp", "wb") as f:
+            pickle.dump(self.vocabulary.terms, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(f"{vocabulary_path}.tmp", vocabulary_path)
+
+        manifest = {
+            "version": SEARCH_FORMAT_VERSION,
+            "stem_length": self.stem_length,
+            "k1": self.k1,
+            "b": self.b,
+            "documents": self.documents,
+            "source_position": self.source_position,
+            "source": self.source,
+            "segments": [{"name": segment.name, "base": segment.base} for segment in self.segments]
+        }
+        manifest_path = os.path.join(directory, MANIFEST_NAME)
+        with open(f"{manifest_path}.tmp", "w", encoding="utf-8") as f:
+            json.dump(manifest, f)
+        os.replace(f"{manifest_path}.tmp", manifest_path)
+
+        live = {f"segment-{segment.name}" for segment in self.segments}
+        for entry in os.listdir(directory):
+            if entry.startswith("segment-") and entry not in live:
+                shutil.rmtree(os.path.join(directory, entry), ignore_errors=True)
+
+    @classmethod
+    def open(cls, directory: str, max_segments: int = 8) -> "SearchIndex":
+        """Открытие снимка: словарь читается целиком, сегменты отображаются в память"""
+        with open(os.path.join(directory, MANIFEST_NAME), encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest.get("version") != SEARCH_FORMAT_VERSION:
+            raise ValueError(f"Неподдерживаемая версия поискового индекса: {manifest.get('version')}")
+
+        with open(os.path.join(directory, VOCABULARY_NAME), "rb") as f:
+            vocabulary = Vocabulary(pickle.load(f))
+        segments = [Segment.open(directory, item["name"], item["base"]) for item in manifest["segments"]]
+        return cls(
+            vocabulary, segments, manifest["stem_length"], max_segments,
+            manifest["k1"], manifest["b"], manifest["source_position"], manifest.get("source")
+        )
+
+
+def read_manifest(directory: str) -> Optional[Dict[str, Any]]:
+    """Описание снимка или None, если снимка нет"""
+    path = os.path.join(directory, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
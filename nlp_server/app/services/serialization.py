@@ -0,0 +1,47 @@
+from dataclasses import is_dataclass
+from fastapi.responses import Response
+from typing import Any
+import json
+import numpy as np
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _default(value: Any) -> Any:
+    """Типы, которые json не сериализует сам: внутренние результаты и числа numpy"""
+    if is_dataclass(value):
+        return {name: getattr(value, name) for name in value.__slots__}
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(value: Any) -> bytes:
+    """
+    JSON в UTF-8 одним проходом: словари, списки, внутренние результаты
+    (dataclass) и числа numpy. С установленным orjson — через него, иначе json
+    """
+    if orjson is not None:
+        return orjson.dumps(value, default=_default, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"), default=_default).encode("utf-8")
+
+
+def loads(data: Any) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+class FastJSONResponse(Response):
+    """
+    Ответ, сериализованный dumps без проверки по response_model: роутер возвращает
+    его сам, поэтому FastAPI не перестраивает ответ через Pydantic, а response_model
+    эндпоинта остаётся только описанием ответа в OpenAPI
+    """
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
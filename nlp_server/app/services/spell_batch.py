@@ -0,0 +1,164 @@
+from concurrent.futures import ProcessPoolExecutor
+from nlp_server.app.config import SPELL_BATCH_WORKERS, SPELL_BATCH_MIN_WORDS, SPELL_BATCH_CHUNK_SIZE
+from nlp_server.app.models.results import SpellResult
+from nlp_server.app.services import spell_checker
+from typing import Dict, List, Optional, Tuple, Union
+import multiprocessing
+import threading
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_version = 0
+_pool_lock = threading.Lock()
+
+
+Choice = Union[None, str, Tuple[str, ...]]
+
+
+def _correct_chunk(words: List[str], dictionary=None) -> List[Tuple[Choice, Optional[str]]]:
+    """
+    Исправление пачки слов (в процессе пула или на месте): (выбор исправления, ошибка)
+    для каждого слова; окончательный выбор с учётом контекста делается при сборке текста
+    """
+    results = []
+    for word in words:
+        try:
+            results.append((spell_checker.lookup_choice(word, dictionary), None))
+        except Exception as e:
+            results.append((None, str(e)))
+    return results
+
+
+def get_spell_pool() -> Optional[ProcessPoolExecutor]:
+    """
+    Пул процессов для массовой проверки. Процессы создаются через fork и разделяют
+    загруженный индекс copy-on-write; после изменения словаря пул пересоздаётся
+    """
+    global _pool, _pool_version
+    if SPELL_BATCH_WORKERS <= 0:
+        return None
+
+    with _pool_lock:
+        if _pool is not None and _pool_version != spell_checker.dictionary_version:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+        if _pool is None:
+            # Индекс загружается до fork, чтобы процессы разделяли его copy-on-write
+            spell_checker.get_spell_index()
+            methods = multiprocessing.get_all_start_methods()
+            context = multiprocessing.get_context("fork" if "fork" in methods else None)
+            _pool = ProcessPoolExecutor(max_workers=SPELL_BATCH_WORKERS, mp_context=context)
+            _pool_version = spell_checker.dictionary_version
+        return _pool
+
+
+def shutdown_spell_pool():
+    """Остановка пула процессов (при завершении сервиса)"""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=True, cancel_futures=True)
+            _pool = None
+
+
+def _resolve_words(
+    words: List[str],
+    dictionary,
+    generation: int,
+    use_pool: bool = True
+) -> Tuple[Dict[str, Choice], Dict[str, str]]:
+    """Исправление уникальных слов: в пуле процессов для больших пачек, иначе на месте"""
+    corrections: Dict[str, Choice] = {}
+    errors: Dict[str, str] = {}
+
+    chunks = [words[i:i + SPELL_BATCH_CHUNK_SIZE] for i in range(0, len(words), SPELL_BATCH_CHUNK_SIZE)]
+    pool = get_spell_pool() if use_pool and len(words) >= SPELL_BATCH_MIN_WORDS else None
+
+    if pool is not None:
+        futures = [pool.submit(_correct_chunk, chunk) for chunk in chunks]
+        chunk_results = []
+        for chunk, future in zip(chunks, futures):
+            try:
+                chunk_results.append(future.result())
+            except Exception:
+                # Пул недоступен (например, процесс упал) — считаем пачку на месте
+                chunk_results.append(_correct_chunk(chunk, dictionary))
+    else:
+        chunk_results = [_correct_chunk(chunk, dictionary) for chunk in chunks]
+
+    for chunk, results in zip(chunks, chunk_results):
+        for word, (correction, error) in zip(chunk, results):
+            if error is not None:
+                errors[word] = error
+                continue
+            corrections[word] = correction
+            spell_checker.token_cache.put(word, correction, generation)
+
+    return corrections, errors
+
+
+def correct_spelling_batch(texts: List[str], use_pool: bool = True) -> List[SpellResult]:
+    """
+    Массовое исправление опечаток: каждое уникальное слово всего запроса
+    исправляется один раз, ошибки изолированы по отдельным текстам.
+    use_pool=False — без пула процессов (вызывающий код уже распараллелен по процессам)
+    """
+    # Состояние кэшей и словаря на начало запроса (см. spell_checker.correct_spelling)
+    text_generation = spell_checker.text_cache.generation
+    token_generation = spell_checker.token_cache.generation
+    dictionary = spell_checker.get_dictionary()
+
+    tokenized: List[Optional[List[Tuple[str, bool]]]] = []
+    cached_results = {}
+    pending = set()
+
+    # Токенизация всех текстов и сбор уникальных слов, которых нет в кэше
+    for position, text in enumerate(texts):
+        cached = spell_checker.text_cache.get(text)
+        if cached is not None:
+            cached_results[position] = cached
+            tokenized.append(None)
+            continue
+
+        tokens = spell_checker.tokenize(text)
+        tokenized.append(tokens)
+        for word, is_word in tokens:
+            if not is_word or not spell_checker.is_checked_word(word):
+                continue
+            word = word.lower()
+            if word in pending:
+                continue
+            cached_word = spell_checker.token_cache.get(word, spell_checker._MISSING)
+            if cached_word is spell_checker._MISSING:
+                pending.add(word)
+
+    corrections, errors = _resolve_words(sorted(pending), dictionary, token_generation, use_pool)
+
+    def lookup(word: str, previous: Optional[str]) -> Optional[str]:
+        if word in errors:
+            raise RuntimeError(errors[word])
+        if word in corrections:
+            return spell_checker.resolve_choice(corrections[word], previous, dictionary)
+        return spell_checker.correct_word(word, dictionary, token_generation, previous)
+
+    # Сборка результатов по каждому тексту
+    results = []
+    for position, text in enumerate(texts):
+        try:
+            result = cached_results.get(position)
+            if result is None:
+                result = spell_checker.assemble_correction(text, tokenized[position], lookup)
+                spell_checker.text_cache.put(text, result, text_generation)
+
+            results.append(result)
+        except Exception as e:
+            results.append(SpellResult(
+                original_text=text,
+                corrected_text=text,
+                corrections={},
+                confidence=0.0,
+                error=str(e)
+            ))
+
+    return results
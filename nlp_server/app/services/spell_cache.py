@@ -0,0 +1,69 @@
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+import threading
+
+
+class LRUCache:
+    """
+    Ограниченный LRU-кэш со счётчиками попаданий, промахов и вытеснений.
+    Размер 0 отключает кэширование. Каждый сброс начинает новое поколение:
+    значение, вычисленное до сброса, не попадает в кэш после него
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.generation = 0
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Значение по ключу; при попадании ключ становится самым свежим"""
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any, generation: Optional[int] = None):
+        """
+        Сохранение значения с вытеснением самого старого ключа при переполнении;
+        с generation значение сохраняется, только если кэш с тех пор не сбрасывался
+        """
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Сброс содержимого и начало нового поколения (счётчики сохраняются)"""
+        with self._lock:
+            self._data.clear()
+            self.generation += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Счётчики для подбора размера кэша"""
+        requests = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / requests, 4) if requests else 0.0
+        }
@@ -1,11 +1,23 @@
 from spellchecker import SpellChecker
-from nlp_server.app.models.spell_checker_model import CorrectSpellingRequest, CorrectSpellingResponse
-from typing import List
+from nlp_server.app.config import (
+    SPELL_BACKEND, SPELL_COMPACT_PATH, SPELL_INDEX_PATH, SPELL_FREQUENCY_PATH, QUERY_FREQUENCY_PATH,
+    SPELL_TOKEN_CACHE_SIZE, SPELL_TEXT_CACHE_SIZE
+)
+from nlp_server.app.models.results import SpellResult
+from nlp_server.app.services.compact_index import CompactSpellIndex, write_compact_dictionary
+from nlp_server.app.services.model_registry import model_registry
+from nlp_server.app.services.query_ranker import QueryRanker, context_token
+from nlp_server.app.services.spell_cache import LRUCache
+from nlp_server.app.services.spell_index import LayeredSpellIndex, SymSpellIndex
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+import hashlib
+import json
+import os
+import pickle
 import re
+import threading
 
 
-spell = SpellChecker(language="ru")
-
 domain_words = [
     'кс', 'котировочная', 'сессия', 'эцп', 'электронная', 'цифровая', 'подпись',
     'закупка', 'тендер', 'поставщик', 'заказчик', 'канцелярия', 'канцелярские',
@@ -17,66 +29,400 @@ domain_words = [
 ]
 
 
-for word in domain_words:
-    spell.word_frequency.add(word)
+def load_word_frequencies() -> Dict[str, int]:
+    """Частотный словарь pyspellchecker: из готового файла SPELL_FREQUENCY_PATH или из пакета"""
+    if SPELL_FREQUENCY_PATH and os.path.exists(SPELL_FREQUENCY_PATH):
+        with open(SPELL_FREQUENCY_PATH, "rb") as f:
+            return pickle.load(f)
+
+    frequencies = dict(SpellChecker(language="ru").word_frequency.dictionary)
+    if SPELL_FREQUENCY_PATH:
+        save_word_frequencies(frequencies, SPELL_FREQUENCY_PATH)
+    return frequencies
+
+
+def save_word_frequencies(frequencies: Dict[str, int], path: str):
+    """Сериализация частотного словаря для быстрого старта"""
+    with open(path, "wb") as f:
+        pickle.dump(frequencies, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def build_spell_index() -> SymSpellIndex:
+    """Построение индекса опечаток по частотному словарю и доменным словам"""
+    index = SymSpellIndex(load_word_frequencies())
+    index.add_words(domain_words)
+    return index
+
+
+def dictionary_frequencies() -> Dict[str, int]:
+    """Частотный словарь вместе с доменными словами (как в build_spell_index)"""
+    frequencies = load_word_frequencies()
+    for word in domain_words:
+        frequencies[word] = frequencies.get(word, 0) + 1
+    return frequencies
+
+
+def load_compact_index() -> CompactSpellIndex:
+    """Открытие компактного словаря SPELL_COMPACT_PATH; при отсутствии файл собирается"""
+    if not os.path.exists(SPELL_COMPACT_PATH):
+        write_compact_dictionary(dictionary_frequencies(), SPELL_COMPACT_PATH)
+
+    index = CompactSpellIndex.open(SPELL_COMPACT_PATH)
+    index.add_words(word for word in domain_words if not index.frequency(word))
+    return index
+
+
+def load_spell_index() -> Union[SymSpellIndex, CompactSpellIndex]:
+    """Загрузка индекса выбранного SPELL_BACKEND: готового файла или построение при старте"""
+    if SPELL_BACKEND == "compact":
+        return load_compact_index()
+
+    if SPELL_INDEX_PATH and os.path.exists(SPELL_INDEX_PATH):
+        index = SymSpellIndex.load(SPELL_INDEX_PATH)
+        # Доменные слова, добавленные после сборки файла
+        index.add_words(word for word in domain_words if not index.frequency(word))
+        return index
+
+    index = build_spell_index()
+    if SPELL_INDEX_PATH:
+        index.save(SPELL_INDEX_PATH)
+    return index
+
+
+# Индекс загружается при прогреве моделей или при первом обращении
+spell_index: Optional[Union[SymSpellIndex, CompactSpellIndex]] = None
+
+
+def init_spell_checker() -> Optional[str]:
+    """Загрузка индекса опечаток (вызывается реестром моделей)"""
+    global spell_index
+    if spell_index is None:
+        spell_index = load_spell_index()
+    return f"{SPELL_BACKEND}: {len(spell_index)} words"
+
+
+model_registry.register("spell_checker", init_spell_checker)
+
+
+def get_spell_index() -> Union[SymSpellIndex, CompactSpellIndex]:
+    """Индекс опечаток; загружается при первом обращении"""
+    if spell_index is None:
+        model_registry.ensure("spell_checker")
+    return spell_index
+
 
+# Ранжирование кандидатов по истории запросов (None — только по общему словарю)
+query_ranker: Optional[QueryRanker] = None
 
-def correct_spelling(text: str) -> CorrectSpellingResponse:
+
+def load_query_ranker() -> Optional[QueryRanker]:
+    """Частоты запросов из QUERY_FREQUENCY_PATH, если файл собран"""
+    if QUERY_FREQUENCY_PATH and os.path.exists(QUERY_FREQUENCY_PATH):
+        return QueryRanker.load(QUERY_FREQUENCY_PATH)
+    return None
+
+
+def init_query_ranker() -> Optional[str]:
+    """
+    Загрузка частот запросов (вызывается реестром моделей). Исправления, посчитанные
+    до появления частот, сбрасываются вместе с кэшами
+    """
+    global query_ranker
+    if query_ranker is None:
+        query_ranker = load_query_ranker()
+        if query_ranker is not None:
+            invalidate_spell_caches()
+    if query_ranker is None:
+        return "disabled"
+    return f"{len(query_ranker)} words, {len(query_ranker.bigrams)} with context"
+
+
+model_registry.register("query_ranker", init_query_ranker)
+
+
+def reload_query_ranker() -> Optional[str]:
+    """Подмена частот запросов заново собранным файлом без перезапуска"""
+    global query_ranker
+    query_ranker = load_query_ranker()
+    invalidate_spell_caches()
+    return init_query_ranker()
+
+
+# Слой доменных терминов из БД поверх индекса: при перезагрузке заменяется новым
+# объектом целиком, поэтому запрос видит либо прежний слой, либо новый
+domain_layer = SymSpellIndex()
+_domain_layer_lock = threading.Lock()
+
+
+def get_dictionary() -> Union[SymSpellIndex, CompactSpellIndex, LayeredSpellIndex]:
+    """
+    Словарь для исправлений: индекс опечаток вместе с текущим доменным слоем.
+    Частоты запросов загружаются при первом обращении, как и индекс
+    """
+    index = get_spell_index()
+    if query_ranker is None and QUERY_FREQUENCY_PATH:
+        _ensure_query_ranker()
+    layer = domain_layer
+    if not layer.frequencies:
+        return index
+    return LayeredSpellIndex(index, layer)
+
+
+def _ensure_query_ranker():
+    """Ленивая загрузка частот запросов; без них исправления ранжируются по общему словарю"""
+    try:
+        model_registry.ensure("query_ranker")
+    except Exception:
+        # Ошибка и время следующей попытки записаны в реестре
+        pass
+
+
+def update_domain_layer(frequencies: Dict[str, int], removed: List[str]):
     """
-    Исправление опечаток в тексте с использованием pyspellchecker
+    Применение изменений доменного словаря: новый слой строится из текущего только
+    по изменившимся терминам и подменяет его, затем сбрасываются кэши исправлений
     """
+    global domain_layer
+    with _domain_layer_lock:
+        domain_layer = domain_layer.with_changes(frequencies, removed)
+        invalidate_spell_caches()
+
+# Кэши исправлений: нормализованное слово -> исправление, текст -> готовый ответ
+token_cache = LRUCache(SPELL_TOKEN_CACHE_SIZE)
+text_cache = LRUCache(SPELL_TEXT_CACHE_SIZE)
+
+_MISSING = object()
+
+# Токены текста: слова (группа 1) и отдельные знаки препинания
+TOKEN_PATTERN = re.compile(r'(\w+)|[^\w\s]')
+
+# Версия словаря: растёт при каждом изменении, по ней сбрасываются кэши и пулы процессов
+dictionary_version = 1
+
+
+def invalidate_spell_caches():
+    """Сброс кэшей исправлений после изменения словаря"""
+    global dictionary_version
+    dictionary_version += 1
+    token_cache.clear()
+    text_cache.clear()
+
+
+# Отпечаток словаря, посчитанный для версии словаря: (dictionary_version, отпечаток)
+_dictionary_digest: Tuple[int, str] = (0, "")
+
+
+def file_signature(path: str) -> List[Any]:
+    """Путь, размер и время изменения файла словаря (файл пересобран — подпись другая)"""
+    if not path or not os.path.exists(path):
+        return [path]
+    stat = os.stat(path)
+    return [path, stat.st_size, stat.st_mtime_ns]
+
+
+def dictionary_digest() -> str:
+    """
+    Отпечаток содержимого словаря: файлы словаря и частот запросов, доменные слова
+    и слой терминов из БД. В отличие от dictionary_version (счётчика изменений
+    в процессе) одинаков во всех воркерах и после перезапуска, пока словарь тот же.
+    Считается заново только после изменения словаря
+    """
+    global _dictionary_digest
+    version = dictionary_version
+    if _dictionary_digest[0] != version:
+        files = [QUERY_FREQUENCY_PATH]
+        files += [SPELL_COMPACT_PATH] if SPELL_BACKEND == "compact" else [SPELL_FREQUENCY_PATH, SPELL_INDEX_PATH]
+        state = {
+            "files": [file_signature(path) for path in files],
+            "query_ranker": query_ranker is not None,
+            "domain_words": sorted(domain_words),
+            "domain_layer": sorted(domain_layer.frequencies.items())
+        }
+        digest = hashlib.sha1(json.dumps(state, ensure_ascii=False).encode("utf-8")).hexdigest()[:12]
+        _dictionary_digest = (version, digest)
+    return _dictionary_digest[1]
+
+
+def add_domain_words(words: List[str]):
+    """Пополнение доменного словаря без перезапуска сервиса"""
+    index = get_spell_index()
+    for word in words:
+        index.add_word(word)
+        if word.lower() not in domain_words:
+            domain_words.append(word.lower())
+    invalidate_spell_caches()
+
+
+def spell_cache_stats() -> Dict[str, Dict[str, Any]]:
+    """Счётчики попаданий, промахов и вытеснений обоих уровней кэша"""
+    return {
+        "token_cache": token_cache.stats(),
+        "text_cache": text_cache.stats()
+    }
+
+
+def correct_word(
+    word: str,
+    dictionary=None,
+    generation: Optional[int] = None,
+    previous: Optional[str] = None
+) -> Optional[str]:
+    """
+    Исправление одного слова в нижнем регистре после слова previous; None, если
+    слово известно или исправить его нечем. dictionary и generation фиксируют
+    состояние словаря на начало запроса: результат, посчитанный до перезагрузки
+    словаря, не попадает в кэш
+    """
+    choice = token_cache.get(word, _MISSING)
+    if choice is _MISSING:
+        if generation is None:
+            generation = token_cache.generation
+        choice = lookup_choice(word, dictionary)
+        token_cache.put(word, choice, generation)
+    return resolve_choice(choice, previous, dictionary)
+
+
+def lookup_choice(word: str, dictionary=None) -> Union[None, str, Tuple[str, ...]]:
+    """
+    Выбор исправления без учёта контекста, пригодный для кэша по слову: None,
+    готовое исправление или кортеж кандидатов, если выбор между ними зависит
+    от предыдущего слова (есть биграммы в частотах запросов)
+    """
+    index = dictionary if dictionary is not None else get_dictionary()
+    if index.known(word):
+        return None
+
+    ranker = query_ranker
+    if ranker is None:
+        # Берем самый вероятный вариант среди ближайших кандидатов
+        best_candidate = index.correction(word)
+    else:
+        candidates = index.candidates(word)
+        if not candidates or candidates == {word}:
+            return None
+        if ranker.has_context(candidates):
+            return tuple(sorted(candidates))
+        best_candidate = ranker.best(candidates, None, index.frequency)
+
+    if best_candidate == word:
+        return None
+    return best_candidate
+
+
+def resolve_choice(
+    choice: Union[None, str, Tuple[str, ...]],
+    previous: Optional[str],
+    dictionary=None
+) -> Optional[str]:
+    """Окончательное исправление: выбор среди кандидатов по биграмме с предыдущим словом"""
+    if not isinstance(choice, tuple):
+        return choice
+
+    index = dictionary if dictionary is not None else get_dictionary()
+    ranker = query_ranker
+    if ranker is None:
+        return min(choice, key=lambda candidate: (-index.frequency(candidate), candidate))
+    return ranker.best(choice, previous, index.frequency)
+
+
+def lookup_word(word: str, dictionary=None, previous: Optional[str] = None) -> Optional[str]:
+    """Исправление одного слова в нижнем регистре напрямую по словарю, без кэша"""
+    return resolve_choice(lookup_choice(word, dictionary), previous, dictionary)
+
+
+def tokenize(text: str) -> List[Tuple[str, bool]]:
+    """Разбиение текста на токены с флагом: слово или знак препинания"""
+    return [(match.group(), match.lastindex is not None) for match in TOKEN_PATTERN.finditer(text)]
+
+
+def is_checked_word(word: str) -> bool:
+    """Слово проверяется на опечатки: не число и не короче 2 символов"""
+    return not word.isdigit() and len(word) >= 2
+
+
+def correct_spelling(text: str) -> SpellResult:
+    """
+    Исправление опечаток в тексте с использованием индекса SymSpell
+    """
+    cached = text_cache.get(text)
+    if cached is not None:
+        return cached
+
+    # Поколения кэшей снимаются до словаря: если словарь перезагрузят во время
+    # запроса, результат по старому словарю не попадёт в кэш
+    text_generation = text_cache.generation
+    token_generation = token_cache.generation
+    dictionary = get_dictionary()
+
     # Разбиваем текст на слова с сохранением разделителей
-    words = re.findall(r'\b\w+\b|[^\w\s]', text)
+    result = assemble_correction(
+        text, tokenize(text), lambda word, previous: correct_word(word, dictionary, token_generation, previous)
+    )
+    text_cache.put(text, result, text_generation)
+    return result
+
+
+def assemble_correction(
+    text: str,
+    tokens: List[Tuple[str, bool]],
+    lookup: Callable[[str, Optional[str]], Optional[str]]
+) -> SpellResult:
+    """
+    Сборка ответа по токенам текста; lookup(слово, предыдущее слово) возвращает
+    исправление слова в нижнем регистре или None. Пробелы и прочие разделители
+    между токенами сохраняются из исходного текста
+    """
     corrections = {}
     total_words = 0
     corrected_words = 0
 
     corrected_parts = []
+    position = 0
+    previous = None
 
-    for word in words:
-        # Пропускаем не-слова (знаки препинания и т.д.)
-        if not re.match(r'\w+', word):
+    for word, is_word in tokens:
+        # Разделители между токенами переносятся без изменений
+        start = text.find(word, position)
+        corrected_parts.append(text[position:start])
+        position = start + len(word)
+
+        # Пропускаем не-слова (знаки препинания и т.д.); контекст на них обрывается
+        if not is_word:
             corrected_parts.append(word)
+            previous = None
             continue
 
         total_words += 1
 
         # Пропускаем числа и короткие слова
-        if word.isdigit() or len(word) < 2:
+        if not is_checked_word(word):
             corrected_parts.append(word)
+            previous = context_token(word)
             continue
 
-        # Проверяем, известно ли слово (учитывая доменный словарь)
-        known = spell.known([word.lower()])
-
-        if not known:
-            # Ищем кандидатов на исправление
-            candidates = spell.candidates(word.lower())
-            if candidates:
-                # Берем самый вероятный вариант
-                best_candidate = spell.correction(word.lower())
-                if best_candidate and best_candidate != word.lower():
-                    # Сохраняем оригинальное написание (с заглавными буквами)
-                    if word[0].isupper():
-                        best_candidate = best_candidate.capitalize()
-
-                    corrections[word] = best_candidate
-                    corrected_parts.append(best_candidate)
-                    corrected_words += 1
-                else:
-                    corrected_parts.append(word)
-            else:
-                corrected_parts.append(word)
+        # Ищем исправление (учитывая доменный словарь и предыдущее слово)
+        best_candidate = lookup(word.lower(), previous)
+        if best_candidate:
+            previous = context_token(best_candidate)
+            # Сохраняем оригинальное написание (с заглавными буквами)
+            if word[0].isupper():
+                best_candidate = best_candidate.capitalize()
+
+            corrections[word] = best_candidate
+            corrected_parts.append(best_candidate)
+            corrected_words += 1
         else:
             corrected_parts.append(word)
+            previous = context_token(word)
 
     # Собираем исправленный текст
+    corrected_parts.append(text[position:])
     corrected_text = ''.join(corrected_parts)
 
     # Вычисляем уверенность (доля исправленных слов от общего числа слов)
     confidence = 1.0 - (corrected_words / total_words) if total_words > 0 else 1.0
 
-    return CorrectSpellingResponse(
+    return SpellResult(
         original_text=text,
         corrected_text=corrected_text,
         corrections=corrections,
@@ -84,7 +430,7 @@ def correct_spelling(text: str) -> CorrectSpellingResponse:
     )
 
 
-def bulk_correct_spelling(texts: List[str]) -> List[CorrectSpellingResponse]:
+def bulk_correct_spelling(texts: List[str]) -> List[SpellResult]:
     """
     Массовое исправление опечаток для нескольких текстов
     """
@@ -0,0 +1,299 @@
+from typing import Dict, Iterable, List, Optional, Set
+import pickle
+import string
+
+
+INDEX_FORMAT_VERSION = 1
+
+
+def _is_checkable(word: str, longest_word_length: int) -> bool:
+    """Повторяет SpellChecker._check_if_should_check: числа и пунктуацию не исправляем"""
+    if len(word) == 1 and word in string.punctuation:
+        return False
+    if len(word) > longest_word_length + 3:
+        return False
+    if word.lower() in ("nan", "inf", "infinity"):
+        return True
+    try:
+        float(word)
+        return False
+    except ValueError:
+        pass
+    return True
+
+
+def damerau_levenshtein(a: str, b: str) -> int:
+    """Расстояние Дамерау-Левенштейна (с транспозициями несоседних правок)"""
+    inf = len(a) + len(b)
+    last_row: Dict[str, int] = {}
+    d = [[inf] * (len(b) + 2)]
+    d += [[inf] + list(range(len(b) + 1))]
+    d += [[inf, i] + [0] * len(b) for i in range(1, len(a) + 1)]
+
+    for i in range(1, len(a) + 1):
+        last_match_col = 0
+        for j in range(1, len(b) + 1):
+            i1 = last_row.get(b[j - 1], 0)
+            j1 = last_match_col
+            if a[i - 1] == b[j - 1]:
+                cost = 0
+                last_match_col = j
+            else:
+                cost = 1
+            d[i + 1][j + 1] = min(
+                d[i][j] + cost,
+                d[i + 1][j] + 1,
+                d[i][j + 1] + 1,
+                d[i1][j1] + (i - i1 - 1) + 1 + (j - j1 - 1)
+            )
+        last_row[a[i - 1]] = i
+
+    return d[len(a) + 1][len(b) + 1]
+
+
+def _deletes(word: str, max_distance: int) -> Set[str]:
+    """Все варианты слова, полученные удалением не более max_distance символов"""
+    result = {word}
+    frontier = {word}
+    for _ in range(max_distance):
+        next_frontier = set()
+        for variant in frontier:
+            for i in range(len(variant)):
+                next_frontier.add(variant[:i] + variant[i + 1:])
+        next_frontier -= result
+        result |= next_frontier
+        frontier = next_frontier
+    return result
+
+
+def closest_words(
+    word: str,
+    candidates: Iterable[str],
+    max_distance: int,
+    longest_word_length: int
+) -> Optional[Set[str]]:
+    """Кандидаты на минимальном расстоянии Дамерау-Левенштейна от word (не больше max_distance)"""
+    best_distance = max_distance + 1
+    best: Set[str] = set()
+    seen: Set[str] = set()
+
+    for candidate in candidates:
+        if candidate in seen:
+            continue
+        seen.add(candidate)
+        if abs(len(candidate) - len(word)) > min(best_distance, max_distance):
+            continue
+        if not _is_checkable(candidate, longest_word_length):
+            continue
+
+        distance = damerau_levenshtein(word, candidate)
+        if distance > max_distance:
+            continue
+        if distance < best_distance:
+            best_distance = distance
+            best = {candidate}
+        elif distance == best_distance:
+            best.add(candidate)
+
+    return best or None
+
+
+class SymSpellIndex:
+    """
+    Индекс симметричного удаления (SymSpell) над частотным словарём.
+
+    Кандидаты ищутся пересечением удалений слова запроса и удалений словарных слов,
+    поэтому поиск стоит несколько обращений к словарю вместо перебора всех
+    правок на расстоянии 2. Выбор исправления совпадает с SpellChecker.correction:
+    ближайшие по расстоянию кандидаты, среди них самый частотный, при равенстве —
+    первый по алфавиту.
+    """
+
+    def __init__(self, frequencies: Optional[Dict[str, int]] = None, max_distance: int = 2):
+        self.max_distance = max_distance
+        self.frequencies: Dict[str, int] = {}
+        self.longest_word_length = 0
+        self._deletes: Dict[str, List[str]] = {}
+
+        if frequencies:
+            for word, frequency in frequencies.items():
+                self.add_word(word, frequency)
+
+    def __len__(self) -> int:
+        return len(self.frequencies)
+
+    def __contains__(self, word: str) -> bool:
+        return self.known(word)
+
+    def known(self, word: str) -> bool:
+        """Слово есть в словаре (аналог SpellChecker.known для одного слова)"""
+        word = word.lower()
+        return word in self.frequencies and _is_checkable(word, self.longest_word_length)
+
+    def frequency(self, word: str) -> int:
+        """Частота слова в словаре (0 для неизвестных)"""
+        return self.frequencies.get(word.lower(), 0)
+
+    def add_word(self, word: str, frequency: int = 1):
+        """Добавление слова (или увеличение его частоты), как WordFrequency.add"""
+        word = word.lower()
+        if word in self.frequencies:
+            self.frequencies[word] += frequency
+            return
+
+        self.frequencies[word] = frequency
+        self.longest_word_length = max(self.longest_word_length, len(word))
+        for variant in _deletes(word, self.max_distance):
+            bucket = self._deletes.get(variant)
+            if bucket is None:
+                self._deletes[variant] = [word]
+            else:
+                bucket.append(word)
+
+    def add_words(self, words: Iterable[str]):
+        """Добавление списка слов с единичной частотой"""
+        for word in words:
+            self.add_word(word)
+
+    def candidates(self, word: str) -> Optional[Set[str]]:
+        """Ближайшие словарные слова, аналог SpellChecker.candidates"""
+        word = word.lower()
+        if self.known(word):
+            return {word}
+        if not _is_checkable(word, self.longest_word_length):
+            return {word}
+
+        words = (
+            candidate
+            for variant in _deletes(word, self.max_distance)
+            for candidate in self._deletes.get(variant, ())
+        )
+        return closest_words(word, words, self.max_distance, self.longest_word_length)
+
+    def correction(self, word: str) -> Optional[str]:
+        """Наиболее вероятное исправление слова, аналог SpellChecker.correction"""
+        candidates = self.candidates(word)
+        if not candidates:
+            return None
+        return min(candidates, key=lambda candidate: (-self.frequencies.get(candidate, 0), candidate))
+
+    def with_changes(self, frequencies: Dict[str, int], removed: Iterable[str] = ()) -> "SymSpellIndex":
+        """
+        Новый индекс с заменёнными частотами (новые слова добавляются) и удалёнными
+        словами. Исходный индекс не меняется, поэтому запросы, уже читающие его,
+        завершаются на прежнем состоянии; копируются только затронутые списки удалений
+        """
+        index = SymSpellIndex(max_distance=self.max_distance)
+        index.frequencies = dict(self.frequencies)
+        index._deletes = dict(self._deletes)
+        copied: Set[str] = set()
+
+        def bucket(variant: str) -> List[str]:
+            if variant not in copied:
+                index._deletes[variant] = list(index._deletes.get(variant, ()))
+                copied.add(variant)
+            return index._deletes[variant]
+
+        removed = {word.lower() for word in removed}
+        for word in removed:
+            if index.frequencies.pop(word, None) is None:
+                continue
+            for variant in _deletes(word, self.max_distance):
+                words = bucket(variant)
+                words.remove(word)
+
+        for word, frequency in frequencies.items():
+            word = word.lower()
+            if word not in index.frequencies:
+                for variant in _deletes(word, self.max_distance):
+                    bucket(variant).append(word)
+            index.frequencies[word] = frequency
+
+        for variant in copied:
+            if not index._deletes[variant]:
+                del index._deletes[variant]
+
+        if removed:
+            index.longest_word_length = max(map(len, index.frequencies), default=0)
+        else:
+            index.longest_word_length = max([self.longest_word_length, *map(len, frequencies)])
+        return index
+
+    def save(self, path: str):
+        """Сохранение построенного индекса в файл"""
+        with open(path, "wb") as f:
+            pickle.dump({
+                "version": INDEX_FORMAT_VERSION,
+                "max_distance": self.max_distance,
+                "frequencies": self.frequencies,
+                "longest_word_length": self.longest_word_length,
+                "deletes": self._deletes
+            }, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @classmethod
+    def load(cls, path: str) -> "SymSpellIndex":
+        """Загрузка заранее построенного индекса из файла"""
+        with open(path, "rb") as f:
+            data = pickle.load(f)
+
+        if data.get("version") != INDEX_FORMAT_VERSION:
+            raise ValueError(f"Неподдерживаемая версия индекса: {data.get('version')}")
+
+        index = cls(max_distance=data["max_distance"])
+        index.frequencies = data["frequencies"]
+        index.longest_word_length = data["longest_word_length"]
+        index._deletes = data["deletes"]
+        return index
+
+
+
+class LayeredSpellIndex:
+    """
+    Основной словарь и слой доменных слов поверх него: частоты складываются,
+    кандидаты выбираются среди ближайших слов обоих уровней. Слой заменяется целиком
+    (новым объектом), основной словарь при этом не перестраивается
+    """
+
+    def __init__(self, base, layer: SymSpellIndex):
+        self.base = base
+        self.layer = layer
+        self.max_distance = base.max_distance
+
+    @property
+    def longest_word_length(self) -> int:
+        return max(self.base.longest_word_length, self.layer.longest_word_length)
+
+    def __len__(self) -> int:
+        return len(self.base) + sum(1 for word in self.layer.frequencies if not self.base.frequency(word))
+
+    def __contains__(self, word: str) -> bool:
+        return self.known(word)
+
+    def known(self, word: str) -> bool:
+        """Слово есть в основном словаре или в слое"""
+        return self.base.known(word) or self.layer.known(word)
+
+    def frequency(self, word: str) -> int:
+        """Суммарная частота слова в обоих уровнях"""
+        return self.base.frequency(word) + self.layer.frequency(word)
+
+    def candidates(self, word: str) -> Optional[Set[str]]:
+        """Ближайшие слова обоих уровней, аналог SpellChecker.candidates"""
+        word = word.lower()
+        if self.known(word):
+            return {word}
+        longest_word_length = self.longest_word_length
+        if not _is_checkable(word, longest_word_length):
+            return {word}
+
+        # Ближайшие слова объединения — среди ближайших слов каждого уровня
+        words = (self.base.candidates(word) or set()) | (self.layer.candidates(word) or set())
+        words.discard(word)
+        return closest_words(word, words, self.max_distance, longest_word_length)
+
+    def correction(self, word: str) -> Optional[str]:
+        """Наиболее вероятное исправление слова с учётом частот обоих уровней"""
+        candidates = self.candidates(word)
+        if not candidates:
+            return None
+        return min(candidates, key=lambda candidate: (-self.frequency(candidate), candidate))
@@ -0,0 +1,106 @@
+from nlp_server.app.config import SPELL_WS_MAX_SESSIONS
+from nlp_server.app.models.results import SpellResult
+from nlp_server.app.services import spell_checker
+from typing import Any, Dict, Optional, Tuple
+import time
+
+
+# Решение по слову: (слово в нижнем регистре, предыдущее слово) -> исправление или None
+WordKey = Tuple[str, Optional[str]]
+
+
+class SessionLimitExceeded(Exception):
+    """Открыто предельное число сессий проверки"""
+
+
+class SpellSession:
+    """
+    Состояние проверки для одного соединения: решения по словам последнего
+    присланного текста. Исправление слова зависит только от самого слова и
+    предыдущего, поэтому при новом тексте словарь проверяется лишь для новых
+    или изменившихся слов (и для слова после изменившегося — у него другой
+    контекст); остальные решения берутся из прошлого текста. Хранятся решения
+    только последнего текста, так что размер состояния ограничен его длиной
+    """
+
+    def __init__(self):
+        self.words: Dict[WordKey, Optional[str]] = {}
+        self.version = spell_checker.dictionary_version
+        self.created_at = time.time()
+        self.last_used = time.monotonic()
+        self.messages = 0
+        self.checked = 0
+
+    def correct(self, text: str) -> Tuple[SpellResult, int]:
+        """Ответ как у correct_spelling и число слов, проверенных по словарю заново"""
+        # Версия снимается до словаря: если словарь изменится во время проверки,
+        # следующий текст будет проверен заново целиком
+        version = spell_checker.dictionary_version
+        previous_words = self.words if version == self.version else {}
+        dictionary = spell_checker.get_dictionary()
+        generation = spell_checker.token_cache.generation
+
+        words: Dict[WordKey, Optional[str]] = {}
+        checked = 0
+
+        def lookup(word: str, previous: Optional[str]) -> Optional[str]:
+            nonlocal checked
+            key = (word, previous)
+            if key in words:
+                return words[key]
+            if key in previous_words:
+                correction = previous_words[key]
+            else:
+                correction = spell_checker.correct_word(word, dictionary, generation, previous)
+                checked += 1
+            words[key] = correction
+            return correction
+
+        result = spell_checker.assemble_correction(text, spell_checker.tokenize(text), lookup)
+
+        self.words = words
+        self.version = version
+        self.last_used = time.monotonic()
+        self.messages += 1
+        self.checked += checked
+        return result, checked
+
+
+class SpellSessions:
+    """
+    Открытые сессии проверки по мере ввода. Число сессий ограничено
+    max_sessions; сессия закрывается вместе с соединением, в том числе
+    при простое (см. роутер)
+    """
+
+    def __init__(self, max_sessions: int):
+        self.max_sessions = max_sessions
+        self._sessions: Dict[int, SpellSession] = {}
+        self.opened = 0
+        self.rejected = 0
+
+    def open(self) -> SpellSession:
+        """Новая сессия; SessionLimitExceeded, если открыто max_sessions"""
+        if len(self._sessions) >= self.max_sessions:
+            self.rejected += 1
+            raise SessionLimitExceeded(f"Too many spellcheck sessions ({self.max_sessions})")
+        session = SpellSession()
+        self._sessions[id(session)] = session
+        self.opened += 1
+        return session
+
+    def close(self, session: SpellSession):
+        self._sessions.pop(id(session), None)
+
+    def status(self) -> Dict[str, Any]:
+        """Число открытых сессий и размер их состояния для мониторинга"""
+        return {
+            "active": len(self._sessions),
+            "max_sessions": self.max_sessions,
+            "opened": self.opened,
+            "rejected": self.rejected,
+            "words": sum(len(session.words) for session in self._sessions.values())
+        }
+
+
+spell_sessions = SpellSessions(SPELL_WS_MAX_SESSIONS)
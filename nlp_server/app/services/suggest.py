@@ -0,0 +1,303 @@
+from bisect import bisect_left
+from nlp_server.app.config import SUGGEST_INDEX_PATH, SUGGEST_MAX_LIMIT, SUGGEST_FUZZY_MIN_LENGTH
+from nlp_server.app.services.model_registry import model_registry
+from nlp_server.app.services.spell_checker import domain_words, is_checked_word, tokenize
+from typing import Dict, Iterator, List, Optional, Tuple
+import hashlib
+import heapq
+import json
+import numpy as np
+import os
+import pickle
+import threading
+
+
+SUGGEST_FORMAT_VERSION = 1
+
+# Диапазоны префиксов длиннее этого числа терминов просматриваются заранее при сборке:
+# для них хранятся лучшие по частоте термины и следующие символы
+PRECOMPUTED_RANGE = 128
+
+# Подсказка: текст, частота, расстояние до введённого префикса (0 — точное продолжение)
+Suggestion = Tuple[str, int, int]
+
+
+def normalize_query(text: str) -> str:
+    """Нижний регистр и одиночные пробелы; пробел в конце сохраняется — слово введено целиком"""
+    normalized = " ".join(text.lower().split())
+    if normalized and text[-1:].isspace():
+        normalized += " "
+    return normalized
+
+
+def _successor(prefix: str) -> str:
+    """Наименьшая строка больше всех строк, начинающихся с prefix"""
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+def collect_terms(phrases: Dict[str, int]) -> Dict[str, int]:
+    """
+    Термины подсказок: фразы search_dictionary, отдельные слова фраз (частоты
+    одинаковых слов складываются) и встроенные доменные слова
+    """
+    terms: Dict[str, int] = {}
+    for phrase, frequency in phrases.items():
+        phrase = normalize_query(phrase).strip()
+        if not phrase:
+            continue
+        frequency = max(int(frequency or 0), 1)
+        terms[phrase] = terms.get(phrase, 0) + frequency
+        words = [word for word, is_word in tokenize(phrase) if is_word and is_checked_word(word)]
+        if len(words) > 1 or (words and words[0] != phrase):
+            for word in words:
+                terms[word] = terms.get(word, 0) + frequency
+    for word in domain_words:
+        terms[word] = terms.get(word, 0) + 1
+    return terms
+
+
+def terms_digest(terms: Dict[str, int]) -> str:
+    """Отпечаток набора терминов: по нему видно, что индекс собран из тех же данных"""
+    return hashlib.sha1(
+        json.dumps(sorted(terms.items()), ensure_ascii=False).encode("utf-8")
+    ).hexdigest()
+
+
+class SuggestIndex:
+    """
+    Индекс автодополнения: отсортированный массив терминов и их частот. Все термины
+    с общим префиксом занимают в нём непрерывный диапазон, который находится двумя
+    двоичными поисками. Для коротких префиксов диапазон велик, поэтому при сборке
+    для каждого префикса длиннее PRECOMPUTED_RANGE терминов заранее сохраняются
+    лучшие max_limit терминов по частоте и множество следующих символов (узлы
+    префиксного дерева); короткие диапазоны просматриваются при запросе.
+
+    Подсказки с опечаткой — продолжения префиксов на расстоянии Дамерау-Левенштейна 1
+    от введённого (удаление, перестановка соседних, замена и вставка символа, как в
+    индексе опечаток). Варианты замены и вставки берутся только из символов, которые
+    действительно продолжают префикс в индексе, поэтому их перебор — обход узлов дерева,
+    а не всего алфавита
+    """
+
+    def __init__(self, terms: Dict[str, int], max_limit: int = SUGGEST_MAX_LIMIT):
+        self.max_limit = max_limit
+        self.digest = terms_digest(terms)
+        self.terms: List[str] = sorted(terms)
+        self.frequencies: List[int] = [terms[term] for term in self.terms]
+        self._top: Dict[str, Tuple[int, ...]] = {}
+        self._children: Dict[str, str] = {}
+        self._precompute()
+
+    def __len__(self) -> int:
+        return len(self.terms)
+
+    def _precompute(self):
+        """Лучшие термины и следующие символы для всех префиксов с большим диапазоном"""
+        frequencies = np.array(self.frequencies, dtype=np.int64)
+        stack = [("", 0, len(self.terms))]
+        while stack:
+            prefix, lo, hi = stack.pop()
+            if hi - lo <= PRECOMPUTED_RANGE:
+                continue
+            # Устойчивая сортировка: при равной частоте термины идут по алфавиту
+            order = np.argsort(-frequencies[lo:hi], kind="stable")[:self.max_limit] + lo
+            self._top[prefix] = tuple(order.tolist())
+
+            children = []
+            depth = len(prefix)
+            position = lo
+            if position < hi and len(self.terms[position]) == depth:
+                position += 1
+            while position < hi:
+                child = prefix + self.terms[position][depth]
+                end = bisect_left(self.terms, _successor(child), position, hi)
+                children.append(child[-1])
+                stack.append((child, position, end))
+                position = end
+            self._children[prefix] = "".join(children)
+
+    def _range(self, prefix: str) -> Tuple[int, int]:
+        """Диапазон терминов, начинающихся с prefix"""
+        if not prefix:
+            return 0, len(self.terms)
+        lo = bisect_left(self.terms, prefix)
+        # Большинство вариантов с опечаткой в индексе не встречается: второй поиск не нужен
+        if lo == len(self.terms) or not self.terms[lo].startswith(prefix):
+            return lo, lo
+        return lo, bisect_left(self.terms, _successor(prefix), lo)
+
+    def _next_chars(self, prefix: str) -> str:
+        """Символы, которыми prefix продолжается в индексе"""
+        children = self._children.get(prefix)
+        if children is not None:
+            return children
+        lo, hi = self._range(prefix)
+        depth = len(prefix)
+        chars = []
+        while lo < hi:
+            term = self.terms[lo]
+            if len(term) == depth:
+                lo += 1
+                continue
+            chars.append(term[depth])
+            lo = bisect_left(self.terms, _successor(term[:depth + 1]), lo, hi)
+        return "".join(chars)
+
+    def _top_ids(self, prefix: str, limit: int) -> List[int]:
+        """Номера самых частых терминов с префиксом prefix"""
+        top = self._top.get(prefix)
+        if top is not None:
+            return list(top[:limit])
+        lo, hi = self._range(prefix)
+        if hi - lo <= 1:
+            return list(range(lo, hi))
+        return heapq.nlargest(limit, range(lo, hi), key=self.frequencies.__getitem__)
+
+    def _variants(self, prefix: str) -> Iterator[str]:
+        """Префиксы индекса на расстоянии Дамерау-Левенштейна 1 от prefix"""
+        for i in range(len(prefix)):
+            head, char, tail = prefix[:i], prefix[i], prefix[i + 1:]
+            yield head + tail
+            if tail and tail[0] != char:
+                yield head + tail[0] + char + tail[1:]
+            for child in self._next_chars(head):
+                if child != char:
+                    yield head + child + tail
+                # Вставка в конце — обычное продолжение префикса, её даёт точный поиск
+                yield head + child + char + tail
+
+    def complete(self, prefix: str, limit: int) -> List[Suggestion]:
+        """Самые частые термины, начинающиеся с prefix"""
+        return [(self.terms[i], self.frequencies[i], 0) for i in self._top_ids(prefix, limit)]
+
+    def complete_fuzzy(self, prefix: str, limit: int) -> List[Suggestion]:
+        """Самые частые продолжения префиксов, отличающихся от prefix одной правкой"""
+        ids = set()
+        for variant in set(self._variants(prefix)):
+            if variant and variant != prefix:
+                ids.update(self._top_ids(variant, limit))
+        exact_lo, exact_hi = self._range(prefix)
+        best = heapq.nlargest(
+            limit,
+            (i for i in ids if not exact_lo <= i < exact_hi),
+            key=lambda i: (self.frequencies[i], -i)
+        )
+        return [(self.terms[i], self.frequencies[i], 1) for i in best]
+
+    def suggest(self, query: str, limit: int = 10, fuzzy: bool = True) -> List[Suggestion]:
+        """
+        Подсказки для введённого текста: термины, продолжающие его целиком, и
+        продолжения последнего слова после уже введённых слов. Если точных подсказок
+        меньше limit, добавляются подсказки с одной опечаткой в последнем слове.
+        Порядок: точные раньше исправленных, затем по убыванию частоты
+        """
+        query = normalize_query(query)
+        if not query:
+            return []
+        limit = min(limit, self.max_limit)
+        head, _, last = query.rpartition(" ")
+
+        found: Dict[str, Suggestion] = {}
+
+        def add(suggestions: List[Suggestion], head: str = ""):
+            for term, frequency, distance in suggestions:
+                text = f"{head} {term}" if head else term
+                if text not in found:
+                    found[text] = (text, frequency, distance)
+
+        add(self.complete(query, limit))
+        if head and last:
+            add(self.complete(last, limit), head)
+        if fuzzy and len(found) < limit and len(last) >= SUGGEST_FUZZY_MIN_LENGTH:
+            add(self.complete_fuzzy(last, limit), head)
+
+        ranked = sorted(found.values(), key=lambda suggestion: (suggestion[2], -suggestion[1]))
+        return ranked[:limit]
+
+    def save(self, path: str):
+        """Сохранение собранного индекса в файл (через временный файл и переименование)"""
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump({
+                "version": SUGGEST_FORMAT_VERSION,
+                "max_limit": self.max_limit,
+                "digest": self.digest,
+                "terms": self.terms,
+                "frequencies": self.frequencies,
+                "top": self._top,
+                "children": self._children
+            }, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "SuggestIndex":
+        """Загрузка заранее собранного индекса из файла"""
+        with open(path, "rb") as f:
+            data = pickle.load(f)
+
+        if data.get("version") != SUGGEST_FORMAT_VERSION:
+            raise ValueError(f"Неподдерживаемая версия индекса подсказок: {data.get('version')}")
+
+        index = cls.__new__(cls)
+        index.max_limit = data["max_limit"]
+        index.digest = data["digest"]
+        index.terms = data["terms"]
+        index.frequencies = data["frequencies"]
+        index._top = data["top"]
+        index._children = data["children"]
+        return index
+
+
+# Индекс загружается при прогреве моделей; термины search_dictionary приходят
+# из синхронизации доменного словаря и при изменении индекс пересобирается целиком
+suggest_index: Optional[SuggestIndex] = None
+_phrases: Dict[str, int] = {}
+_suggest_lock = threading.Lock()
+
+
+def load_suggest_index() -> SuggestIndex:
+    """Готовый файл SUGGEST_INDEX_PATH или сборка из известных терминов"""
+    if SUGGEST_INDEX_PATH and os.path.exists(SUGGEST_INDEX_PATH):
+        return SuggestIndex.load(SUGGEST_INDEX_PATH)
+
+    index = SuggestIndex(collect_terms(_phrases))
+    if SUGGEST_INDEX_PATH:
+        index.save(SUGGEST_INDEX_PATH)
+    return index
+
+
+def init_suggest_index() -> Optional[str]:
+    """Загрузка индекса подсказок (вызывается реестром моделей)"""
+    global suggest_index
+    with _suggest_lock:
+        if suggest_index is None:
+            suggest_index = load_suggest_index()
+    return f"{len(suggest_index)} terms"
+
+
+model_registry.register("suggest_index", init_suggest_index)
+
+
+def get_suggest_index() -> SuggestIndex:
+    """Индекс подсказок; загружается при первом обращении"""
+    if suggest_index is None:
+        model_registry.ensure("suggest_index")
+    return suggest_index
+
+
+def update_suggest_phrases(phrases: Dict[str, int]) -> bool:
+    """
+    Новые термины search_dictionary: индекс пересобирается и подменяется целиком,
+    если его набор терминов отличается (индекс из файла, собранный по тем же
+    данным, остаётся). Возвращает True, если индекс пересобран
+    """
+    global suggest_index, _phrases
+    with _suggest_lock:
+        _phrases = dict(phrases)
+        if suggest_index is None:
+            return False
+        terms = collect_terms(_phrases)
+        if terms_digest(terms) == suggest_index.digest:
+            return False
+        suggest_index = SuggestIndex(terms, suggest_index.max_limit)
+        return True
@@ -0,0 +1,16 @@
+from nlp_server.app.services import intent_classifier, spell_checker
+from typing import Dict
+
+
+def model_versions() -> Dict[str, str]:
+    """
+    Версии моделей конвейера /process: их показывает /health, по ним же
+    различаются ответы в общем кэше результатов. spell_dictionary — отпечаток
+    содержимого словаря опечаток (меняется при обновлении доменного словаря)
+    """
+    return {
+        "intent_classifier": intent_classifier.model_version or intent_classifier.BASE_MODEL_VERSION,
+        "entity_extractor": "1.0",
+        "spell_checker": "1.0",
+        "spell_dictionary": spell_checker.dictionary_digest()
+    }
@@ -0,0 +1,126 @@
+"""
+Синтетический корпус запросов по закупкам с внесёнными опечатками.
+Корпус детерминирован: одинаковые size, typo_rate и seed дают одинаковые тексты,
+поэтому результаты разных прогонов сравнимы.
+"""
+from itertools import accumulate
+from typing import List
+import random
+
+
+ACTIONS = [
+    "Создай", "Создать", "Добавь", "Измени", "Обнови", "Зарегистрируй",
+    "Найди", "Покажи", "Посмотри", "Открой", "Выведи", "Ищи"
+]
+
+OBJECTS = [
+    "котировочную сессию", "КС", "закупку", "заявку", "тендер", "аукцион",
+    "договор", "контракт", "профиль компании", "электронную подпись", "ЭЦП",
+    "историю закупок", "поставщиков"
+]
+
+PRODUCTS = [
+    "канцелярские товары", "оргтехнику", "мебель для офиса", "ремонт помещений",
+    "уборку помещений", "компьютерное оборудование", "строительные материалы",
+    "медицинские изделия", "услуги связи", "продукты питания"
+]
+
+AMOUNTS = [
+    "на {n} тыс", "на {n} т.р", "на {n} руб", "на сумму {n}", "сумма {n} рублей", ""
+]
+
+SUFFIXES = [
+    "", ". Срочно", " за последний месяц", " для компании Ромашка", " по региону", "!"
+]
+
+TEMPLATES = [
+    "{action} {obj} на поставку {product} {amount}{suffix}",
+    "{action} {obj} {amount} на {product}{suffix}",
+    "{action} {obj}{suffix}",
+    "{action} {obj} по {product}{suffix}",
+    "Нужен продукт для {product}, {amount}{suffix}",
+]
+
+ALPHABET = "абвгдеёжзийклмнопрстуфхцчшщъыьэюя"
+
+
+def inject_typo(word: str, rng: random.Random) -> str:
+    """Одна случайная правка слова: удаление, перестановка, замена или вставка буквы"""
+    if len(word) < 4:
+        return word
+
+    position = rng.randrange(1, len(word) - 1)
+    edit = rng.choice(("delete", "transpose", "replace", "insert"))
+    if edit == "delete":
+        return word[:position] + word[position + 1:]
+    if edit == "transpose":
+        return word[:position] + word[position + 1] + word[position] + word[position + 2:]
+    if edit == "replace":
+        return word[:position] + rng.choice(ALPHABET) + word[position + 1:]
+    return word[:position] + rng.choice(ALPHABET) + word[position:]
+
+
+def make_query(rng: random.Random, typo_rate: float) -> str:
+    """Один запрос по шаблону; каждое слово с вероятностью typo_rate получает опечатку"""
+    text = rng.choice(TEMPLATES).format(
+        action=rng.choice(ACTIONS),
+        obj=rng.choice(OBJECTS),
+        product=rng.choice(PRODUCTS),
+        amount=rng.choice(AMOUNTS).format(n=rng.choice((50, 120, 300, 1500, 15000, 50000))),
+        suffix=rng.choice(SUFFIXES)
+    )
+    words = [
+        inject_typo(word, rng) if word.isalpha() and rng.random() < typo_rate else word
+        for word in text.split()
+    ]
+    return " ".join(words)
+
+
+def generate_corpus(size: int = 1000, typo_rate: float = 0.15, seed: int = 42) -> List[str]:
+    """Детерминированный корпус из size запросов"""
+    rng = random.Random(seed)
+    return [make_query(rng, typo_rate) for _ in range(size)]
+
+
+RECORD_KINDS = [
+    "Поставка", "Закупка", "Оказание услуг по", "Выполнение работ по", "Котировочная сессия на", "Аукцион на"
+]
+
+CATEGORIES = [
+    "Канцелярия", "Оргтехника", "Мебель", "Ремонт", "Клининг", "IT-оборудование",
+    "Стройматериалы", "Медицина", "Связь", "Питание"
+]
+
+SYLLABLES = [
+    "ка", "ро", "ми", "ле", "ст", "ор", "ан", "ве", "ну", "ти", "ск", "ол", "ем", "пр", "ду",
+    "ба", "го", "жи", "зу", "ль", "мо", "не", "пи", "ры", "са", "то", "фе", "ха", "чу", "ше"
+]
+
+
+def generate_records(size: int = 1000, seed: int = 42, vocabulary_size: int = 50000) -> List[dict]:
+    """
+    Детерминированные записи о закупках для поискового индекса: название из вида
+    закупки и товара, описание со словами из длинного хвоста (частоты по закону
+    Ципфа, как в реальных описаниях), категория и сумма
+    """
+    rng = random.Random(seed)
+    words = sorted({
+        "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 5)))
+        for _ in range(vocabulary_size)
+    })
+    # Ранг по частоте не связан с алфавитом
+    rng.shuffle(words)
+    cum_weights = list(accumulate(1 / rank for rank in range(1, len(words) + 1)))
+
+    records = []
+    for record_id in range(size):
+        product_id = rng.randrange(len(PRODUCTS))
+        tail = rng.choices(words, cum_weights=cum_weights, k=rng.randint(5, 20))
+        records.append({
+            "id": str(record_id),
+            "title": f"{rng.choice(RECORD_KINDS)} {PRODUCTS[product_id]}",
+            "description": f"{rng.choice(OBJECTS)} {' '.join(tail)}{rng.choice(SUFFIXES)}",
+            "category": CATEGORIES[product_id],
+            "amount": rng.choice((50, 120, 300, 1500, 15000, 50000)) * 1000 * rng.uniform(0.8, 1.2)
+        })
+    return records
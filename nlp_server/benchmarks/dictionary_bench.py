@@ -0,0 +1,133 @@
+"""
+Память и скорость хранилищ словаря опечаток: SymSpellIndex (словари Python)
+против CompactSpellIndex (файл, отображённый в память). Каждое хранилище
+открывается в отдельном свежем процессе, чтобы замеры памяти не смешивались;
+для compact дополнительно запускается несколько процессов на одном файле,
+чтобы показать долю разделяемых страниц.
+
+Запуск: python -m nlp_server.benchmarks.dictionary_bench [--workers 4] [--output dict.json]
+"""
+from nlp_server.app.services.compact_index import CompactSpellIndex, write_compact_dictionary
+from nlp_server.app.services.memory import process_memory
+from nlp_server.app.services.spell_index import SymSpellIndex
+from nlp_server.benchmarks.corpus import generate_corpus
+from nlp_server.benchmarks.report import environment, write_report
+from typing import Any, Dict, List
+import argparse
+import gc
+import multiprocessing
+import os
+import re
+import tempfile
+import time
+
+
+def _corpus_words(size: int) -> List[str]:
+    """Слова синтетического корпуса (с опечатками) для проверки исправлений"""
+    return [word.lower() for text in generate_corpus(size) for word in re.findall(r"\w+", text) if len(word) >= 2]
+
+
+def _measure(backend: str, path: str, words: List[str], barrier, queue):
+    """Тело процесса замера: открытие словаря, исправление корпуса, память после работы"""
+    gc.collect()
+    before = process_memory()
+
+    started = time.perf_counter()
+    index = CompactSpellIndex.open(path) if backend == "compact" else SymSpellIndex.load(path)
+    load_time = time.perf_counter() - started
+
+    started = time.perf_counter()
+    corrections = [index.correction(word) for word in words]
+    lookup_time = time.perf_counter() - started
+
+    gc.collect()
+    # Все процессы замеряют память одновременно, пока соседи держат словарь открытым
+    barrier.wait()
+    after = process_memory()
+    queue.put({
+        "pid": os.getpid(),
+        "load_s": round(load_time, 3),
+        "correction_us": round(lookup_time / len(words) * 1e6, 2),
+        "memory_mb": after,
+        "memory_delta_mb": {key: round(after[key] - before.get(key, 0), 1) for key in after},
+        "corrections": corrections
+    })
+    barrier.wait()
+
+
+def _run_backend(backend: str, path: str, words: List[str], workers: int) -> List[Dict[str, Any]]:
+    """Запуск workers независимых процессов (spawn, без fork) на одном хранилище"""
+    context = multiprocessing.get_context("spawn")
+    barrier = context.Barrier(workers)
+    queue = context.Queue()
+    processes = [
+        context.Process(target=_measure, args=(backend, path, words, barrier, queue))
+        for _ in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    results = [queue.get() for _ in processes]
+    for process in processes:
+        process.join()
+    return results
+
+
+def run(workers: int = 2, size: int = 300) -> Dict[str, Any]:
+    """Сборка обоих файлов из одного словаря и замер каждого хранилища"""
+    from nlp_server.app.services.spell_checker import dictionary_frequencies
+
+    words = _corpus_words(size)
+    frequencies = dictionary_frequencies()
+
+    with tempfile.TemporaryDirectory() as directory:
+        pickle_path = os.path.join(directory, "spell_index.pkl")
+        compact_path = os.path.join(directory, "spell_dictionary.bin")
+        SymSpellIndex(frequencies).save(pickle_path)
+        write_compact_dictionary(frequencies, compact_path)
+
+        results: Dict[str, Any] = {"words": len(frequencies), "lookups": len(words)}
+        runs = {}
+        for backend, path in (("symspell", pickle_path), ("compact", compact_path)):
+            runs[backend] = _run_backend(backend, path, words, workers)
+            results[backend] = {
+                "file_mb": round(os.path.getsize(path) / 2 ** 20, 1),
+                "processes": [
+                    {key: value for key, value in measured.items() if key != "corrections"}
+                    for measured in runs[backend]
+                ]
+            }
+
+    reference = runs["symspell"][0]["corrections"]
+    results["mismatches"] = sum(
+        1 for measured in runs["compact"] for a, b in zip(reference, measured["corrections"]) if a != b
+    )
+
+    # Экономия резидентной памяти на процесс: прирост rss/pss после загрузки словаря
+    for key in ("rss", "pss", "private"):
+        symspell = [measured["memory_delta_mb"].get(key) for measured in results["symspell"]["processes"]]
+        compact = [measured["memory_delta_mb"].get(key) for measured in results["compact"]["processes"]]
+        if None in symspell or None in compact:
+            continue
+        results.setdefault("savings_per_process_mb", {})[key] = round(
+            sum(symspell) / len(symspell) - sum(compact) / len(compact), 1
+        )
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Память хранилищ словаря опечаток")
+    parser.add_argument("--workers", type=int, default=2, help="Процессов на одно хранилище")
+    parser.add_argument("--size", type=int, default=300, help="Запросов корпуса для проверки исправлений")
+    parser.add_argument("--output", default="", help="Файл для JSON-отчёта (по умолчанию stdout)")
+    args = parser.parse_args()
+
+    write_report({
+        "benchmark": "dictionary",
+        "environment": environment(),
+        "params": {"workers": args.workers, "size": args.size},
+        "results": run(args.workers, args.size)
+    }, args.output)
+
+
+if __name__ == "__main__":
+    main()
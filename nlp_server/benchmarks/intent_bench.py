@@ -0,0 +1,96 @@
+"""
+Сравнение движков классификации намерений: конвейер TF-IDF + LogisticRegression
+против HashingIntentModel (хэширование n-грамм слов и символов, плотный вектор
+коэффициентов). Оба обучаются на исходной выборке; замеряются качество
+(перекрёстная проверка), размер файла модели, задержка одиночного вызова
+predict_proba и пропускная способность на пачках разного размера.
+
+Запуск: python -m nlp_server.benchmarks.intent_bench [--batch-sizes 1 100 1000 5000] [--output intent.json]
+"""
+from nlp_server.app.services.intent_classifier import TRAIN_LABELS, TRAIN_TEXTS, build_intent_pipeline
+from nlp_server.benchmarks.corpus import generate_corpus
+from nlp_server.benchmarks.report import environment, summarize, write_report
+from sklearn.model_selection import StratifiedKFold, cross_val_score
+from typing import Any, Dict, List
+import argparse
+import io
+import joblib
+import numpy as np
+import time
+
+
+ENGINES = ("tfidf", "hashing")
+
+
+def _model_size(model) -> int:
+    """Размер сериализованной модели, байт"""
+    buffer = io.BytesIO()
+    joblib.dump(model, buffer)
+    return buffer.tell()
+
+
+def _time_batches(model, texts: List[str], batch_size: int, repeats: int) -> Dict[str, float]:
+    """Задержка predict_proba на пачку и пропускная способность, текстов в секунду"""
+    batch = (texts * (batch_size // len(texts) + 1))[:batch_size]
+    model.predict_proba(batch)
+
+    latencies = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        model.predict_proba(batch)
+        latencies.append(time.perf_counter() - started)
+
+    summary = summarize(latencies)
+    summary["texts_per_s"] = round(batch_size / (sum(latencies) / len(latencies)), 1)
+    return summary
+
+
+def run(batch_sizes: List[int], size: int = 500, repeats: int = 20, seed: int = 42) -> Dict[str, Any]:
+    """Обучение обоих движков и замеры на одном корпусе"""
+    texts = generate_corpus(size, seed=seed)
+    folds = StratifiedKFold(n_splits=5, shuffle=True, random_state=42)
+
+    results: Dict[str, Any] = {}
+    predictions = {}
+    for engine in ENGINES:
+        started = time.perf_counter()
+        model = build_intent_pipeline(engine).fit(TRAIN_TEXTS, TRAIN_LABELS)
+        train_time = time.perf_counter() - started
+
+        predictions[engine] = model.predict(texts)
+        results[engine] = {
+            "train_ms": round(train_time * 1000, 2),
+            "cv_accuracy": round(float(cross_val_score(
+                build_intent_pipeline(engine), TRAIN_TEXTS, TRAIN_LABELS, cv=folds
+            ).mean()), 4),
+            "model_kb": round(_model_size(model) / 1024, 1),
+            "batches": {
+                str(batch_size): _time_batches(model, texts, batch_size, repeats)
+                for batch_size in batch_sizes
+            }
+        }
+
+    # Доля запросов корпуса, на которых движки выбирают одно намерение
+    results["agreement"] = round(float(np.mean(predictions["tfidf"] == predictions["hashing"])), 4)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Сравнение движков классификации намерений")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 100, 1000, 5000])
+    parser.add_argument("--size", type=int, default=500, help="Число запросов в корпусе")
+    parser.add_argument("--repeats", type=int, default=20, help="Повторов на каждый размер пачки")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default="", help="Файл для JSON-отчёта (по умолчанию stdout)")
+    args = parser.parse_args()
+
+    write_report({
+        "benchmark": "intent",
+        "environment": environment(),
+        "params": vars(args),
+        "results": run(args.batch_sizes, args.size, args.repeats, args.seed)
+    }, args.output)
+
+
+if __name__ == "__main__":
+    main()
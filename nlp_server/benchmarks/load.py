@@ -0,0 +1,143 @@
+"""
+Асинхронный генератор нагрузки: N одновременных клиентов по замкнутому циклу
+отправляют запросы к эндпоинту, для каждого уровня параллелизма считаются
+p50/p95/p99 задержки и число запросов в секунду.
+
+По умолчанию приложение FastAPI вызывается в том же процессе через
+httpx.ASGITransport (без сети); с --url нагрузка идёт на запущенный сервер.
+Нужен пакет httpx.
+
+Запуск: python -m nlp_server.benchmarks.load [--concurrency 1 8 32] [--requests 500]
+"""
+from collections import Counter
+from nlp_server.benchmarks.corpus import generate_corpus
+from nlp_server.benchmarks.report import environment, summarize, write_report
+from typing import Any, Dict, List, Optional
+import argparse
+import asyncio
+import httpx
+import itertools
+import time
+
+
+# Эндпоинт -> (путь, передача текста: в JSON-теле или в параметре запроса)
+ENDPOINTS = {
+    "process": ("/process/", "json"),
+    "spellcheck": ("/spellcheck/", "params"),
+}
+
+
+async def run_level(
+    client: httpx.AsyncClient,
+    endpoint: str,
+    texts: List[str],
+    concurrency: int,
+    total_requests: int
+) -> Dict[str, Any]:
+    """Один уровень параллелизма: concurrency клиентов делят total_requests запросов"""
+    path, mode = ENDPOINTS[endpoint]
+    payloads = itertools.cycle(texts)
+    remaining = total_requests
+    latencies: List[float] = []
+    statuses: Counter = Counter()
+
+    async def worker():
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            text = next(payloads)
+            started = time.perf_counter()
+            try:
+                response = await client.post(path, **{mode: {"text": text}})
+                statuses[str(response.status_code)] += 1
+            except httpx.HTTPError as e:
+                statuses[type(e).__name__] += 1
+                continue
+            if response.status_code == 200:
+                latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    summary = summarize(latencies)
+    summary["rps"] = round(len(latencies) / elapsed, 1) if elapsed else 0.0
+    summary["statuses"] = dict(statuses)
+    return summary
+
+
+async def run_load(
+    endpoint: str = "process",
+    concurrency_levels: Optional[List[int]] = None,
+    total_requests: int = 500,
+    warmup_requests: int = 50,
+    url: str = "",
+    size: int = 1000,
+    seed: int = 42
+) -> Dict[str, Any]:
+    """Прогон всех уровней параллелизма против приложения в процессе или сервера по url"""
+    concurrency_levels = concurrency_levels or [1, 8, 32]
+    texts = generate_corpus(size, seed=seed)
+
+    reset_caches = None
+    if url:
+        transport = None
+        base_url = url
+    else:
+        # Приложение в этом же процессе: модели загружаются заранее, как при blocking-прогреве
+        from nlp_server.app.main import app
+        from nlp_server.app.services.model_registry import model_registry
+        from nlp_server.app.services.spell_checker import invalidate_spell_caches
+        model_registry.load_all()
+        reset_caches = invalidate_spell_caches
+        transport = httpx.ASGITransport(app=app)
+        base_url = "http://benchmark"
+
+    limits = httpx.Limits(max_connections=max(concurrency_levels))
+    async with httpx.AsyncClient(transport=transport, base_url=base_url, limits=limits, timeout=60) as client:
+        if warmup_requests:
+            await run_level(client, endpoint, texts, min(concurrency_levels), warmup_requests)
+
+        results = {}
+        for concurrency in concurrency_levels:
+            # Каждый уровень начинается с пустых кэшей, иначе поздние уровни получают фору
+            if reset_caches is not None:
+                reset_caches()
+            results[f"concurrency_{concurrency}"] = await run_level(
+                client, endpoint, texts, concurrency, total_requests
+            )
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Генератор нагрузки для NLP-сервера")
+    parser.add_argument("--endpoint", choices=sorted(ENDPOINTS), default="process")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--requests", type=int, default=500, help="Запросов на каждый уровень")
+    parser.add_argument("--warmup", type=int, default=50, help="Запросов на прогрев перед замерами")
+    parser.add_argument("--url", default="", help="Адрес запущенного сервера (по умолчанию — в процессе)")
+    parser.add_argument("--size", type=int, default=1000, help="Число запросов в корпусе")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default="", help="Файл для JSON-отчёта (по умолчанию stdout)")
+    args = parser.parse_args()
+
+    results = asyncio.run(run_load(
+        args.endpoint, args.concurrency, args.requests, args.warmup, args.url, args.size, args.seed
+    ))
+    write_report({
+        "benchmark": "load",
+        "environment": environment(),
+        "params": {
+            "endpoint": args.endpoint,
+            "concurrency": args.concurrency,
+            "requests": args.requests,
+            "target": args.url or "in-process",
+            "size": args.size,
+            "seed": args.seed
+        },
+        "results": results
+    }, args.output)
+
+
+if __name__ == "__main__":
+    main()
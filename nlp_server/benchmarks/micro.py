@@ -0,0 +1,106 @@
+"""
+Микробенчмарки сервисов на синтетическом корпусе запросов: correct_spelling
+(с холодными и прогретыми кэшами), classify_intent, extract_entities_regex,
+extract_entities_spacy, подсказки /suggest по префиксам запросов и полный
+конвейер /process без HTTP-слоя (с PROCESS_CACHE_PATH — ещё и повторно, из
+общего кэша ответов).
+
+Запуск: python -m nlp_server.benchmarks.micro [--size 500] [--output micro.json]
+"""
+from nlp_server.app.models.process_text_model import ProcessTextRequest
+from nlp_server.app.routers.process.router import process_text
+from nlp_server.app.services import spell_checker
+from nlp_server.app.services.entity_extraction import extract_entities_regex, extract_entities_spacy
+from nlp_server.app.services.intent_classifier import classify_intent
+from nlp_server.app.services.model_registry import model_registry
+from nlp_server.app.services.result_cache import result_cache
+from nlp_server.app.services.suggest import get_suggest_index
+from nlp_server.benchmarks.corpus import generate_corpus
+from nlp_server.benchmarks.report import environment, summarize, write_report
+from typing import Any, Callable, Dict, List
+import argparse
+import asyncio
+import time
+
+
+def time_calls(func: Callable[[str], Any], texts: List[str]) -> Dict[str, float]:
+    """Задержка каждого вызова func и пропускная способность при последовательных вызовах"""
+    latencies = []
+    started = time.perf_counter()
+    for text in texts:
+        call_started = time.perf_counter()
+        func(text)
+        latencies.append(time.perf_counter() - call_started)
+    elapsed = time.perf_counter() - started
+
+    summary = summarize(latencies)
+    summary["calls_per_s"] = round(len(texts) / elapsed, 1)
+    return summary
+
+
+async def _time_pipeline(texts: List[str]) -> Dict[str, float]:
+    """Полный конвейер /process для каждого текста по очереди"""
+    latencies = []
+    started = time.perf_counter()
+    for text in texts:
+        call_started = time.perf_counter()
+        await process_text(ProcessTextRequest(text=text))
+        latencies.append(time.perf_counter() - call_started)
+    elapsed = time.perf_counter() - started
+
+    summary = summarize(latencies)
+    summary["calls_per_s"] = round(len(texts) / elapsed, 1)
+    return summary
+
+
+def run(size: int = 500, typo_rate: float = 0.15, seed: int = 42) -> Dict[str, Any]:
+    """Замер всех этапов на одном корпусе; модели загружаются до замеров"""
+    texts = generate_corpus(size, typo_rate, seed)
+
+    started = time.perf_counter()
+    model_registry.load_all()
+    load_time = time.perf_counter() - started
+
+    results: Dict[str, Any] = {"model_load_s": round(load_time, 3), "models": model_registry.status()}
+
+    # Холодный прогон: кэши исправлений пусты; прогретый — те же тексты повторно
+    spell_checker.invalidate_spell_caches()
+    results["correct_spelling_cold"] = time_calls(spell_checker.correct_spelling, texts)
+    results["correct_spelling_warm"] = time_calls(spell_checker.correct_spelling, texts)
+
+    results["classify_intent"] = time_calls(classify_intent, texts)
+    results["extract_entities_regex"] = time_calls(extract_entities_regex, texts)
+    results["extract_entities_spacy"] = time_calls(extract_entities_spacy, texts)
+
+    # Префиксы как при наборе: начало первого слова, начало запроса, два слова
+    prefixes = [text[:length] for text in texts for length in (2, 5, 12)]
+    results["suggest"] = time_calls(get_suggest_index().suggest, prefixes)
+
+    spell_checker.invalidate_spell_caches()
+    results["process_pipeline"] = asyncio.run(_time_pipeline(texts))
+
+    # С PROCESS_CACHE_PATH повторный прогон отвечает из общего кэша ответов
+    if result_cache.enabled:
+        results["process_pipeline_cached"] = asyncio.run(_time_pipeline(texts))
+        results["process_cache"] = result_cache.stats()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Микробенчмарки сервисов NLP")
+    parser.add_argument("--size", type=int, default=500, help="Число запросов в корпусе")
+    parser.add_argument("--typo-rate", type=float, default=0.15, help="Доля слов с опечатками")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default="", help="Файл для JSON-отчёта (по умолчанию stdout)")
+    args = parser.parse_args()
+
+    write_report({
+        "benchmark": "micro",
+        "environment": environment(),
+        "params": {"size": args.size, "typo_rate": args.typo_rate, "seed": args.seed},
+        "results": run(args.size, args.typo_rate, args.seed)
+    }, args.output)
+
+
+if __name__ == "__main__":
+    main()
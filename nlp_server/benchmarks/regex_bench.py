@@ -0,0 +1,90 @@
+"""
+Микробенчмарк регулярных выражений: прежняя реализация (re.search по строковым
+шаблонам на каждый запрос) против предкомпилированных выражений.
+
+Запуск: python -m nlp_server.benchmarks.regex_bench
+"""
+from nlp_server.app.services.entity_extraction import extract_entities_regex
+from nlp_server.app.services.spell_checker import tokenize
+from typing import Any, Dict, List
+import json
+import re
+import timeit
+
+
+TEXTS = [
+    "Создай КС на 300 тыс на канцелярские товары",
+    "Найди котировочную сессию по оргтехнике на сумму 50000",
+    "Добавь ЭЦП для новой компании",
+    "Создай закупку на поставку мебели для офиса. Срочно",
+    "Покажи историю закупок за последний месяц на 1200 руб",
+    "Нужен продукт для уборки помещений, сумма 15000 рублей",
+]
+
+
+def legacy_extract_entities_regex(text: str) -> Dict[str, Any]:
+    """Прежняя реализация extract_entities_regex"""
+    entities = {}
+
+    money_patterns = [
+        r'(\d+)\s*тыс',
+        r'(\d+)\s*т\.р',
+        r'на\s+(\d+)\s+руб',
+        r'сумм[аой]\s+(\d+)'
+    ]
+
+    for pattern in money_patterns:
+        match = re.search(pattern, text, re.IGNORECASE)
+        if match:
+            amount = int(match.group(1))
+            if 'тыс' in pattern or 'т.р' in pattern:
+                amount *= 1000
+            entities["sum"] = amount
+            break
+
+    product_keywords = ['на поставку', 'на закупку', 'товар', 'продукт']
+    for keyword in product_keywords:
+        if keyword in text.lower():
+            start_idx = text.lower().find(keyword) + len(keyword)
+            product_text = text[start_idx:].split('.')[0].split(' на ')[0].strip()
+            if product_text and len(product_text) > 2:
+                entities["product"] = product_text
+                break
+
+    return entities
+
+
+def legacy_tokenize(text: str) -> List[str]:
+    """Прежняя токенизация correct_spelling с повторной проверкой каждого токена"""
+    words = re.findall(r'\b\w+\b|[^\w\s]', text)
+    return [word for word in words if re.match(r'\w+', word)]
+
+
+def _per_call_us(func, number: int) -> float:
+    """Среднее время одного вызова func на всех TEXTS, мкс"""
+    total = min(timeit.repeat(lambda: [func(text) for text in TEXTS], number=number, repeat=5))
+    return total / (number * len(TEXTS)) * 1e6
+
+
+def run(number: int = 2000) -> Dict[str, Any]:
+    """Замер прежней и новой реализации"""
+    for text in TEXTS:
+        assert legacy_extract_entities_regex(text) == extract_entities_regex(text)
+
+    results = {}
+    for name, legacy, current in [
+        ("extract_entities_regex", legacy_extract_entities_regex, extract_entities_regex),
+        ("tokenize", legacy_tokenize, tokenize),
+    ]:
+        legacy_us = _per_call_us(legacy, number)
+        current_us = _per_call_us(current, number)
+        results[name] = {
+            "legacy_us": round(legacy_us, 3),
+            "compiled_us": round(current_us, 3),
+            "speedup": round(legacy_us / current_us, 2)
+        }
+    return results
+
+
+if __name__ == "__main__":
+    print(json.dumps(run(), indent=2, ensure_ascii=False))
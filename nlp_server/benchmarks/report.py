@@ -0,0 +1,111 @@
+"""
+Общие функции бенчмарков: сводка задержек, сведения об окружении,
+запись результатов в JSON и сравнение двух прогонов.
+"""
+from typing import Any, Dict, List, Sequence
+import json
+import os
+import platform
+import subprocess
+import time
+
+
+def percentile(sorted_values: Sequence[float], q: float) -> float:
+    """Перцентиль q (0..100) по отсортированной выборке, с линейной интерполяцией"""
+    if not sorted_values:
+        return 0.0
+    position = (len(sorted_values) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+
+def summarize(latencies_s: List[float]) -> Dict[str, float]:
+    """Сводка задержек в миллисекундах"""
+    values = sorted(latencies_s)
+    if not values:
+        return {"count": 0}
+    return {
+        "count": len(values),
+        "mean_ms": round(sum(values) / len(values) * 1000, 3),
+        "p50_ms": round(percentile(values, 50) * 1000, 3),
+        "p95_ms": round(percentile(values, 95) * 1000, 3),
+        "p99_ms": round(percentile(values, 99) * 1000, 3),
+        "max_ms": round(values[-1] * 1000, 3)
+    }
+
+
+def _git_revision() -> str:
+    """Текущий коммит репозитория (пусто, если git недоступен)"""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def environment() -> Dict[str, Any]:
+    """Сведения о прогоне, без которых результаты нельзя сравнивать"""
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "git_revision": _git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count()
+    }
+
+
+def write_report(report: Dict[str, Any], path: str = ""):
+    """Вывод отчёта в файл path или в stdout"""
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if path:
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+def _is_throughput(key: str) -> bool:
+    """Метрика пропускной способности: чем больше, тем лучше"""
+    return key == "rps" or key.endswith("_per_s")
+
+
+def _metrics(report: Dict[str, Any], prefix: str = "") -> Dict[str, float]:
+    """Плоский словарь метрик задержки и пропускной способности: путь -> значение"""
+    metrics = {}
+    for key, value in report.items():
+        path = f"{prefix}.{key}" if prefix else key
+        if isinstance(value, dict):
+            metrics.update(_metrics(value, path))
+        elif (key.endswith("_ms") or key.endswith("_us") or _is_throughput(key)) and isinstance(value, (int, float)):
+            metrics[path] = value
+    return metrics
+
+
+def compare_reports(baseline: Dict[str, Any], current: Dict[str, Any], threshold: float = 0.1) -> List[Dict[str, Any]]:
+    """
+    Метрики, ухудшившиеся относительно baseline больше чем на threshold (доля):
+    задержка выросла или пропускная способность упала. Пустой список — регрессий нет
+    """
+    old = _metrics(baseline.get("results", baseline))
+    new = _metrics(current.get("results", current))
+
+    regressions = []
+    for path, value in new.items():
+        previous = old.get(path)
+        if not previous:
+            continue
+        change = (value - previous) / previous
+        if _is_throughput(path.rsplit(".", 1)[-1]):
+            change = -change
+        if change > threshold:
+            regressions.append({
+                "metric": path,
+                "baseline": previous,
+                "current": value,
+                "change": round(change, 3)
+            })
+    return regressions
@@ -0,0 +1,139 @@
+"""
+Поисковый индекс BM25 на синтетических записях о закупках: скорость сборки
+сегментами и слияния, память процесса, размер и время записи/открытия снимка,
+задержка поиска (без фильтров, с фильтром по сумме и по товару из сущностей
+запроса) и добавление записей в готовый индекс.
+
+Запуск: python -m nlp_server.benchmarks.search_bench [--size 1000000] [--output search.json]
+"""
+from nlp_server.app.services.entity_extraction import extract_entities_regex
+from nlp_server.app.services.memory import process_memory
+from nlp_server.app.services.search import search_filters
+from nlp_server.app.services.search_index import SEGMENT_ARRAYS, SearchIndex, Vocabulary
+from nlp_server.benchmarks.corpus import generate_corpus, generate_records
+from nlp_server.benchmarks.report import environment, summarize, write_report
+from typing import Any, Dict, List
+import argparse
+import gc
+import os
+import tempfile
+import time
+
+
+def _directory_size(path: str) -> int:
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(path) for name in names)
+
+
+def _time_queries(index: SearchIndex, queries: List[str], with_filters: str) -> Dict[str, Any]:
+    """Задержка index.search по каждому запросу; with_filters: none, sum или product"""
+    latencies = []
+    matched = 0
+    for query in queries:
+        filters = search_filters(extract_entities_regex(query)) if with_filters != "none" else {}
+        kwargs: Dict[str, Any] = {}
+        if with_filters == "sum":
+            kwargs = {"min_amount": filters.get("min_amount"), "max_amount": filters.get("max_amount")}
+        elif with_filters == "product" and filters.get("product"):
+            kwargs = {"any_terms": [filters["product"]]}
+
+        started = time.perf_counter()
+        _, total = index.search(query, 10, **kwargs)
+        latencies.append(time.perf_counter() - started)
+        matched += total
+
+    summary = summarize(latencies)
+    summary["mean_matched"] = round(matched / len(queries), 1)
+    return summary
+
+
+def run(size: int = 1000000, segment_size: int = 100000, queries: int = 300, seed: int = 42) -> Dict[str, Any]:
+    """Сборка индекса из size записей и замеры на нём"""
+    results: Dict[str, Any] = {}
+    records = generate_records(size, seed)
+    gc.collect()
+    before = process_memory()
+
+    index = SearchIndex(Vocabulary())
+    started = time.perf_counter()
+    for start in range(0, size, segment_size):
+        index = index.add_documents(records[start:start + segment_size])
+    build_time = time.perf_counter() - started
+
+    started = time.perf_counter()
+    index = index.optimize()
+    merge_time = time.perf_counter() - started
+
+    extra = generate_records(1000, seed + 1)
+    del records
+    gc.collect()
+    after = process_memory()
+
+    results["build"] = {
+        "documents": len(index),
+        "terms": len(index.vocabulary),
+        "postings": int(sum(len(segment.postings) for segment in index.segments)),
+        "build_s": round(build_time, 2),
+        "docs_per_s": round(size / build_time, 1),
+        "merge_s": round(merge_time, 2),
+        # Массивы сегментов; разница памяти процесса меньше — освобождённые записи
+        # корпуса остаются во владении аллокатора и переиспользуются индексом
+        "arrays_mb": round(sum(
+            getattr(segment, name).nbytes for segment in index.segments for name in SEGMENT_ARRAYS
+        ) / 2 ** 20, 1),
+        "memory_delta_mb": {key: round(after[key] - before.get(key, 0), 1) for key in after}
+    }
+
+    texts = generate_corpus(queries, seed=seed)
+    results["search"] = {mode: _time_queries(index, texts, mode) for mode in ("none", "sum", "product")}
+
+    with tempfile.TemporaryDirectory() as directory:
+        started = time.perf_counter()
+        index.save(directory)
+        save_time = time.perf_counter() - started
+
+        started = time.perf_counter()
+        opened = SearchIndex.open(directory)
+        open_time = time.perf_counter() - started
+
+        results["snapshot"] = {
+            "size_mb": round(_directory_size(directory) / 2 ** 20, 1),
+            "save_s": round(save_time, 2),
+            "open_s": round(open_time, 3),
+            "search_after_open": _time_queries(opened, texts, "none")
+        }
+
+        # Добавление в открытый снимок: новый сегмент и дозапись снимка
+        started = time.perf_counter()
+        updated = opened.add_documents(extra)
+        add_time = time.perf_counter() - started
+        started = time.perf_counter()
+        updated.save(directory)
+        results["incremental_add"] = {
+            "documents": len(extra),
+            "add_ms": round(add_time * 1000, 1),
+            "snapshot_ms": round((time.perf_counter() - started) * 1000, 1),
+            "segments": len(updated.segments),
+            "search": _time_queries(updated, texts, "none")
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк поискового индекса BM25")
+    parser.add_argument("--size", type=int, default=1000000, help="Число записей")
+    parser.add_argument("--segment-size", type=int, default=100000, help="Записей в сегменте при сборке")
+    parser.add_argument("--queries", type=int, default=300, help="Число запросов")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default="", help="Файл для JSON-отчёта (по умолчанию stdout)")
+    args = parser.parse_args()
+
+    write_report({
+        "benchmark": "search",
+        "environment": environment(),
+        "params": vars(args),
+        "results": run(args.size, args.segment_size, args.queries, args.seed)
+    }, args.output)
+
+
+if __name__ == "__main__":
+    main()
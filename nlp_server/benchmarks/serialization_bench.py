@@ -0,0 +1,185 @@
+"""
+Сериализация больших ответов массовых эндпоинтов: прежний путь (сервис строит
+модели Pydantic, роутер копирует результаты в модели ответа, FastAPI проверяет
+ответ по response_model и сериализует через json) против внутренних результатов
+(dataclass), сериализованных один раз. Замеряются /spellcheck/bulk и строки NDJSON
+/process/bulk на 10 000 элементов; результаты NLP-этапов готовятся заранее, так что
+в замер входит только работа с объектами и JSON. Отдельно — /spellcheck/bulk через
+HTTP-слой целиком с прогретыми кэшами исправлений.
+
+Запуск: python -m nlp_server.benchmarks.serialization_bench [--items 10000] [--output serialization.json]
+"""
+from functools import lru_cache
+from nlp_server.app.models.spell_checker_model import BulkSpellCheckResponse, CorrectSpellingResponse, SpellCheckResult
+from nlp_server.app.models.process_text_model import PROCESS_TASKS, ProcessTextResponse
+from nlp_server.app.services import serialization
+from nlp_server.app.services.model_registry import model_registry
+from nlp_server.app.services.pipeline import process_texts
+from nlp_server.app.services.serialization import FastJSONResponse, dumps
+from nlp_server.app.services.spell_batch import correct_spelling_batch
+from nlp_server.benchmarks.corpus import generate_corpus
+from nlp_server.benchmarks.report import environment, summarize, write_report
+from pydantic import BaseModel, TypeAdapter
+from typing import Any, Callable, Dict, List
+import argparse
+import json
+import time
+
+
+def legacy_spellcheck_bulk(results: List[Any], total: int) -> bytes:
+    """
+    Прежний /spellcheck/bulk: correct_spelling_batch строил CorrectSpellingResponse
+    и копировал его в SpellCheckResult, роутер собирал BulkSpellCheckResponse,
+    FastAPI проверял его по response_model и отдавал JSONResponse
+    """
+    copies = []
+    for result in results:
+        response = CorrectSpellingResponse(
+            original_text=result.original_text,
+            corrected_text=result.corrected_text,
+            corrections=result.corrections,
+            confidence=result.confidence
+        )
+        copies.append(SpellCheckResult(
+            original_text=response.original_text,
+            corrected_text=response.corrected_text,
+            corrections=response.corrections,
+            confidence=response.confidence
+        ))
+    failed = sum(1 for result in copies if result.error is not None)
+    response = BulkSpellCheckResponse(
+        results=copies, total_processed=total, successful=len(copies) - failed, failed=failed
+    )
+    return _legacy_render(BulkSpellCheckResponse, response)
+
+
+def legacy_process_lines(results: List[Dict[str, Any]]) -> bytes:
+    """Прежние строки NDJSON /process/bulk: json.dumps на каждый результат"""
+    return "".join(json.dumps(result, ensure_ascii=False) + "\n" for result in results).encode("utf-8")
+
+
+def legacy_process_responses(results: List[Dict[str, Any]]) -> List[bytes]:
+    """Прежний /process для каждого результата: проверка по ProcessTextResponse и JSONResponse"""
+    return [_legacy_render(ProcessTextResponse, result) for result in results]
+
+
+@lru_cache(maxsize=None)
+def _adapter(model: Any) -> TypeAdapter:
+    return TypeAdapter(model)
+
+
+def _legacy_render(model: Any, content: Any) -> bytes:
+    """
+    Как FastAPI с response_model: модель Pydantic превращается в словарь, словарь
+    заново проверяется по response_model, выдаётся в JSON-совместимых типах
+    и сериализуется json.dumps в JSONResponse
+    """
+    if isinstance(content, BaseModel):
+        content = content.model_dump(by_alias=True)
+    adapter = _adapter(model)
+    value = adapter.dump_python(adapter.validate_python(content), mode="json")
+    return json.dumps(value, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+def current_spellcheck_bulk(results: List[Any], total: int) -> bytes:
+    failed = sum(1 for result in results if result.error is not None)
+    return FastJSONResponse({
+        "results": results, "total_processed": total, "successful": len(results) - failed, "failed": failed
+    }).body
+
+
+def current_process_lines(results: List[Dict[str, Any]]) -> bytes:
+    return b"".join(dumps(result) + b"\n" for result in results)
+
+
+def current_process_responses(results: List[Dict[str, Any]]) -> List[bytes]:
+    return [FastJSONResponse(result).body for result in results]
+
+
+def _time(func: Callable[[], Any], repeat: int) -> Dict[str, float]:
+    latencies = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        latencies.append(time.perf_counter() - started)
+    return summarize(latencies)
+
+
+def _compare(legacy: Callable[[], Any], current: Callable[[], Any], repeat: int) -> Dict[str, Any]:
+    legacy_time = _time(legacy, repeat)
+    current_time = _time(current, repeat)
+    return {
+        "legacy": legacy_time,
+        "current": current_time,
+        "speedup": round(legacy_time["p50_ms"] / current_time["p50_ms"], 1) if current_time["p50_ms"] else None
+    }
+
+
+def _time_http(texts: List[str], repeat: int) -> Dict[str, float]:
+    """POST /spellcheck/bulk через TestClient: разбор запроса, проверка и ответ целиком"""
+    from fastapi.testclient import TestClient
+    from nlp_server.app.main import app
+
+    with TestClient(app) as client:
+        client.post("/spellcheck/bulk", json={"texts": texts})
+        latencies = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            response = client.post("/spellcheck/bulk", json={"texts": texts})
+            latencies.append(time.perf_counter() - started)
+            response.raise_for_status()
+    return summarize(latencies)
+
+
+def run(items: int = 10000, repeat: int = 10, seed: int = 42) -> Dict[str, Any]:
+    """Замер обоих путей на одинаковых результатах; модели загружаются до замеров"""
+    model_registry.load_all()
+    texts = generate_corpus(items, seed=seed)
+    spell_results = correct_spelling_batch(texts)
+    process_results = process_texts(texts, PROCESS_TASKS)
+
+    # Оба пути отдают одинаковые данные
+    assert json.loads(legacy_spellcheck_bulk(spell_results, items)) == json.loads(current_spellcheck_bulk(spell_results, items))
+    assert [json.loads(line) for line in legacy_process_lines(process_results).splitlines()] == [
+        json.loads(line) for line in current_process_lines(process_results).splitlines()
+    ]
+
+    return {
+        "encoder": "orjson" if serialization.orjson is not None else "json",
+        "spellcheck_bulk": _compare(
+            lambda: legacy_spellcheck_bulk(spell_results, items),
+            lambda: current_spellcheck_bulk(spell_results, items),
+            repeat
+        ),
+        "process_bulk_ndjson": _compare(
+            lambda: legacy_process_lines(process_results),
+            lambda: current_process_lines(process_results),
+            repeat
+        ),
+        "process_single_responses": _compare(
+            lambda: legacy_process_responses(process_results),
+            lambda: current_process_responses(process_results),
+            repeat
+        ),
+        "spellcheck_bulk_http": _time_http(texts, max(1, repeat // 2))
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Сериализация ответов массовых эндпоинтов")
+    parser.add_argument("--items", type=int, default=10000, help="Элементов в одном ответе")
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default="", help="Файл для JSON-отчёта (по умолчанию stdout)")
+    args = parser.parse_args()
+
+    write_report({
+        "benchmark": "serialization",
+        "environment": environment(),
+        "params": {"items": args.items, "repeat": args.repeat, "seed": args.seed},
+        "results": run(args.items, args.repeat, args.seed)
+    }, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""
+Полный прогон бенчмарков: микробенчмарки сервисов и нагрузка на /process.
+С --baseline результаты сравниваются с прошлым отчётом, и при регрессии
+больше --threshold процесс завершается с кодом 1.
+
+Запуск: python -m nlp_server.benchmarks.suite --output run.json [--baseline prev.json]
+"""
+from nlp_server.benchmarks import load, micro
+from nlp_server.benchmarks.report import compare_reports, environment, write_report
+import argparse
+import asyncio
+import json
+import sys
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарки NLP-сервера")
+    parser.add_argument("--size", type=int, default=500, help="Число запросов в корпусе")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--requests", type=int, default=500, help="Запросов на каждый уровень нагрузки")
+    parser.add_argument("--output", default="", help="Файл для JSON-отчёта (по умолчанию stdout)")
+    parser.add_argument("--baseline", default="", help="Прошлый отчёт для сравнения")
+    parser.add_argument("--threshold", type=float, default=0.1, help="Допустимое ухудшение, доля")
+    args = parser.parse_args()
+
+    results = {
+        "micro": micro.run(args.size, seed=args.seed),
+        "load": asyncio.run(load.run_load(
+            concurrency_levels=args.concurrency, total_requests=args.requests, size=args.size, seed=args.seed
+        ))
+    }
+    report = {
+        "benchmark": "suite",
+        "environment": environment(),
+        "params": vars(args),
+        "results": results
+    }
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare_reports(json.load(f), report, args.threshold)
+        report["regressions"] = regressions
+
+    write_report(report, args.output)
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
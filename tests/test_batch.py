@@ -0,0 +1,38 @@
+from nlp_server.app import batch
+import io
+import json
+import os
+import threading
+
+
+def test_stdin_input_without_seek(monkeypatch, tmp_path):
+    lines = ['{"text": "закупка бумаги"}', '{"text": "поставка ноутбуков на сумму 50 тыс"}', "", "не json"]
+    read_fd, write_fd = os.pipe()
+
+    def feed():
+        with os.fdopen(write_fd, "wb") as pipe:
+            pipe.write(("\n".join(lines) + "\n").encode("utf-8"))
+
+    writer = threading.Thread(target=feed)
+    writer.start()
+    with os.fdopen(read_fd, "rb") as stdin:
+        monkeypatch.setattr(batch.sys, "stdin", io.TextIOWrapper(stdin))
+        output = tmp_path / "results.jsonl"
+        summary = batch.run_batch(
+            "-", str(output), ["intent", "entities"], "jsonl", "jsonl",
+            workers=0, chunk_size=2, progress_interval=0
+        )
+    writer.join()
+
+    results = [json.loads(line) for line in output.read_text(encoding="utf-8").splitlines()]
+    assert [result["index"] for result in results] == [0, 1, 2]
+    assert results[1]["entities"]["sum"] == 50000
+    assert "error" in results[2]
+    assert summary["processed"] == 3 and summary["errors"] == 1
+
+
+def test_counting_reader_tracks_bytes():
+    reader = batch.CountingReader(io.BytesIO("первая\nвторая\n".encode("utf-8")))
+
+    assert list(reader) == ["первая\n".encode("utf-8"), "вторая\n".encode("utf-8")]
+    assert reader.position == len("первая\nвторая\n".encode("utf-8"))
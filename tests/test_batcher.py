@@ -0,0 +1,48 @@
+from nlp_server.app.services.batcher import MicroBatcher
+from nlp_server.app.services.executor import BoundedExecutor
+import asyncio
+
+
+def _submit_all(batch_func, items):
+    """Одновременная отправка элементов в батчер; исключения возвращаются как результаты"""
+    async def run():
+        batcher = MicroBatcher("test", batch_func, BoundedExecutor(2, 10), max_batch_size=len(items), max_wait_ms=50)
+        results = await asyncio.gather(*(batcher.submit(item) for item in items), return_exceptions=True)
+        return batcher, results
+
+    return asyncio.run(run())
+
+
+def test_results_are_returned_in_order():
+    batcher, results = _submit_all(lambda items: [item * 2 for item in items], [1, 2, 3])
+
+    assert results == [2, 4, 6]
+    assert batcher.stats()["batch_sizes"] == {3: 1}
+
+
+def test_failing_item_does_not_fail_the_batch():
+    def batch_func(items):
+        if "bad" in items:
+            raise ValueError("bad item")
+        return [item.upper() for item in items]
+
+    batcher, results = _submit_all(batch_func, ["a", "bad", "c"])
+
+    assert results[0] == "A" and results[2] == "C"
+    assert isinstance(results[1], ValueError)
+    assert batcher.stats()["retried_items"] == 3
+
+
+def test_short_result_fails_every_caller():
+    _, results = _submit_all(lambda items: items[:-1], [1, 2, 3])
+
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+
+def test_single_item_error_is_propagated():
+    def batch_func(items):
+        raise KeyError("missing")
+
+    _, results = _submit_all(batch_func, ["x"])
+
+    assert isinstance(results[0], KeyError)
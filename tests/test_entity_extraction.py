@@ -0,0 +1,57 @@
+from nlp_server.app.services import entity_extraction
+from nlp_server.app.services.model_registry import model_registry
+from types import SimpleNamespace
+import pytest
+
+
+class SpyPipeline:
+    """Конвейер spaCy, который запоминает тексты и находит одну организацию"""
+
+    def __init__(self):
+        self.texts = []
+
+    def __call__(self, text):
+        self.texts.append(text)
+        return SimpleNamespace(ents=[SimpleNamespace(label_="ORG", text="Ромашка")])
+
+    def pipe(self, texts, n_process=1, batch_size=None):
+        return [self(text) for text in texts]
+
+
+@pytest.fixture
+def spy(monkeypatch):
+    model_registry.ensure("entity_extractor")
+    pipeline = SpyPipeline()
+    monkeypatch.setattr(entity_extraction, "nlp", pipeline)
+    return pipeline
+
+
+def test_default_settings_request_company():
+    assert "company" in entity_extraction.ENTITY_TYPES
+
+
+def test_spacy_is_skipped_without_company_hints(spy):
+    texts = [
+        "Создай КС на 300 тыс на канцелярские товары",
+        "найди котировочную сессию по оргтехнике на сумму 50000",
+        "Закупка бумаги офисной. Срочно",
+    ]
+
+    single = [entity_extraction.extract_entities(text) for text in texts]
+    batch = entity_extraction.extract_entities_batch(texts, n_process=1)
+
+    assert spy.texts == []
+    assert batch == single
+    assert single[0].entities == {"sum": 300000}
+
+
+@pytest.mark.parametrize("text", [
+    "Закупка бумаги у ООО Ромашка",
+    "Поставка мебели для компании «Ромашка»",
+    "Найди договоры с Ромашкой на 100 тыс",
+])
+def test_spacy_runs_for_company_hints(spy, text):
+    result = entity_extraction.extract_entities(text)
+
+    assert spy.texts == [text]
+    assert result.entities["company"] == "Ромашка"
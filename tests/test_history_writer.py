@@ -0,0 +1,78 @@
+from datetime import datetime, timezone
+from nlp_server.app.services.history_writer import HistoryWriter
+import json
+import os
+
+
+def _writer(tmp_path, batch_size=2):
+    writer = HistoryWriter(None, 10, batch_size, 1.0, str(tmp_path / "spill.jsonl"))
+    writer.inserted = []
+
+    def write(rows):
+        writer.inserted.extend(rows)
+
+    writer._write = write
+    return writer
+
+
+def _row(text):
+    return {
+        "original_query": text,
+        "processed_query": text,
+        "intent": "search",
+        "extracted_entities": {},
+        "create_at": datetime(2026, 1, 1, tzinfo=timezone.utc)
+    }
+
+
+def test_replay_skips_malformed_and_truncated_lines(tmp_path):
+    writer = _writer(tmp_path)
+    writer._spill([_row("первый"), _row("второй")])
+    with open(writer.spill_path, "a", encoding="utf-8") as f:
+        f.write("not json\n")
+        f.write(json.dumps({"original_query": "без даты"}, ensure_ascii=False) + "\n")
+    writer._spill([_row("третий")])
+    # Оборванная последняя строка, как после аварийной остановки
+    with open(writer.spill_path, "a", encoding="utf-8") as f:
+        f.write('{"original_query": "обры')
+
+    assert writer.replay_spilled() == 3
+    assert [row["original_query"] for row in writer.inserted] == ["первый", "второй", "третий"]
+    assert writer.inserted[0]["create_at"] == datetime(2026, 1, 1, tzinfo=timezone.utc)
+    assert writer.dropped == 3
+    assert os.listdir(tmp_path) == []
+
+
+def test_failed_replay_returns_rows_to_spill_file(tmp_path):
+    writer = _writer(tmp_path)
+    writer._spill([_row("первый"), _row("второй"), _row("третий")])
+
+    def fail(rows):
+        raise RuntimeError("database is down")
+
+    writer._write = fail
+    assert writer.replay_spilled() == 0
+    assert writer.errors == 1
+    assert os.listdir(tmp_path) == ["spill.jsonl"]
+
+    writer._write = lambda rows: writer.inserted.extend(rows)
+    assert writer.replay_spilled() == 3
+    assert [row["original_query"] for row in writer.inserted] == ["первый", "второй", "третий"]
+
+
+def test_replay_files_are_unique(tmp_path, monkeypatch):
+    writer = _writer(tmp_path)
+    writer._spill([_row("первый")])
+    paths = []
+    replace = os.replace
+
+    def track(src, dst):
+        paths.append(dst)
+        replace(src, dst)
+
+    monkeypatch.setattr(os, "replace", track)
+    writer.replay_spilled()
+    writer._spill([_row("второй")])
+    writer.replay_spilled()
+
+    assert len(set(paths)) == 2
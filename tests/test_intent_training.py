@@ -0,0 +1,44 @@
+from nlp_server.app.services import intent_classifier
+from nlp_server.app.services.intent_training import IntentRetrainer, TrainingStore, fit_intent_model
+
+
+class ConstantModel:
+    """Базовая модель, всегда отвечающая одним намерением"""
+
+    def __init__(self, label: int):
+        self.label = label
+
+    def score(self, texts, labels):
+        return sum(label == self.label for label in labels) / len(labels)
+
+
+def _retrainer(tmp_path, max_accuracy_drop=0.02):
+    return IntentRetrainer(TrainingStore(str(tmp_path / "train.jsonl")), str(tmp_path), 0.5, max_accuracy_drop)
+
+
+def test_baseline_scored_on_same_hold_out(tmp_path):
+    texts = list(intent_classifier.TRAIN_TEXTS)
+    labels = list(intent_classifier.TRAIN_LABELS)
+    result = fit_intent_model(texts, labels, str(tmp_path), "test", baseline=ConstantModel(1))
+
+    assert result["baseline_accuracy"] == round(labels.count(1) / len(labels), 4)
+    assert fit_intent_model(texts, labels, str(tmp_path), "test")["baseline_accuracy"] is None
+
+
+def test_first_retrain_compared_with_base_model(tmp_path, monkeypatch):
+    monkeypatch.setattr(intent_classifier, "read_engine_manifest", lambda: None)
+    retrainer = _retrainer(tmp_path)
+
+    worse = {"cv_accuracy": 0.8, "baseline_accuracy": 0.9}
+    assert "worse than current 0.9" in retrainer.validate(worse)
+    assert retrainer.validate({"cv_accuracy": 0.89, "baseline_accuracy": 0.9}) is None
+    # Базовая модель не загружена (rule-based) — сравнивать не с чем
+    assert retrainer.validate({"cv_accuracy": 0.8, "baseline_accuracy": None}) is None
+
+
+def test_manifest_metrics_take_precedence(tmp_path, monkeypatch):
+    manifest = {"version": "v", "metrics": {"cv_accuracy": 0.95}}
+    monkeypatch.setattr(intent_classifier, "read_engine_manifest", lambda: manifest)
+    retrainer = _retrainer(tmp_path)
+
+    assert "worse than current 0.95" in retrainer.validate({"cv_accuracy": 0.9, "baseline_accuracy": 0.5})
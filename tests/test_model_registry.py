@@ -0,0 +1,53 @@
+from nlp_server.app.services import model_registry as registry_module
+from nlp_server.app.services.model_registry import FAILED, READY, ModelRegistry, ModelUnavailable
+import pytest
+
+
+def test_failed_loader_is_not_retried_before_backoff(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(registry_module.time, "time", lambda: now[0])
+    calls = []
+
+    def loader():
+        calls.append(now[0])
+        if len(calls) < 3:
+            raise OSError("model file missing")
+        return "loaded"
+
+    registry = ModelRegistry()
+    registry.register("model", loader)
+
+    with pytest.raises(OSError):
+        registry.ensure("model")
+    with pytest.raises(ModelUnavailable):
+        registry.ensure("model")
+    assert len(calls) == 1
+    assert registry.status()["model"]["status"] == FAILED
+
+    # Пауза удваивается после каждой неудачи
+    now[0] += registry_module.MODEL_RETRY_BACKOFF
+    with pytest.raises(OSError):
+        registry.ensure("model")
+    now[0] += registry_module.MODEL_RETRY_BACKOFF
+    with pytest.raises(ModelUnavailable):
+        registry.ensure("model")
+    assert len(calls) == 2
+
+    now[0] += registry_module.MODEL_RETRY_BACKOFF
+    registry.ensure("model")
+    registry.ensure("model")
+    assert len(calls) == 3
+    assert registry.status()["model"]["status"] == READY
+    assert registry.status()["model"]["failures"] == 0
+
+
+def test_load_all_records_failure_without_raising():
+    registry = ModelRegistry()
+    registry.register("broken", lambda: 1 / 0)
+    registry.register("ok", lambda: None)
+
+    registry.load_all()
+
+    assert not registry.ready()
+    assert registry.status()["ok"]["status"] == READY
+    assert registry.status()["broken"]["status"] == FAILED
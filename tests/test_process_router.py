@@ -0,0 +1,81 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from nlp_server.app.routers.process import router as process_router
+import asyncio
+import io
+import pytest
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.include_router(process_router.router)
+    return TestClient(app)
+
+
+def _collect(upload):
+    async def run():
+        return [item async for item in process_router._ndjson_items(upload)]
+    return asyncio.run(run())
+
+
+def test_ndjson_items_read_in_chunks_off_loop(monkeypatch):
+    monkeypatch.setattr(process_router, "PROCESS_BULK_CHUNK_SIZE", 2)
+    calls = []
+    read = process_router._read_ndjson_lines
+
+    def counted(upload, start):
+        calls.append(start)
+        return read(upload, start)
+
+    monkeypatch.setattr(process_router, "_read_ndjson_lines", counted)
+    upload = io.BytesIO('"один"\n\n{"text": "два"}\nnot json\n"три"'.encode("utf-8"))
+
+    items = _collect(upload)
+
+    assert [(index, text) for index, text, _ in items] == [(0, "один"), (1, "два"), (2, None), (3, "три")]
+    assert items[2][2].startswith("Invalid JSON")
+    assert calls == [0, 1, 3]
+
+
+def test_bulk_rejects_unknown_query_task(client):
+    response = client.post(
+        "/process/bulk?tasks=intent&tasks=translate",
+        content=b'"text"\n',
+        headers={"content-type": "application/x-ndjson"}
+    )
+    assert response.status_code == 422
+
+
+def test_bulk_and_single_reject_unknown_body_task(client):
+    response = client.post("/process/bulk", json={"texts": ["text"], "tasks": ["translate"]})
+    assert response.status_code == 422
+
+    response = client.post("/process/", json={"text": "text", "tasks": ["translate"]})
+    assert response.status_code == 422
+
+
+def test_cache_failures_are_logged_not_raised(monkeypatch):
+    warnings = []
+    monkeypatch.setattr(process_router.logger, "warning", warnings.append)
+
+    def fail(*args):
+        raise RuntimeError("disk I/O error")
+
+    monkeypatch.setattr(process_router.result_cache, "lookup", fail)
+    monkeypatch.setattr(process_router.result_cache, "put_many", fail)
+
+    async def run():
+        request = process_router.ProcessTextRequest(text="текст")
+        assert await process_router._cache_lookup(request) == (None, [None])
+        process_router._cache_put(object(), {})
+        assert len(process_router._cache_writes) == 1
+        await asyncio.gather(*process_router._cache_writes, return_exceptions=True)
+        await asyncio.sleep(0)
+
+    asyncio.run(run())
+    assert not process_router._cache_writes
+    assert warnings == [
+        "Process result cache lookup failed: disk I/O error",
+        "Process result cache write failed: disk I/O error"
+    ]
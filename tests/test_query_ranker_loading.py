@@ -0,0 +1,41 @@
+from nlp_server.app.services import spell_checker
+from nlp_server.app.services.model_registry import model_registry
+from nlp_server.app.services.query_ranker import QueryRanker
+from nlp_server.app.services.spell_index import SymSpellIndex
+import pytest
+
+
+@pytest.fixture
+def small_dictionary(monkeypatch, tmp_path):
+    """Маленький словарь, где без частот запросов «кол» исправляется на «код», а с ними — на «кот»"""
+    path = tmp_path / "query_frequencies.pkl"
+    QueryRanker({"кот": 100}, {}).save(str(path))
+
+    monkeypatch.setattr(spell_checker, "spell_index", SymSpellIndex({"кот": 10, "код": 50}))
+    monkeypatch.setattr(spell_checker, "domain_layer", SymSpellIndex())
+    monkeypatch.setattr(spell_checker, "query_ranker", None)
+    monkeypatch.setattr(spell_checker, "QUERY_FREQUENCY_PATH", "")
+    spell_checker.invalidate_spell_caches()
+    model_registry.register("query_ranker", spell_checker.init_query_ranker)
+    yield str(path)
+    spell_checker.invalidate_spell_caches()
+    model_registry.register("query_ranker", spell_checker.init_query_ranker)
+
+
+def test_ranker_is_loaded_on_first_lookup(small_dictionary, monkeypatch):
+    monkeypatch.setattr(spell_checker, "QUERY_FREQUENCY_PATH", small_dictionary)
+
+    assert spell_checker.correct_spelling("кол").corrected_text == "кот"
+    assert spell_checker.query_ranker is not None
+
+
+def test_installing_ranker_drops_cached_corrections(small_dictionary, monkeypatch):
+    assert spell_checker.correct_spelling("кол").corrected_text == "код"
+    digest = spell_checker.dictionary_digest()
+
+    # Частоты появились позже (например, фоновый прогрев закончился после первых запросов)
+    monkeypatch.setattr(spell_checker, "QUERY_FREQUENCY_PATH", small_dictionary)
+    model_registry.ensure("query_ranker")
+
+    assert spell_checker.correct_spelling("кол").corrected_text == "кот"
+    assert spell_checker.dictionary_digest() != digest
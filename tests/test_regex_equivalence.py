@@ -0,0 +1,42 @@
+from nlp_server.app.services.entity_extraction import extract_entities_regex
+from nlp_server.app.services.spell_checker import tokenize
+from nlp_server.benchmarks.regex_bench import TEXTS, legacy_extract_entities_regex, legacy_tokenize
+import random
+import pytest
+
+
+# Фрагменты, из которых собираются тексты: все шаблоны сумм и ключевые слова товаров
+# в разном регистре, с точками и « на », обрезающими название товара
+FRAGMENTS = [
+    "Создай КС", "закупку", "на поставку", "НА ЗАКУПКУ", "товар", "Товары", "продукт", "продукты",
+    "{n} тыс", "{n}тыс.", "{n} ТЫС", "{n} т.р", "{n}т.р.", "на {n} руб", "НА {n} РУБ", "на  {n}  руб",
+    "сумма {n}", "суммой {n}", "СУММУ {n}", "сумм {n}", "бумаги", "мебели для офиса", "на", ".", ",",
+    "оргтехника", "ноутбуков", "ёлок", "срочно", "ЭЦП", "шт", "—", "(", ")", "2024", "т.", "р"
+]
+
+
+def _random_texts(count: int, seed: int = 3):
+    rng = random.Random(seed)
+    texts = []
+    for _ in range(count):
+        parts = [
+            rng.choice(FRAGMENTS).format(n=rng.choice(["1", "15", "300", "50000", "007"]))
+            for _ in range(rng.randint(1, 10))
+        ]
+        texts.append(rng.choice([" ", "", "  "]).join(parts) if rng.random() < 0.2 else " ".join(parts))
+    return texts
+
+
+@pytest.mark.parametrize("text", TEXTS)
+def test_entities_match_legacy_on_examples(text):
+    assert extract_entities_regex(text) == legacy_extract_entities_regex(text)
+
+
+def test_entities_match_legacy_on_generated_texts():
+    for text in _random_texts(5000):
+        assert extract_entities_regex(text) == legacy_extract_entities_regex(text), text
+
+
+def test_tokenize_matches_legacy():
+    for text in TEXTS + _random_texts(2000) + ["", "   ", "слово,слово", "a_b 12-3 ё!"]:
+        assert [token for token, is_word in tokenize(text) if is_word] == legacy_tokenize(text), text
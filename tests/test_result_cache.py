@@ -0,0 +1,90 @@
+from nlp_server.app.services import result_cache as cache_module
+from nlp_server.app.services import spell_checker
+from nlp_server.app.services.result_cache import ResultCache, cache_versions
+import os
+import sqlite3
+import threading
+
+
+RESULT = {
+    "original_text": "Закупка бумаги",
+    "processed_text": "Закупка бумаги",
+    "intent": "create_procurement",
+    "confidence": 0.9,
+    "entities": {"product": "бумаги"},
+    "spellcheck_corrections": {}
+}
+
+
+def test_versions_are_computed_once_per_model_state(monkeypatch):
+    calls = []
+    versions = cache_module.model_versions
+
+    def counted():
+        calls.append(1)
+        return versions()
+
+    monkeypatch.setattr(cache_module, "model_versions", counted)
+    spell_checker.invalidate_spell_caches()
+
+    first = cache_versions()
+    assert cache_versions() == first
+    assert len(calls) == 1
+
+    spell_checker.invalidate_spell_caches()
+    cache_versions()
+    assert len(calls) == 2
+
+
+def test_open_creates_schema_and_lookup_round_trip(tmp_path):
+    path = str(tmp_path / "cache" / "results.sqlite")
+    cache = ResultCache(path, ttl=3600, max_entries=100)
+
+    cache.open()
+    assert os.path.exists(path)
+    assert sqlite3.connect(path).execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+    keys, cached = cache.lookup(["Закупка бумаги", "Закупка бумаги"], ["intent", "entities"])
+    assert cached == [None, None]
+    cache.put_many(keys, [RESULT, dict(RESULT, error="failed")])
+
+    # Другой поток открывает своё соединение без повторного создания схемы
+    found = []
+    thread = threading.Thread(target=lambda: found.append(cache.lookup(["Закупка бумаги"], ["entities", "intent"])))
+    thread.start()
+    thread.join()
+
+    _, cached = found[0]
+    assert cached == [{key: value for key, value in RESULT.items() if key != "original_text"}]
+    assert cache.stats()["entries"] == 1
+
+
+def test_disabled_cache_is_all_misses():
+    cache = ResultCache("", ttl=3600, max_entries=100)
+    cache.open()
+
+    assert cache.lookup(["текст"], ["intent"]) == (None, [None])
+
+
+def test_rules_fallback_answers_are_not_served_to_the_model(tmp_path, monkeypatch):
+    cache = ResultCache(str(tmp_path / "results.sqlite"), ttl=3600, max_entries=100)
+    monkeypatch.setattr(cache_module.intent_classifier, "model", None)
+
+    keys, _ = cache.lookup(["Закупка бумаги"], ["intent"])
+    cache.put_many(keys, [RESULT])
+    assert cache.lookup(["Закупка бумаги"], ["intent"])[1] == [{key: value for key, value in RESULT.items() if key != "original_text"}]
+
+    monkeypatch.setattr(cache_module.intent_classifier, "model", object())
+    assert cache.lookup(["Закупка бумаги"], ["intent"])[1] == [None]
+
+
+def test_answers_computed_across_a_model_change_are_not_written(tmp_path, monkeypatch):
+    cache = ResultCache(str(tmp_path / "results.sqlite"), ttl=3600, max_entries=100)
+    monkeypatch.setattr(cache_module.intent_classifier, "model", None)
+
+    keys, _ = cache.lookup(["Закупка бумаги"], ["intent"])
+    # Модель загрузилась, пока ответ считался
+    monkeypatch.setattr(cache_module.intent_classifier, "model", object())
+    cache.put_many(keys, [RESULT])
+
+    assert cache.writes == 0
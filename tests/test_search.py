@@ -0,0 +1,49 @@
+from nlp_server.app.services import search
+import json
+import os
+
+
+def _write_corpus(path, titles):
+    with open(path, "w", encoding="utf-8") as f:
+        for number, title in enumerate(titles):
+            f.write(json.dumps({"id": number, "title": title, "amount": 1000 * (number + 1)}, ensure_ascii=False) + "\n")
+
+
+def test_snapshot_is_rebuilt_when_corpus_changes(monkeypatch, tmp_path):
+    corpus = tmp_path / "corpus.jsonl"
+    monkeypatch.setattr(search, "SEARCH_INDEX_PATH", str(tmp_path / "index"))
+    monkeypatch.setattr(search, "SEARCH_CORPUS_PATH", "")
+
+    # Первый старт без корпуса: пустой снимок
+    index = search.load_search_index()
+    assert len(index) == 0
+
+    # Перезапуск с корпусом
+    _write_corpus(corpus, ["Закупка бумаги", "Поставка ноутбуков"])
+    monkeypatch.setattr(search, "SEARCH_CORPUS_PATH", str(corpus))
+    index = search.load_search_index()
+    assert len(index) == 2
+
+    # Источники не менялись — открывается снимок
+    reopened = search.load_search_index()
+    assert [segment.name for segment in reopened.segments] == [segment.name for segment in index.segments]
+
+    # Корпус дописан
+    _write_corpus(corpus, ["Закупка бумаги", "Поставка ноутбуков", "Закупка мебели"])
+    assert len(search.load_search_index()) == 3
+
+    monkeypatch.setattr(search, "SEARCH_STEM_LENGTH", search.SEARCH_STEM_LENGTH + 1)
+    rebuilt = search.load_search_index()
+    assert len(rebuilt) == 3
+    assert rebuilt.stem_length == search.SEARCH_STEM_LENGTH
+    assert len([entry for entry in os.listdir(tmp_path / "index") if entry.startswith("segment-")]) == 1
+
+
+def test_snapshot_disabled_by_default(monkeypatch, tmp_path):
+    corpus = tmp_path / "corpus.jsonl"
+    _write_corpus(corpus, ["Закупка бумаги"])
+    monkeypatch.setattr(search, "SEARCH_CORPUS_PATH", str(corpus))
+
+    assert search.SEARCH_INDEX_PATH == ""
+    assert len(search.load_search_index()) == 1
+    assert os.listdir(tmp_path) == ["corpus.jsonl"]
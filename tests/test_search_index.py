@@ -0,0 +1,139 @@
+from nlp_server.app.services.search_index import SearchIndex, Vocabulary, analyze, stem
+import pytest
+
+
+@pytest.mark.parametrize("forms, expected", [
+    (["бумага", "бумаги", "бумагой", "бумаг"], "бумаг"),
+    (["офисная", "офисной", "офисные", "офисных"], "офисн"),
+    (["закупка", "закупки", "закупкам"], "закупк"),
+    (["ноутбук", "ноутбуков", "ноутбуками"], "ноутбук"),
+    (["мебель", "мебели"], "мебел"),
+    (["возможность", "возможности"], "возможн"),
+])
+def test_stem_strips_inflectional_endings(forms, expected):
+    assert {stem(form) for form in forms} == {expected}
+
+
+def test_stem_keeps_short_and_vowelless_words():
+    assert stem("шт") == "шт"
+    assert stem("эцп") == "эцп"
+
+
+def test_analyze_drops_stop_words_and_numbers():
+    assert analyze("Закупка бумаги офисной на 300 тыс", 6) == ["закупк", "бумаг", "офисн", "тыс"]
+    assert analyze("Ёлки", 0) == analyze("елки", 0)
+
+
+def test_query_matches_other_word_forms():
+    index = SearchIndex(Vocabulary()).add_documents([
+        {"id": "1", "title": "Закупка бумаги офисной"},
+        {"id": "2", "title": "Поставка ноутбуков"},
+    ])
+
+    results, total = index.search("офисная бумага")
+
+    assert total == 1
+    assert results[0]["id"] == "1"
+
+
+DOCUMENTS = [
+    {"id": "1", "title": "Закупка бумаги офисной", "category": "канцелярия", "amount": 15000},
+    {"id": "2", "title": "Поставка ноутбуков", "description": "ноутбуки для бухгалтерии", "amount": 300000},
+    {"id": "3", "title": "Закупка мебели", "description": "столы и стулья", "amount": 120000},
+    {"id": "4", "title": "Бумага для принтера", "category": "канцелярия", "amount": None},
+    {"id": "5", "title": "Ремонт ноутбука", "amount": "не указана"},
+]
+
+
+def _ids(results):
+    return [result["id"] for result in results]
+
+
+def _build(documents, segment_size=2, max_segments=8):
+    index = SearchIndex(Vocabulary(), max_segments=max_segments)
+    for start in range(0, len(documents), segment_size):
+        index = index.add_documents(documents[start:start + segment_size])
+    return index
+
+
+def test_bm25_ranks_by_term_weight():
+    index = _build(DOCUMENTS)
+
+    results, total = index.search("ноутбуки")
+    assert total == 2
+    # Термин дважды в коротком документе выше, чем один раз
+    assert _ids(results) == ["2", "5"]
+    assert results[0]["score"] > results[1]["score"] > 0
+
+    assert index.search("закупка бумаги")[0][0]["id"] == "1"
+    assert index.search("трактор") == ([], 0)
+
+
+def test_filters_and_paging():
+    index = _build(DOCUMENTS)
+
+    results, total = index.search("закупка", min_amount=100000, max_amount=200000)
+    assert (_ids(results), total) == (["3"], 1)
+
+    # Без известных терминов, но с фильтром — новые документы, прошедшие фильтр
+    results, total = index.search("трактор", any_terms=["бумага"])
+    assert (_ids(results), total) == (["4", "1"], 2)
+
+    # Документы без суммы не проходят фильтр по сумме
+    results, total = index.search("бумага", min_amount=0)
+    assert (_ids(results), total) == (["1"], 1)
+
+    first, total = index.search("закупка ноутбуков бумаги", limit=2)
+    second, _ = index.search("закупка ноутбуков бумаги", limit=2, offset=2)
+    everything, _ = index.search("закупка ноутбуков бумаги", limit=10)
+    assert total == len(everything) == 5
+    assert _ids(first) + _ids(second) == _ids(everything)[:4]
+
+
+def test_merge_keeps_results():
+    segmented = _build(DOCUMENTS, segment_size=1)
+    assert len(segmented.segments) == 5
+
+    merged = segmented.optimize()
+    assert len(merged.segments) == 1
+    for query in ["бумага", "ноутбуки", "закупка мебели", "канцелярия"]:
+        assert merged.search(query) == segmented.search(query)
+
+    # Сверх max_segments соседние сегменты сливаются при добавлении
+    limited = _build(DOCUMENTS, segment_size=1, max_segments=2)
+    assert len(limited.segments) == 2
+    assert limited.search("бумага") == segmented.search("бумага")
+
+
+def test_snapshot_round_trip(tmp_path):
+    directory = str(tmp_path / "index")
+    index = _build(DOCUMENTS[:3]).add_documents([], source_position=7)
+    index.save(directory)
+
+    opened = SearchIndex.open(directory)
+    assert len(opened) == 3
+    assert opened.source_position == 7
+    assert opened.search("ноутбуки") == index.search("ноутбуки")
+
+    # Добавление к открытому снимку и слияние; слитые сегменты удаляются из каталога
+    updated = opened.add_documents(DOCUMENTS[3:]).optimize()
+    updated.save(directory)
+    reopened = SearchIndex.open(directory)
+
+    assert len(reopened) == 5
+    assert reopened.search("бумага") == _build(DOCUMENTS).search("бумага")
+    assert sorted(path.name for path in (tmp_path / "index").iterdir() if path.name.startswith("segment-")) == [
+        f"segment-{reopened.segments[0].name}"
+    ]
+    assert reopened.segments[0].document(0) == {
+        "id": "1", "title": "Закупка бумаги офисной", "description": None, "category": "канцелярия", "amount": 15000
+    }
+
+
+def test_source_documents_are_not_mutated():
+    documents = [dict(document) for document in DOCUMENTS]
+    index = _build(documents)
+    index.search("бумага")[0][0]["id"] = "changed"
+
+    assert documents == DOCUMENTS
+    assert index.search("бумага")[0][0]["id"] != "changed"
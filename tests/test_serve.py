@@ -0,0 +1,75 @@
+import nlp_server.app.serve as serve
+
+
+class FakeSupervisor(serve.Supervisor):
+    """Супервизор без fork: запуск воркера только регистрирует фиктивный pid"""
+
+    def __init__(self, workers: int):
+        super().__init__(sock=None, workers=workers, max_memory_mb=0)
+        self.next_pid = 1000
+        self.spawned = []
+
+    def spawn(self, slot: int):
+        self.next_pid += 1
+        self.children[self.next_pid] = (slot, serve.time.time())
+        self.spawned.append(slot)
+
+
+def test_fast_failures_back_off_exponentially(monkeypatch):
+    monkeypatch.setattr(serve, "NLP_RESPAWN_BACKOFF", 1.0)
+    monkeypatch.setattr(serve, "NLP_RESPAWN_MAX_BACKOFF", 3.0)
+    monkeypatch.setattr(serve, "NLP_WORKER_MAX_FAST_FAILURES", 0)
+    now = [1000.0]
+    monkeypatch.setattr(serve.time, "time", lambda: now[0])
+
+    supervisor = FakeSupervisor(workers=2)
+    supervisor.spawn(0)
+    supervisor.spawn(1)
+
+    delays = []
+    for _ in range(4):
+        pid = next(pid for pid, (slot, _) in supervisor.children.items() if slot == 0)
+        supervisor.reap(pid, 256)
+        assert 0 not in [slot for slot, _ in supervisor.children.values()]
+        delays.append(supervisor.pending[0] - now[0])
+        now[0] = supervisor.pending[0]
+        supervisor.respawn_pending()
+
+    assert delays == [1.0, 2.0, 3.0, 3.0]
+    # Соседний слот не затронут
+    assert supervisor.fast_failures[1] == 0
+
+
+def test_slow_exit_resets_failures_and_respawns_immediately(monkeypatch):
+    monkeypatch.setattr(serve, "NLP_WORKER_MIN_UPTIME", 10.0)
+    now = [1000.0]
+    monkeypatch.setattr(serve.time, "time", lambda: now[0])
+
+    supervisor = FakeSupervisor(workers=1)
+    supervisor.spawn(0)
+    supervisor.fast_failures[0] = 3
+    now[0] += 60
+    supervisor.reap(next(iter(supervisor.children)), 0)
+
+    assert supervisor.fast_failures[0] == 0
+    assert not supervisor.pending
+    assert len(supervisor.children) == 1
+
+
+def test_repeated_fast_failures_stop_with_error(monkeypatch):
+    monkeypatch.setattr(serve, "NLP_WORKER_MAX_FAST_FAILURES", 2)
+    monkeypatch.setattr(serve.os, "kill", lambda pid, sig: None)
+
+    supervisor = FakeSupervisor(workers=2)
+    supervisor.spawn(0)
+    supervisor.spawn(1)
+    first = next(iter(supervisor.children))
+
+    supervisor.reap(first, 256)
+    supervisor.pending[0] = 0
+    supervisor.respawn_pending()
+    supervisor.reap(next(pid for pid, (slot, _) in supervisor.children.items() if slot == 0), 256)
+
+    assert supervisor.stopping
+    assert supervisor.exit_code == 1
+    assert not supervisor.pending
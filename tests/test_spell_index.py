@@ -0,0 +1,80 @@
+from nlp_server.app.services.compact_index import CompactSpellIndex, write_compact_dictionary
+from nlp_server.app.services.spell_checker import load_word_frequencies
+from nlp_server.app.services.spell_index import SymSpellIndex
+from spellchecker import SpellChecker
+import random
+import pytest
+
+
+LETTERS = "абвгдеёжзийклмнопрстуфхцчшщъыьэюя"
+
+
+def _misspell(word: str, rng: random.Random) -> str:
+    """Одна или две случайные правки: удаление, вставка, замена или перестановка соседних букв"""
+    for _ in range(rng.choice((1, 1, 2))):
+        position = rng.randrange(len(word))
+        operation = rng.choice(("delete", "insert", "replace", "transpose"))
+        if operation == "delete" and len(word) > 2:
+            word = word[:position] + word[position + 1:]
+        elif operation == "insert":
+            word = word[:position] + rng.choice(LETTERS) + word[position:]
+        elif operation == "transpose" and position < len(word) - 1:
+            word = word[:position] + word[position + 1] + word[position] + word[position + 2:]
+        else:
+            word = word[:position] + rng.choice(LETTERS) + word[position + 1:]
+    return word
+
+
+@pytest.fixture(scope="module")
+def frequencies():
+    """Часть словаря pyspellchecker: частые слова (много близких соседей) и случайные"""
+    full = load_word_frequencies()
+    rng = random.Random(1)
+    frequent = sorted(full, key=lambda word: (-full[word], word))[:4000]
+    sample = set(frequent) | set(rng.sample(sorted(full), 2000))
+    return {word: full[word] for word in sample}
+
+
+@pytest.fixture(scope="module")
+def queries(frequencies):
+    rng = random.Random(2)
+    # Короткие слова: pyspellchecker перебирает все правки на расстоянии 2, и длинные слова в нём медленные
+    words = sorted(word for word in frequencies if 3 <= len(word) <= 7)
+    typos = [_misspell(rng.choice(words), rng) for _ in range(120)]
+    return typos + rng.sample(words, 20) + ["закупкаа", "123", "тыщ", "ааааааааааааааааааааааааааа"]
+
+
+@pytest.fixture(scope="module")
+def spell_checker(frequencies):
+    checker = SpellChecker(language=None, distance=2)
+    checker.word_frequency.load_json(frequencies)
+    return checker
+
+
+def test_symspell_matches_pyspellchecker(frequencies, queries, spell_checker):
+    index = SymSpellIndex(frequencies)
+
+    for word in queries:
+        assert index.candidates(word) == spell_checker.candidates(word), word
+        assert index.correction(word) == spell_checker.correction(word), word
+
+
+def test_compact_index_matches_symspell(frequencies, queries, tmp_path):
+    path = str(tmp_path / "spell_dictionary.bin")
+    write_compact_dictionary(frequencies, path)
+    compact = CompactSpellIndex.open(path)
+    index = SymSpellIndex(frequencies)
+
+    for word in queries:
+        assert compact.correction(word) == index.correction(word), word
+        assert compact.frequency(word) == index.frequency(word), word
+
+
+def test_saved_index_round_trip(frequencies, tmp_path):
+    index = SymSpellIndex(frequencies)
+    path = str(tmp_path / "spell_index.pkl")
+    index.save(path)
+    loaded = SymSpellIndex.load(path)
+
+    assert len(loaded) == len(index)
+    assert loaded.correction("закупкаа") == index.correction("закупкаа")
@@ -0,0 +1,73 @@
+from nlp_server.app.services import spell_checker
+from nlp_server.app.services.query_ranker import QueryRanker
+from nlp_server.app.services.spell_index import SymSpellIndex
+from nlp_server.app.services.spell_session import SpellSession
+import pytest
+
+
+@pytest.fixture
+def small_dictionary(monkeypatch):
+    """Словарь, где исправление «кол» зависит от предыдущего слова: «черный кот», иначе «код»"""
+    monkeypatch.setattr(spell_checker, "spell_index", SymSpellIndex({
+        "кот": 10, "код": 50, "черный": 20, "закупка": 40, "бумаги": 30, "офисной": 10, "и": 100
+    }))
+    monkeypatch.setattr(spell_checker, "domain_layer", SymSpellIndex())
+    monkeypatch.setattr(spell_checker, "domain_words", [])
+    monkeypatch.setattr(spell_checker, "query_ranker", QueryRanker({"кот": 1}, {"кот": {"черный": 5}}))
+    monkeypatch.setattr(spell_checker, "QUERY_FREQUENCY_PATH", "")
+    spell_checker.invalidate_spell_caches()
+    yield
+    spell_checker.invalidate_spell_caches()
+
+
+def _typing(text: str):
+    """Тексты, которые присылает клиент при наборе text по одному символу"""
+    return [text[:end] for end in range(1, len(text) + 1)]
+
+
+def test_incremental_matches_full_correction(small_dictionary):
+    session = SpellSession()
+    edits = _typing("Закупк бумагт офисной, черный кол и кол.") + [
+        "Закупк бумагт офисной, белый кол и кол.",
+        "Закупк бумагт офисной, черный кол и кол.",
+        "черный кол",
+        "кол черный кол",
+        "",
+        "Закупк  бумагт!!",
+    ]
+
+    for text in edits:
+        result, _ = session.correct(text)
+        spell_checker.invalidate_spell_caches()
+        assert result == spell_checker.correct_spelling(text), text
+
+    assert session.correct("черный кол")[0].corrected_text == "черный кот"
+
+
+def test_only_changed_words_are_checked(small_dictionary):
+    session = SpellSession()
+    _, checked = session.correct("закупк бумагт офисной")
+    assert checked == 3
+
+    # Дописанное слово проверяется одно
+    _, checked = session.correct("закупк бумагт офисной черный")
+    assert checked == 1
+
+    # Опечатка исправлена самим пользователем: контекст следующего слова — то же исправление
+    _, checked = session.correct("закупк бумаги офисной черный")
+    assert checked == 1
+
+    # Другое слово: проверяется оно и следующее за ним (у него другой контекст)
+    _, checked = session.correct("закупк кот офисной черный")
+    assert checked == 2
+
+
+def test_dictionary_change_rechecks_text(small_dictionary):
+    session = SpellSession()
+    assert session.correct("закупк бумагт")[0].corrected_text == "закупка бумаги"
+
+    spell_checker.add_domain_words(["закупк"])
+    result, checked = session.correct("закупк бумагт")
+
+    assert checked == 2
+    assert result.corrected_text == "закупк бумаги"